@@ -44,13 +44,16 @@ if DEBUG:
     INSTALLED_APPS.append("debug_toolbar")
 
 MIDDLEWARE = [
+    "core.middleware.InstrumentationMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise, async capable so the chain stays async under ASGI
+    "core.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -98,11 +101,27 @@ WSGI_APPLICATION = "aerten.wsgi.application"
 DATABASES = {
     "default": dj_database_url.config(
         default=os.getenv("DATABASE_URL"),
-        conn_max_age=600,
+        conn_max_age=int(os.getenv("CONN_MAX_AGE", 600)),
         ssl_require=True
     )
 }
 
+# Read replicas, comma separated URLs. Safe API reads go to one of them (see core.db_routers)
+DATABASE_REPLICAS = []
+for (number, url) in enumerate(filter(None, os.getenv("DATABASE_REPLICA_URLS", "").split(",")), start=1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = dj_database_url.parse(url.strip(), conn_max_age=int(os.getenv("CONN_MAX_AGE", 600)), ssl_require=True)
+    # Tests run against the primary only
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.db_routers.PrimaryReplicaRouter"]
+
+# After a write the client reads from the primary for this long, covering replica lag
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 10))
+# Only these paths read from replicas, the admin and auth endpoints stay on the primary
+REPLICA_READ_PATHS = ["/api/"]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -127,7 +146,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "COERCE_DECIMAL_TO_STRING": False,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "employee_management.authentication.ClaimsJWTAuthentication",
     ),
 }
 
@@ -135,6 +154,9 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("JWT", "Bearer"),
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
+    # Adds employee_id, access_level and is_staff claims so permission checks skip the database
+    "TOKEN_OBTAIN_SERIALIZER": "employee_management.tokens.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "employee_management.tokens.TokenRefreshSerializer",
 }
 
 # Custom user model
@@ -151,7 +173,7 @@ DJOSER = {
 # Caching configuration (Redis)
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        "BACKEND": "core.cache_backends.InstrumentedRedisCache",
         "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/2"),
         "TIMEOUT": 10 * 60,
         "OPTIONS": {
@@ -160,6 +182,27 @@ CACHES = {
     }
 }
 
+# Versioned list caches are invalidated by signals, this only expires versions that are no longer read
+VERSIONED_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Serve the hot GET endpoints from employee_management.async_views. Turn it on when running
+# under ASGI (see Procfile), under WSGI every async view pays for its own event loop
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS", "False").lower() == "true"
+
+# Threads building employee image thumbnails after upload, 0 builds them inline on commit
+IMAGE_DERIVATIVE_WORKERS = int(os.environ.get("IMAGE_DERIVATIVE_WORKERS", 2))
+
+# Request instrumentation (core.middleware.InstrumentationMiddleware)
+# Server-Timing reveals query counts and timings, so production only sends it when asked to
+SERVER_TIMING = os.environ.get("SERVER_TIMING", str(DEBUG)).lower() == "true"
+# Requests slower than this are logged with their query and cache counts
+SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", 500))
+# The same statement this many times in one request is logged as a likely N+1
+REPEATED_QUERY_THRESHOLD = int(os.environ.get("REPEATED_QUERY_THRESHOLD", 5))
+
+# Bearer token Prometheus must present to scrape /metrics, empty closes it unless DEBUG is on
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
 # Logging configuration (Console logging only for Render)
 LOGGING = {
     "version": 1,
@@ -0,0 +1,5 @@
+from aerten.settings import *  # noqa
+
+
+# A replica for the routing tests: a second connection to the test database, see test_db_routing
+DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
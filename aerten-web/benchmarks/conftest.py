@@ -0,0 +1,86 @@
+"""
+API benchmarks. Skipped unless BENCHMARK_SCALES is set, for example:
+
+    BENCHMARK_SCALES=1000,10000 pytest benchmarks
+
+Every scale is seeded once into the test database by employee_management.seeding
+(smallest first, each one tops up the previous) and every case is measured against it.
+Results are written to benchmarks/results.json and compared with benchmarks/baseline.json,
+see README.md.
+"""
+import json
+import os
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from employee_management.models import Employee, Role
+from employee_management.seeding import DataSeeder
+from employee_management.tokens import TokenObtainPairSerializer
+import pytest
+
+
+BENCHMARK_DIR = Path(__file__).parent
+BASELINE_PATH = BENCHMARK_DIR / "baseline.json"
+RESULTS_PATH = BENCHMARK_DIR / "results.json"
+
+SCALES = sorted(int(scale) for scale in os.environ.get("BENCHMARK_SCALES", "").split(",") if scale.strip())
+if not SCALES:
+    collect_ignore_glob = ["test_*.py"]
+
+# Fixed seed, so that a scale is the same dataset on every run
+SEED = 2025
+PASSWORD = "benchmark"
+
+
+def pytest_generate_tests(metafunc):
+    if "dataset" in metafunc.fixturenames:
+        metafunc.parametrize("dataset", SCALES, indirect=True, scope="session", ids=lambda scale: f"{scale}")
+
+
+@pytest.fixture(scope="session")
+def dataset(request, django_db_setup, django_db_blocker):
+    scale = request.param
+    with django_db_blocker.unblock():
+        # The same data as `manage.py seed_data <scale> --seed 2025 --prefix bench --password benchmark`
+        DataSeeder(seed=SEED, password=PASSWORD, prefix="bench").run(scale)
+        admin, _ = get_user_model().objects.get_or_create(username="admin", defaults={"email": "admin@example.com", "is_staff": True})
+        # Gives the admin a queue: everyone below the second role of the seeded tree
+        Employee.objects.filter(user=admin).update(role=Role.objects.get(title="bench-role-1"))
+        token = TokenObtainPairSerializer.get_token(admin).access_token
+        sample_employee = Employee.objects.order_by("id").values_list("id", flat=True)[scale // 2]
+    return {"scale": scale, "token": f"JWT {token}", "employee_id": sample_employee}
+
+
+@pytest.fixture
+def api_client(dataset):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=dataset["token"])
+    return client
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def load_baseline():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+@pytest.fixture(scope="session")
+def results():
+    collected = {}
+    yield collected
+    RESULTS_PATH.write_text(json.dumps(collected, indent=2, sort_keys=True) + "\n")
+    if os.environ.get("BENCHMARK_UPDATE_BASELINE"):
+        BASELINE_PATH.write_text(json.dumps({**load_baseline(), **collected}, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(scope="session")
+def baseline():
+    return load_baseline()
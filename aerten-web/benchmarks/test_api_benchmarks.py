@@ -0,0 +1,127 @@
+"""
+Latency, query count and peak memory of the busiest endpoints, per endpoint and action.
+
+A case fails when it runs more queries than its baseline or uses more memory than the baseline
+by more than BENCHMARK_MAX_MEMORY_GROWTH. Being slower than the baseline by more than
+BENCHMARK_MAX_SLOWDOWN fails only when the baseline was recorded on the same runner,
+elsewhere it is reported as a warning: absolute latencies say more about the machine than the code.
+
+Whatever the baseline, a case over BENCHMARK_MAX_MEDIAN_MS or BENCHMARK_MAX_PEAK_MIB fails and is
+left out of the results, so an unbounded response can never become the reference.
+"""
+import os
+import platform
+import statistics
+import warnings
+import time
+import tracemalloc
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+
+
+REPEAT = int(os.environ.get("BENCHMARK_REPEAT", 15))
+MAX_SLOWDOWN = float(os.environ.get("BENCHMARK_MAX_SLOWDOWN", 1.25))
+MAX_MEMORY_GROWTH = float(os.environ.get("BENCHMARK_MAX_MEMORY_GROWTH", 1.5))
+# Below this the timer noise is bigger than any regression worth catching
+MIN_LATENCY_MS = 2.0
+# Absolute budgets, checked before and regardless of the baseline
+MAX_MEDIAN_MS = float(os.environ.get("BENCHMARK_MAX_MEDIAN_MS", 1000))
+MAX_PEAK_KIB = float(os.environ.get("BENCHMARK_MAX_PEAK_MIB", 128)) * 1024
+# Latencies are only comparable between runs on the same machine, database and Python
+RUNNER = os.environ.get("BENCHMARK_RUNNER") or f"{platform.node()}/{platform.machine()}/py{platform.python_version()}/{connection.vendor}"
+
+# (endpoint.action, path, warm): `warm` cases keep the list cache between runs
+CASES = [
+    ("employees.list", "/api/v1/employees/", False),
+    ("employees.list_deep_page", "/api/v1/employees/?page={deep_page}", False),
+    ("employees.list_cursor", "/api/v1/employees/?pagination=cursor", False),
+    ("employees.search", "/api/v1/employees/?search=mensah", False),
+    ("employees.retrieve", "/api/v1/employees/{employee_id}/", False),
+    ("employees.stats", "/api/v1/employees/stats/", False),
+    ("requests.list", "/api/v1/requests/?pagination=cursor", False),
+    ("requests.list_pending", "/api/v1/requests/?status=Pending&pagination=cursor", False),
+    ("requests.queue", "/api/v1/requests/?queue=true&status=Pending", False),
+    ("roles.list", "/api/v1/roles/", False),
+    ("roles.list_cached", "/api/v1/roles/", True),
+    ("roles.tree", "/api/v1/roles/tree/", False),
+    ("permissions.list", "/api/v1/permissions/", False),
+    ("permissions.list_cached", "/api/v1/permissions/", True),
+]
+
+
+def measure(api_client, path, warm):
+    def get():
+        if not warm:
+            cache.clear()
+        response = api_client.get(path)
+        assert response.status_code == 200, response.content[:200]
+        return response
+
+    get()  # Warms up connections, the ContentType cache and, for warm cases, the list cache
+    durations = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        get()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        try:
+            get()
+            (_, peak) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(durations), 2),
+        "p95_ms": round(sorted(durations)[int(len(durations) * 0.95) - 1], 2),
+        "queries": len(queries),
+        "peak_kib": round(peak / 1024, 1),
+        "runner": RUNNER,
+    }
+
+
+def over_budget(measured):
+    found = []
+    if measured["median_ms"] > MAX_MEDIAN_MS:
+        found.append(f"median {measured['median_ms']}ms over {MAX_MEDIAN_MS:g}ms")
+    if measured["peak_kib"] > MAX_PEAK_KIB:
+        found.append(f"peak memory {measured['peak_kib']}KiB over {MAX_PEAK_KIB:g}KiB")
+    return found
+
+
+def regressions(measured, expected):
+    """(failures, advisories) of a measurement against its baseline"""
+    found = []
+    advisories = []
+    if measured["queries"] > expected["queries"]:
+        found.append(f"queries {expected['queries']} -> {measured['queries']}")
+    if measured["median_ms"] > max(expected["median_ms"] * MAX_SLOWDOWN, MIN_LATENCY_MS):
+        slower = f"median {expected['median_ms']}ms -> {measured['median_ms']}ms"
+        if expected.get("runner") == measured["runner"]:
+            found.append(slower)
+        else:
+            advisories.append(f"{slower} (baseline from {expected.get('runner', 'an unknown runner')})")
+    if measured["peak_kib"] > expected["peak_kib"] * MAX_MEMORY_GROWTH:
+        found.append(f"peak memory {expected['peak_kib']}KiB -> {measured['peak_kib']}KiB")
+    return (found, advisories)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(("case", "path", "warm"), CASES, ids=[case for (case, _, _) in CASES])
+def test_endpoint(api_client, dataset, results, baseline, case, path, warm):
+    path = path.format(employee_id=dataset["employee_id"], deep_page=max(dataset["scale"] // 20, 1))
+    key = f"{dataset['scale']}:{case}"
+
+    measured = measure(api_client, path, warm)
+    over = over_budget(measured)
+    assert not over, f"{key} is over budget: {', '.join(over)}"
+    results[key] = measured
+
+    if key in baseline:
+        (found, advisories) = regressions(measured, baseline[key])
+        for advisory in advisories:
+            warnings.warn(f"{key} slower than its baseline: {advisory}")
+        assert not found, f"{key} regressed: {', '.join(found)}"
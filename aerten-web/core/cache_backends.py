@@ -0,0 +1,61 @@
+"""
+Cache backends that count and time their calls for the request profile (see core.instrumentation)
+and report cache hits and misses to core.metrics.
+"""
+import threading
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+from core.instrumentation import cache_operation
+from core.metrics import observe_cache_lookups
+
+
+# The async methods of both backends fall back to these through sync_to_async
+INSTRUMENTED_METHODS = (
+    "add", "set", "touch", "delete", "has_key", "incr", "decr",
+    "set_many", "delete_many", "clear", "get_or_set",
+)
+
+
+def _instrumented(name):
+    def method(self, *args, **kwargs):
+        with cache_operation():
+            return getattr(super(InstrumentedCacheMixin, self), name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+_missing = object()
+# Set while get_many() runs, the default get_many() is a loop over get()
+_lookup = threading.local()
+
+
+class InstrumentedCacheMixin:
+    def get(self, key, default=None, version=None):
+        with cache_operation():
+            value = super().get(key, _missing, version=version)
+        if not getattr(_lookup, "many", False):
+            observe_cache_lookups([key], hits=() if value is _missing else (key,))
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        _lookup.many = True
+        try:
+            with cache_operation():
+                values = super().get_many(keys, version=version)
+        finally:
+            _lookup.many = False
+        observe_cache_lookups(keys, hits=values)
+        return values
+
+
+for _name in INSTRUMENTED_METHODS:
+    setattr(InstrumentedCacheMixin, _name, _instrumented(_name))
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
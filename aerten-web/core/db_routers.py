@@ -0,0 +1,49 @@
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Replica picked for the current request, None when reads must go to the primary.
+# Set by core.middleware.ReplicaRoutingMiddleware, unset everywhere else (shell, commands, tasks)
+_read_replica = ContextVar("read_replica", default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def set_read_replica(alias):
+    """Route this context's reads to `alias` (None for the primary), returns a token for reset_read_replica"""
+    return _read_replica.set(alias)
+
+
+def reset_read_replica(token):
+    _read_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads go to the replica chosen for the request, writes always go to the primary.
+
+    Anything inside a transaction on the primary reads from the primary as well, so
+    select_for_update and read-modify-write blocks never see replica lag.
+    """
+    def db_for_read(self, model, **hints):
+        alias = _read_replica.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Follow relations on the database the instance came from
+            return instance._state.db
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
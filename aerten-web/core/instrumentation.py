@@ -0,0 +1,192 @@
+"""
+Per-request counters behind the Server-Timing header and the slow request log.
+
+InstrumentationMiddleware opens a RequestProfile for every request and keeps it in a
+context variable, so it follows the request into sync_to_async threads. The SQL wrapper
+(installed on every new connection by CoreConfig.ready), the instrumented cache backends
+and InstrumentedViewMixin add to whichever profile is current and do nothing outside one.
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+
+_current_profile = ContextVar("request_profile", default=None)
+
+# Phases reported in Server-Timing, besides db, cache and total
+PHASES = ("auth", "queryset", "serialize", "render")
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+def normalize_sql(sql):
+    """Statement shape used to spot repeats: lists of placeholders and inline numbers collapsed"""
+    return _NUMBER.sub("?", _IN_LIST.sub("IN (...)", sql))
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = perf_counter()
+        self.view = None
+        self.action = None
+        self.paginator = None
+        self.queries = 0
+        self.count_queries = 0
+        self.query_time = 0.0
+        self.statements = Counter()
+        self.cache_ops = 0
+        self.cache_time = 0.0
+        self.in_cache_call = False
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.open_phases = set()
+        self.handler_started = None
+        self.render_started = None
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.query_time += duration
+        self.statements[sql] += 1
+        if sql.startswith("SELECT COUNT("):
+            self.count_queries += 1
+
+    def add_phase(self, name, duration):
+        self.phases[name] += duration
+
+    def elapsed(self):
+        return perf_counter() - self.started
+
+    def repeated_queries(self, threshold):
+        """(normalized sql, count) for the statement shapes run at least `threshold` times"""
+        shapes = Counter()
+        for (sql, count) in self.statements.items():
+            shapes[normalize_sql(sql)] += count
+        return [(sql, count) for (sql, count) in shapes.most_common() if count >= threshold]
+
+
+def record_pagination(paginator):
+    profile = _current_profile.get()
+    if profile is not None:
+        # EmployeePagination hands cursor pages to its keyset paginator
+        profile.paginator = type(getattr(paginator, "keyset", None) or paginator).__name__
+
+
+def current_profile():
+    return _current_profile.get()
+
+
+def start_profile():
+    profile = RequestProfile()
+    return (profile, _current_profile.set(profile))
+
+
+def stop_profile(token):
+    _current_profile.reset(token)
+
+
+@contextmanager
+def phase(name):
+    profile = _current_profile.get()
+    # get_object() calls filter_queryset(), time the outer call only
+    if profile is None or name in profile.open_phases:
+        yield
+        return
+    profile.open_phases.add(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        profile.open_phases.discard(name)
+        profile.add_phase(name, perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrappers entry, times the statement when a request is being profiled"""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # connection_created fires again on reconnect, the wrapper list outlives the socket
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def cache_operation():
+    profile = _current_profile.get()
+    # get_or_set() and the default get_many() call other cache methods, count the outer call only
+    if profile is None or profile.in_cache_call:
+        yield
+        return
+    profile.in_cache_call = True
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        profile.in_cache_call = False
+        profile.cache_ops += 1
+        profile.cache_time += perf_counter() - start
+
+
+class InstrumentedViewMixin:
+    """
+    Splits a DRF view's time into auth (authentication, permissions, throttling), queryset
+    (filtering, pagination, object lookup), serialize (the rest of the handler) and render.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.view = type(self).__name__
+            profile.action = getattr(self, "action", None) or request.method.lower()
+        with phase("auth"):
+            super().initial(request, *args, **kwargs)
+        if profile is not None:
+            profile.handler_started = (perf_counter(), profile.phases["queryset"])
+
+    def filter_queryset(self, queryset):
+        with phase("queryset"):
+            return super().filter_queryset(queryset)
+
+    def paginate_queryset(self, queryset):
+        with phase("queryset"):
+            page = super().paginate_queryset(queryset)
+        if page is not None:
+            record_pagination(self.paginator)
+        return page
+
+    def get_object(self):
+        with phase("queryset"):
+            return super().get_object()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        profile = _current_profile.get()
+        if profile is None:
+            return response
+        now = perf_counter()
+        if profile.handler_started is not None:
+            (started, queryset_before) = profile.handler_started
+            queryset_time = profile.phases["queryset"] - queryset_before
+            profile.add_phase("serialize", max(now - started - queryset_time, 0.0))
+            profile.handler_started = None
+        if hasattr(response, "add_post_render_callback") and not response.is_rendered:
+            # DRF responses are rendered by Django's handler once the view has returned
+            profile.render_started = now
+            response.add_post_render_callback(lambda rendered: self._rendered(profile))
+        return response
+
+    @staticmethod
+    def _rendered(profile):
+        if profile.render_started is not None:
+            profile.add_phase("render", perf_counter() - profile.render_started)
+            profile.render_started = None
@@ -0,0 +1,73 @@
+"""
+Prometheus metrics, fed from the request profiles of core.instrumentation.
+
+Under gunicorn every worker has its own counters. With PROMETHEUS_MULTIPROC_DIR set
+(see gunicorn.conf.py) prometheus_client keeps them in memory mapped files in that
+directory and the scrape endpoint adds up all workers, whichever one answers it.
+"""
+import hmac
+import os
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+
+REQUEST_LATENCY = Histogram(
+    "aerten_request_duration_seconds", "Time to answer a request, rendering included",
+    ["viewset", "action", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    "aerten_request_db_queries", "SQL queries run by one request",
+    ["viewset", "action"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+COUNT_QUERIES = Counter("aerten_db_count_queries_total", "SELECT COUNT(*) queries", ["viewset", "action"])
+PAGINATED_RESPONSES = Counter("aerten_paginated_responses_total", "Responses returning one page of a list", ["viewset", "action", "paginator"])
+CACHE_LOOKUPS = Counter("aerten_cache_lookups_total", "Cache reads, by key group", ["group", "result"])
+
+
+def view_labels(request, profile):
+    if profile.view is not None:
+        return (profile.view, profile.action)
+    match = getattr(request, "resolver_match", None)
+    # Unmatched paths all share one label, a URL per label would have no bound
+    return (match.view_name or match._func_path, request.method.lower()) if match is not None else ("unmatched", "")
+
+
+def observe_request(request, response, profile, duration):
+    (viewset, action) = view_labels(request, profile)
+    REQUEST_LATENCY.labels(viewset, action, request.method, str(response.status_code)).observe(duration)
+    REQUEST_QUERIES.labels(viewset, action).observe(profile.queries)
+    if profile.count_queries:
+        COUNT_QUERIES.labels(viewset, action).inc(profile.count_queries)
+    if profile.paginator is not None:
+        PAGINATED_RESPONSES.labels(viewset, action, profile.paginator).inc()
+
+
+def key_group(key):
+    """`roles:v12:/api/v1/roles/?` -> `roles`, version counters get their own group"""
+    group = str(key).split(":", 1)[0]
+    return f"{group}:version" if str(key).endswith(":version") else group
+
+
+def observe_cache_lookups(keys, hits):
+    for key in keys:
+        CACHE_LOOKUPS.labels(key_group(key), "hit" if key in hits else "miss").inc()
+
+
+def metrics(request):
+    """Scrape endpoint. Prometheus must send METRICS_TOKEN as a bearer token, only DEBUG serves it without one"""
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Latencies, query counts and cache key groups are not for everyone: fail closed
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif not hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import random
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from whitenoise.middleware import WhiteNoiseMiddleware
+from core.db_routers import replica_aliases, reset_read_replica, set_read_replica
+from core.instrumentation import PHASES, start_profile, stop_profile
+from core.metrics import observe_request, view_labels
+
+
+logger = logging.getLogger("aerten.requests")
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Send safe API reads to a read replica, unless the client wrote something in the last
+    REPLICA_PIN_SECONDS: then it reads from the primary and sees its own changes.
+
+    The pin lives in the cache, keyed by the Authorization header (or the session user),
+    so it holds across workers. Writes, the admin and anything outside REPLICA_READ_PATHS
+    always use the primary.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        client = self.authorization_key(request) or self.user_key(getattr(request, "user", None))
+        pinned = client is not None and cache.get(client) is not None
+        token = set_read_replica(self.choose_replica(request, pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_read_replica(token)
+        if self.should_pin(request, response, client):
+            cache.set(client, 1, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        client = self.authorization_key(request)
+        if client is None and hasattr(request, "auser"):
+            client = self.user_key(await request.auser())
+        pinned = client is not None and await cache.aget(client) is not None
+        token = set_read_replica(self.choose_replica(request, pinned))
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_read_replica(token)
+        if self.should_pin(request, response, client):
+            await cache.aset(client, 1, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def choose_replica(self, request, pinned):
+        replicas = replica_aliases()
+        if not replicas or pinned or request.method not in SAFE_METHODS:
+            return None
+        if not request.path.startswith(tuple(settings.REPLICA_READ_PATHS)):
+            return None
+        return random.choice(replicas)
+
+    def should_pin(self, request, response, client):
+        return client is not None and request.method not in SAFE_METHODS and response.status_code < 400
+
+    @staticmethod
+    def authorization_key(request):
+        # API clients send a JWT, which is only decoded later by DRF; the header identifies the client well enough
+        authorization = request.META.get("HTTP_AUTHORIZATION")
+        if authorization:
+            return "db-pin:" + hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+        return None
+
+    @staticmethod
+    def user_key(user):
+        if user is not None and user.is_authenticated:
+            return f"db-pin:user:{user.pk}"
+        return None
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that keeps the middleware chain async under ASGI.
+
+    The stock middleware is sync only, so Django would adapt the chain around it and every
+    API request would hop threads. Here only the static file responses are built off the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Looks on disk, as in DEBUG
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class InstrumentationMiddleware:
+    """
+    Counts the SQL queries and cache calls of each request and times its phases, then
+    reports them in a Server-Timing header (visible in the browser's network panel).
+
+    Requests slower than SLOW_REQUEST_MS are logged as one JSON line, and so is any
+    statement repeated REPEATED_QUERY_THRESHOLD times or more in one request, which is
+    usually a missing select_related / prefetch_related in that view.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        (profile, token) = start_profile()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_profile(token)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request):
+        (profile, token) = start_profile()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_profile(token)
+        return self.report(request, response, profile)
+
+    def report(self, request, response, profile):
+        total = profile.elapsed()
+        view = ".".join(filter(None, view_labels(request, profile)))
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = self.server_timing(profile, total)
+
+        if total * 1000 >= settings.SLOW_REQUEST_MS:
+            logger.warning("slow_request %s", json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 1),
+                "queries": profile.queries,
+                "query_ms": round(profile.query_time * 1000, 1),
+                "cache_ops": profile.cache_ops,
+                "cache_ms": round(profile.cache_time * 1000, 1),
+                "phases_ms": {name: round(profile.phases[name] * 1000, 1) for name in PHASES},
+            }))
+
+        observe_request(request, response, profile, total)
+        for (sql, count) in profile.repeated_queries(settings.REPEATED_QUERY_THRESHOLD):
+            logger.warning("repeated_query %s", json.dumps({
+                "view": view,
+                "path": request.path,
+                "count": count,
+                "sql": sql[:500],
+            }))
+        return response
+
+    @staticmethod
+    def server_timing(profile, total):
+        metrics = [
+            f'db;dur={profile.query_time * 1000:.1f};desc="{profile.queries} queries"',
+            f'cache;dur={profile.cache_time * 1000:.1f};desc="{profile.cache_ops} ops"',
+        ]
+        # Rendering happens after the view returned, so it is measured by the time we get here
+        metrics += [f"{name};dur={profile.phases[name] * 1000:.1f}" for name in PHASES if profile.phases[name]]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
@@ -3,4 +3,10 @@ from django.db import models
 
 # Create your models here.
 class User(AbstractUser):
-    email = models.EmailField(unique=True)
\ No newline at end of file
+    email = models.EmailField(unique=True)
+    
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination key for the employee directory
+            models.Index(fields=['first_name', 'last_name', 'id'], name='core_user_name_idx'),
+        ]
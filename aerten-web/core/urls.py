@@ -1,9 +1,11 @@
 from django.urls import path
 from django.views.generic import TemplateView
+from core.metrics import metrics
 
 
 
 
 urlpatterns = [
-    path('', TemplateView.as_view(template_name='core/index.html'))
+    path('', TemplateView.as_view(template_name='core/index.html')),
+    path('metrics', metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Async GET handlers for the busiest read endpoints, used when the app is served over ASGI.
+
+Each view borrows its configuration from the DRF viewset it shadows (queryset, filters,
+serializer, pagination, permissions, ETag validators, list cache), so the JSON is the same
+as the sync endpoint's. The database and cache round-trips go through Django's async ORM
+and cache API; auth and queryset building stay sync but run off the event loop.
+Any other method on the same URL is handed to the regular viewset view.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.urls import re_path
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.response import Response
+from core.instrumentation import phase, record_pagination
+from .cache import abuild_cache_key, cache_timeout
+from .views import CachedListMixin, EmployeeViewSet, PermissionViewSet, RequestViewSet, RoleViewSet, NO_PROFILE_MESSAGE, PROFILE_INCOMPLETE_MESSAGE
+
+
+class AsyncReadView(View):
+    viewset_class = None
+    # Viewset action served asynchronously on GET / HEAD
+    action = None
+    # Method -> viewset action for everything else on this URL
+    actions = {}
+    # The sync viewset view those methods are handed to, set by as_view()
+    fallback = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        fallback = cls.viewset_class.as_view({'get': cls.action, **cls.actions})
+        # Writes are authenticated by JWT, like the viewsets themselves
+        return csrf_exempt(super().as_view(fallback=fallback, **initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await self.get(request, *args, **kwargs)
+        return await sync_to_async(self.fallback)(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.viewset_class()
+        viewset.action_map = {'get': self.action, 'head': self.action, **self.actions}
+        for (method, action) in viewset.action_map.items():
+            # As ViewSetMixin.as_view does, so that the Allow header lists the same methods
+            setattr(viewset, method, getattr(viewset, action))
+        viewset.action = self.action
+        viewset.args = args
+        viewset.kwargs = kwargs
+        viewset.format_kwarg = None
+        viewset.headers = viewset.default_response_headers
+        drf_request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.request = drf_request
+        try:
+            # Authentication, permissions and content negotiation
+            await sync_to_async(viewset.initial)(drf_request, *args, **kwargs)
+            response = await getattr(self, self.action)(viewset, drf_request)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        return viewset.finalize_response(drf_request, response, *args, **kwargs)
+
+    async def get_queryset(self, viewset):
+        return await sync_to_async(lambda: viewset.filter_queryset(viewset.get_queryset()))()
+
+    async def get_validators(self, viewset, queryset):
+        aggregates = viewset.get_validator_aggregates(queryset)
+        if aggregates is None:
+            return None
+        with phase('queryset'):
+            markers = await queryset.order_by().aaggregate(**aggregates)
+        return viewset.build_validators(markers)
+
+    async def conditional_response(self, viewset, request, validators, handler):
+        # BaseViewSet.conditional_response with an async handler
+        if validators is None:
+            return await handler()
+        response = viewset.not_modified_response(request, validators)
+        if response is None:
+            response = await handler()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        return viewset.add_validators(response, validators)
+
+    async def serialize(self, viewset, instance, many=False):
+        # Rows are already loaded with their relations, this is CPU work
+        return await sync_to_async(lambda: viewset.get_serializer(instance, many=many).data)()
+
+    async def list(self, viewset, request):
+        queryset = await self.get_queryset(viewset)
+        cache_key = None
+        if isinstance(viewset, CachedListMixin):
+            cache_key = await abuild_cache_key(viewset.cache_namespace, request)
+            validators = viewset.get_cached_validators(cache_key)
+        elif viewset.paginates_by_keyset():
+            validators = None
+        else:
+            validators = await self.get_validators(viewset, queryset)
+        return await self.conditional_response(viewset, request, validators, lambda: self.list_response(viewset, request, queryset, cache_key))
+
+    async def list_response(self, viewset, request, queryset, cache_key=None):
+        if cache_key is not None:
+            cached_data = await cache.aget(cache_key)
+            if cached_data is not None:
+                return Response(cached_data)
+
+        paginator = viewset.paginator
+        with phase('queryset'):
+            page = None
+            if paginator is not None:
+                page = await paginator.apaginate_queryset(queryset, request, view=viewset)
+            if page is None:
+                rows = [obj async for obj in queryset]
+        if page is not None:
+            record_pagination(paginator)
+            response = paginator.get_paginated_response(await self.serialize(viewset, page, many=True))
+        else:
+            response = Response(await self.serialize(viewset, rows, many=True))
+
+        if cache_key is not None:
+            await cache.aset(cache_key, response.data, timeout=cache_timeout())
+        return response
+
+    async def retrieve(self, viewset, request):
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        queryset = await self.get_queryset(viewset)
+        try:
+            queryset = queryset.filter(**{viewset.lookup_field: viewset.kwargs[lookup_url_kwarg]})
+            validators = await self.get_validators(viewset, queryset)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        return await self.conditional_response(viewset, request, validators, lambda: self.retrieve_response(viewset, request, queryset))
+
+    async def retrieve_response(self, viewset, request, queryset):
+        with phase('queryset'):
+            instance = await queryset.afirst()
+        if instance is None:
+            raise Http404
+        await sync_to_async(viewset.check_object_permissions)(request, instance)
+        return Response(await self.serialize(viewset, instance))
+
+
+class AsyncEmployeeList(AsyncReadView):
+    viewset_class = EmployeeViewSet
+    action = 'list'
+    actions = {'post': 'create'}
+
+
+class AsyncEmployeeDetail(AsyncReadView):
+    viewset_class = EmployeeViewSet
+    action = 'retrieve'
+    actions = {'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+
+
+class AsyncEmployeeMe(AsyncReadView):
+    viewset_class = EmployeeViewSet
+    action = 'me'
+    actions = {'put': 'me'}
+
+    async def me(self, viewset, request):
+        # Same payload as EmployeeViewSet.me, with the relations loaded up front
+        employee = await viewset.get_queryset().filter(user_id=request.user.pk).afirst()
+        if employee is None:
+            return Response({"detail": NO_PROFILE_MESSAGE}, status=status.HTTP_404_NOT_FOUND)
+        data = await sync_to_async(lambda: viewset.get_serializer_class()(employee).data)()
+        if employee.role_id is None or not await employee.team.aexists():
+            data["message"] = PROFILE_INCOMPLETE_MESSAGE
+        return Response(data)
+
+
+class AsyncRoleList(AsyncReadView):
+    viewset_class = RoleViewSet
+    action = 'list'
+    actions = {'post': 'create'}
+
+
+class AsyncPermissionList(AsyncReadView):
+    viewset_class = PermissionViewSet
+    action = 'list'
+    actions = {'post': 'create'}
+
+
+class AsyncRequestList(AsyncReadView):
+    viewset_class = RequestViewSet
+    action = 'list'
+    actions = {'post': 'create'}
+
+
+# Employee ids are 12-13 uppercase characters, which keeps lowercase action routes
+# such as employees/stats/ out of the detail pattern
+urlpatterns = [
+    re_path(r'^employees/$', AsyncEmployeeList.as_view(), name='employee-list-async'),
+    re_path(r'^employees/me/$', AsyncEmployeeMe.as_view(), name='employee-me-async'),
+    re_path(r'^employees/(?P<pk>[0-9A-Z]{12,13})/$', AsyncEmployeeDetail.as_view(), name='employee-detail-async'),
+    re_path(r'^roles/$', AsyncRoleList.as_view(), name='role-list-async'),
+    re_path(r'^permissions/$', AsyncPermissionList.as_view(), name='permission-list-async'),
+    re_path(r'^requests/$', AsyncRequestList.as_view(), name='requests-list-async'),
+]
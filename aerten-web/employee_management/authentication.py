@@ -0,0 +1,50 @@
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from employee_management.tokens import ACCESS_LEVEL_CLAIM, EMPLOYEE_ID_CLAIM, IS_STAFF_CLAIM, claims_are_current
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    `request.user` for a token with current claims.
+
+    pk, is_staff and the employee claims come straight from the token, anything else
+    loads the user row on first use.
+    """
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True  # Deactivation moves the authorization version, see claims_are_current
+
+    def __init__(self, token, load_user):
+        self.__dict__["token"] = token
+        super().__init__(load_user)
+
+    def __bool__(self):
+        # `request.user and ...` should not load the row
+        return True
+
+    @property
+    def pk(self):
+        return self.token[api_settings.USER_ID_CLAIM]
+
+    id = pk
+
+    @property
+    def is_staff(self):
+        return bool(self.token[IS_STAFF_CLAIM])
+
+    @property
+    def claims(self):
+        return {
+            "employee_id": self.token[EMPLOYEE_ID_CLAIM],
+            "access_level": self.token[ACCESS_LEVEL_CLAIM],
+            "is_staff": self.is_staff,
+        }
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that skips loading the user while the token's authorization claims are current"""
+    def get_user(self, validated_token):
+        if not claims_are_current(validated_token):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token, lambda: super(ClaimsJWTAuthentication, self).get_user(validated_token))
@@ -0,0 +1,92 @@
+from django.db import connections, router, transaction
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+from employee_management import headcount
+from employee_management.cache import ORG_CHART_CACHE, invalidate_cache
+from employee_management.models import Employee, Request
+from employee_management.search import refresh_search_documents
+
+
+def split_existing_ids(employee_ids):
+    """(found, missing) employee ids, validated with a single query and kept in request order"""
+    employee_ids = list(dict.fromkeys(employee_ids))
+    existing = set(Employee.objects.filter(pk__in=employee_ids).values_list('pk', flat=True))
+    found = [employee_id for employee_id in employee_ids if employee_id in existing]
+    missing = [employee_id for employee_id in employee_ids if employee_id not in existing]
+    return (found, missing)
+
+
+def bulk_assign_role(role, employee_ids):
+    """Give many employees the same role with one UPDATE ... WHERE id IN (...)"""
+    (found, missing) = split_existing_ids(employee_ids)
+    with transaction.atomic():
+        deltas = headcount.role_reassigned(found, role)
+        Employee.objects.filter(pk__in=found).update(role=role, updated_at=timezone.now())
+        # update() skips the post_save handlers, keep the derived columns and caches in step here
+        headcount.apply_deltas(deltas)
+        refresh_search_documents(found)
+        invalidate_cache(ORG_CHART_CACHE)
+    return (found, missing)
+
+
+def bulk_change_team(team, employee_ids, action):
+    """Add many employees to a team, or remove them from it, in one statement"""
+    (found, missing) = split_existing_ids(employee_ids)
+    Membership = Employee.team.through
+    with transaction.atomic():
+        members = Membership.objects.filter(team_id=team.pk, employee_id__in=found)
+        if action == 'add':
+            already = members.count()
+            Membership.objects.bulk_create(
+                [Membership(employee_id=employee_id, team_id=team.pk) for employee_id in found],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+            headcount.team_members_changed({team.pk: len(found) - already}, 1)
+        else:
+            (removed, _) = members.delete()
+            headcount.team_members_changed({team.pk: removed}, -1)
+        Employee.objects.filter(pk__in=found).update(updated_at=timezone.now())
+        refresh_search_documents(found)
+    return (found, missing)
+
+
+def decide_requests(queryset, request_ids, new_status, approver_id):
+    """
+    Approve or reject pending requests with one conditional UPDATE ... WHERE status = 'Pending'.
+
+    A request changes status once: when two managers decide it at the same time, the second
+    UPDATE no longer finds it pending. Returns (updated, skipped) in request order, skipped ids
+    were not pending or not in `queryset`.
+    """
+    request_ids = list(dict.fromkeys(request_ids))
+    pending = Request.objects.filter(pk__in=queryset.filter(pk__in=request_ids).values("pk"), status="Pending")
+    values = {"status": new_status, "approver_id": approver_id, "updated_at": timezone.now()}
+    connection = connections[router.db_for_write(Request)]
+    if supports_update_returning(connection):
+        changed = update_returning_pks(pending, values, connection)
+    else:
+        # The ORM cannot say which rows an UPDATE changed, read them under lock first
+        with transaction.atomic(using=connection.alias):
+            changed = set(pending.select_for_update().values_list("pk", flat=True))
+            Request.objects.filter(pk__in=changed, status="Pending").update(**values)
+    updated = [request_id for request_id in request_ids if request_id in changed]
+    skipped = [request_id for request_id in request_ids if request_id not in changed]
+    return (updated, skipped)
+
+
+def supports_update_returning(connection):
+    if connection.vendor == "postgresql":
+        return True
+    return connection.vendor == "sqlite" and connection.Database.sqlite_version_info >= (3, 35)
+
+
+def update_returning_pks(queryset, values, connection):
+    """queryset.update(**values) as UPDATE ... RETURNING, the primary keys of the changed rows"""
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    (sql, params) = query.get_compiler(connection=connection).as_sql()
+    pk_column = connection.ops.quote_name(queryset.model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {pk_column}", params)
+        return {pk for (pk,) in cursor.fetchall()}
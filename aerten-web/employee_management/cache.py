@@ -0,0 +1,74 @@
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+ROLES_CACHE = "roles"
+PERMISSIONS_CACHE = "permissions"
+ORG_CHART_CACHE = "org_chart"
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def _initial_version():
+    # Start from the clock so a version lost to eviction never comes back as an older number
+    return time.time_ns() // 1_000_000
+
+
+def get_cache_version(namespace):
+    """Current version of a cache namespace, created on first use"""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), _initial_version(), timeout=None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+async def aget_cache_version(namespace):
+    version = await cache.aget(_version_key(namespace))
+    if version is None:
+        await cache.aadd(_version_key(namespace), _initial_version(), timeout=None)
+        version = await cache.aget(_version_key(namespace))
+    return version
+
+
+def bump_cache_version(namespace):
+    """Invalidate every entry of a namespace by moving it to a new version"""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), _initial_version(), timeout=None)
+
+
+def invalidate_cache(namespace):
+    # Bump now and again once committed, so a read racing the transaction cannot re-cache the old rows
+    bump_cache_version(namespace)
+    transaction.on_commit(lambda: bump_cache_version(namespace))
+
+
+def normalize_query_string(query_params):
+    """Sorted query string, so `?a=1&b=2` and `?b=2&a=1` share an entry"""
+    items = []
+    for key in sorted(query_params.keys()):
+        for value in sorted(query_params.getlist(key)):
+            items.append((key, value))
+    return urlencode(items)
+
+
+def build_cache_key(namespace, request):
+    version = get_cache_version(namespace)
+    return f"{namespace}:v{version}:{request.path}?{normalize_query_string(request.query_params)}"
+
+
+async def abuild_cache_key(namespace, request):
+    version = await aget_cache_version(namespace)
+    return f"{namespace}:v{version}:{request.path}?{normalize_query_string(request.query_params)}"
+
+
+def cache_timeout():
+    # Entries are invalidated by version bumps, the timeout only bounds how long orphaned versions linger
+    return getattr(settings, "VERSIONED_CACHE_TIMEOUT", None)
@@ -0,0 +1,132 @@
+import csv
+import json
+from itertools import islice
+from django.core.serializers.json import DjangoJSONEncoder
+from employee_management.models import Employee
+
+
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+
+CONTENT_TYPES = {
+    FORMAT_CSV: "text/csv",
+    FORMAT_NDJSON: "application/x-ndjson",
+}
+
+# Output column -> flat values() lookup, no model instances or serializers involved
+EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("first_name", "user__first_name"),
+    ("last_name", "user__last_name"),
+    ("email", "user__email"),
+    ("phone", "phone"),
+    ("birth_date", "birth_date"),
+    ("join_date", "join_date"),
+    ("gender", "gender"),
+    ("employment_status", "employment_status"),
+    ("access_level", "access_level"),
+    ("role", "role__title"),
+]
+
+
+class Echo:
+    """File-like object whose write() hands the line back, so csv.writer can feed a generator"""
+    def write(self, value):
+        return value
+
+
+class EmployeeExporter:
+    """
+    Stream a filtered employee queryset as CSV or NDJSON.
+
+    Rows come from `values_list().iterator()`, which uses a server-side cursor on PostgreSQL,
+    and team names are looked up once per chunk, so memory stays flat whatever the row count.
+    Iterate it with `async for` under ASGI and with `for` under WSGI.
+    """
+    chunk_size = 2000
+
+    def __init__(self, queryset, file_format=FORMAT_CSV, chunk_size=None):
+        self.queryset = queryset
+        self.file_format = file_format
+        if chunk_size:
+            self.chunk_size = chunk_size
+
+    @property
+    def content_type(self):
+        return CONTENT_TYPES[self.file_format]
+
+    @property
+    def filename(self):
+        return f"employees.{self.file_format}"
+
+    def rows(self):
+        lookups = [lookup for (_, lookup) in EXPORT_COLUMNS]
+        values = self.queryset.select_related(None).prefetch_related(None).values_list(*lookups).iterator(chunk_size=self.chunk_size)
+        while True:
+            chunk = list(islice(values, self.chunk_size))
+            if not chunk:
+                return
+            yield from self.records(chunk, self.team_names([row[0] for row in chunk]))
+
+    async def arows(self):
+        """rows() for ASGI, the chunks are fetched with the async ORM between two sends"""
+        lookups = [lookup for (_, lookup) in EXPORT_COLUMNS]
+        # values_list(*fields).aiterator() runs its query on the event loop thread, values() does not
+        rows = self.queryset.select_related(None).prefetch_related(None).values(*lookups).aiterator(chunk_size=self.chunk_size)
+        chunk = []
+        async for row in rows:
+            chunk.append(tuple(row[lookup] for lookup in lookups))
+            if len(chunk) == self.chunk_size:
+                for record in self.records(chunk, await self.ateam_names([row[0] for row in chunk])):
+                    yield record
+                chunk = []
+        if chunk:
+            for record in self.records(chunk, await self.ateam_names([row[0] for row in chunk])):
+                yield record
+
+    def records(self, chunk, teams):
+        columns = [column for (column, _) in EXPORT_COLUMNS]
+        for row in chunk:
+            record = dict(zip(columns, row))
+            record["teams"] = teams.get(record["id"], [])
+            yield record
+
+    def memberships(self, employee_ids):
+        Membership = Employee.team.through
+        return Membership.objects.filter(employee_id__in=employee_ids).order_by("team__name").values_list("employee_id", "team__name")
+
+    def team_names(self, employee_ids):
+        teams = {}
+        for (employee_id, name) in self.memberships(employee_ids):
+            teams.setdefault(employee_id, []).append(name)
+        return teams
+
+    async def ateam_names(self, employee_ids):
+        teams = {}
+        async for (employee_id, name) in self.memberships(employee_ids):
+            teams.setdefault(employee_id, []).append(name)
+        return teams
+
+    def header(self):
+        return [column for (column, _) in EXPORT_COLUMNS] + ["teams"]
+
+    def format(self, record, writer):
+        if self.file_format == FORMAT_NDJSON:
+            return json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+        record["teams"] = ";".join(record["teams"])
+        return writer.writerow(["" if record[column] is None else record[column] for column in self.header()])
+
+    def __iter__(self):
+        writer = csv.writer(Echo())
+        if self.file_format == FORMAT_CSV:
+            yield writer.writerow(self.header())
+        for record in self.rows():
+            yield self.format(record, writer)
+
+    async def __aiter__(self):
+        # Django drains a sync iterator into a list before sending it over ASGI, this one is consumed as it goes
+        writer = csv.writer(Echo())
+        if self.file_format == FORMAT_CSV:
+            yield writer.writerow(self.header())
+        async for record in self.arows():
+            yield self.format(record, writer)
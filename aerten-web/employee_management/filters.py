@@ -1,4 +1,7 @@
 import django_filters
+from django.db import connections
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.settings import api_settings
 from .models import Role, Employee, Request
 
 class RoleFilter(django_filters.FilterSet):
@@ -22,9 +25,49 @@ class EmployeeFilter(django_filters.FilterSet):
         }
 
 class RequestFilter(django_filters.FilterSet):
+    # ?date_requested_after=2025-01-01&date_requested_before=2025-01-31, both ends inclusive.
+    # Compiles to a BETWEEN on the raw column so the date indexes can be used
+    date_requested = django_filters.DateFromToRangeFilter()
+    
     class Meta:
         model = Request
         fields = {
-            "status": ["exact"],
-            "date_requested": ["icontains"] 
-        }
\ No newline at end of file
+            "status": ["exact", "in"],
+            "request_type": ["exact"],
+        }
+
+
+class RankedSearchFilter(SearchFilter):
+    """
+    Ranked, index-backed search on PostgreSQL, the plain SearchFilter everywhere else.
+
+    On PostgreSQL every term is matched against the view's `search_document_field`, which
+    carries a trigram GIN index, and results are ordered by trigram word similarity unless
+    the client asked for an explicit `?ordering=`.
+    """
+    def filter_queryset(self, request, queryset, view):
+        document_field = getattr(view, 'search_document_field', None)
+        search_terms = self.get_search_terms(request)
+        if not document_field or not search_terms or connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        for term in search_terms:
+            queryset = queryset.filter(**{f"{document_field}__icontains": term})
+        queryset = queryset.annotate(search_rank=TrigramWordSimilarity(" ".join(search_terms), document_field))
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', *queryset.model._meta.ordering, 'pk')
+        return queryset
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that keeps the rank order set by RankedSearchFilter.
+
+    The view's default `ordering` would otherwise replace it, only an explicit `?ordering=` does.
+    """
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and 'search_rank' in queryset.query.annotations:
+            return None
+        return super().get_ordering(request, queryset, view)
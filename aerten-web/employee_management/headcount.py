@@ -0,0 +1,136 @@
+from collections import Counter
+from functools import reduce
+from operator import or_
+from django.db import transaction
+from django.db.models import Count, F, Q
+from employee_management.models import Employee, HeadcountSummary, Role, Team
+
+
+TEAM = "team"
+# Employee columns counted one value per employee, by dimension name
+FIELD_DIMENSIONS = {
+    "role": "role_id",
+    "employment_status": "employment_status",
+    "gender": "gender",
+    "access_level": "access_level",
+}
+DIMENSIONS = [TEAM, *FIELD_DIMENSIONS]
+UNASSIGNED = ""
+
+
+def group_value(value):
+    return UNASSIGNED if value is None else str(value)
+
+
+def employee_groups(employee):
+    """(dimension, value) pairs an employee counts towards, teams aside"""
+    return [(dimension, group_value(getattr(employee, field))) for (dimension, field) in FIELD_DIMENSIONS.items()]
+
+
+def apply_deltas(deltas):
+    """Add {(dimension, value): delta} to the summary, one UPDATE per distinct delta"""
+    deltas = {group: delta for (group, delta) in deltas.items() if delta}
+    if not deltas:
+        return
+    HeadcountSummary.objects.bulk_create(
+        [HeadcountSummary(dimension=dimension, value=value) for (dimension, value) in deltas],
+        ignore_conflicts=True,
+    )
+    by_delta = {}
+    for (group, delta) in deltas.items():
+        by_delta.setdefault(delta, []).append(group)
+    for (delta, groups) in by_delta.items():
+        matches = reduce(or_, [Q(dimension=dimension, value=value) for (dimension, value) in groups])
+        HeadcountSummary.objects.filter(matches).update(count=F('count') + delta)
+
+
+def employee_changed(previous, employee):
+    """Move an employee between groups after a save. `previous` is None for a new employee"""
+    deltas = Counter(employee_groups(employee))
+    if previous is not None:
+        deltas.subtract(employee_groups(previous))
+    apply_deltas(deltas)
+
+
+def employee_removed(employee, team_ids):
+    deltas = Counter(employee_groups(employee)) + Counter((TEAM, group_value(team_id)) for team_id in team_ids)
+    apply_deltas({group: -delta for (group, delta) in deltas.items()})
+
+
+def team_members_changed(team_counts, sign):
+    apply_deltas({(TEAM, group_value(team_id)): sign * count for (team_id, count) in team_counts.items()})
+
+
+def role_reassigned(employee_ids, role):
+    """Deltas for a bulk role change, to apply together with the UPDATE in the same transaction"""
+    # Locked, so a concurrent change of these employees cannot slip in between this read and the UPDATE
+    previous = Counter(Employee.objects.select_for_update().filter(pk__in=employee_ids).order_by().values_list('role_id', flat=True))
+    deltas = Counter()
+    for (role_id, total) in previous.items():
+        deltas[("role", group_value(role_id))] -= total
+        deltas[("role", group_value(role.pk if role else None))] += total
+    return deltas
+
+
+def drop_group(dimension, value, fallback=None):
+    """A team or role was deleted: forget its row, or move its count to `fallback`"""
+    row = HeadcountSummary.objects.filter(dimension=dimension, value=group_value(value)).first()
+    if row is None:
+        return
+    row.delete()
+    if fallback is not None and row.count:
+        apply_deltas({(dimension, fallback): row.count})
+
+
+def rebuild():
+    """
+    Recount everything from scratch in two scans: employees grouped by role with conditional
+    counts for every choice column, and memberships grouped by team.
+    """
+    conditional = {}
+    for (dimension, field) in FIELD_DIMENSIONS.items():
+        if dimension == "role":
+            continue
+        choices = [value for (value, _) in Employee._meta.get_field(field).choices] + [UNASSIGNED]
+        for value in choices:
+            conditional[f"{dimension}:{value}"] = Count('pk', filter=Q(**{field: value}))
+
+    counts = Counter()
+    for row in Employee.objects.order_by().values('role_id').annotate(total=Count('pk'), **conditional):
+        counts[("role", group_value(row.pop('role_id')))] += row.pop('total')
+        for (key, total) in row.items():
+            (dimension, value) = key.split(":", 1)
+            counts[(dimension, value)] += total
+
+    memberships = Employee.team.through.objects.order_by().values('team_id').annotate(total=Count('pk'))
+    for row in memberships:
+        counts[(TEAM, group_value(row['team_id']))] += row['total']
+
+    with transaction.atomic():
+        HeadcountSummary.objects.all().delete()
+        HeadcountSummary.objects.bulk_create([
+            HeadcountSummary(dimension=dimension, value=value, count=total)
+            for ((dimension, value), total) in counts.items() if total
+        ])
+
+
+def summary():
+    """The dashboard payload, read from the summary table with names for teams and roles"""
+    groups = {dimension: [] for dimension in DIMENSIONS}
+    for (dimension, value, count) in HeadcountSummary.objects.filter(count__gt=0).order_by('dimension', '-count', 'value').values_list('dimension', 'value', 'count'):
+        if dimension in groups:
+            groups[dimension].append({"value": value or None, "count": count})
+
+    names = {
+        TEAM: dict(Team.objects.filter(pk__in=[group["value"] for group in groups[TEAM] if group["value"]]).values_list('pk', 'name')),
+        "role": dict(Role.objects.filter(pk__in=[group["value"] for group in groups["role"] if group["value"]]).values_list('pk', 'title')),
+    }
+    for (dimension, lookup) in names.items():
+        for group in groups[dimension]:
+            group["value"] = int(group["value"]) if group["value"] else None
+            group["name"] = lookup.get(group["value"])
+
+    return {
+        "total": sum(group["count"] for group in groups["employment_status"]),
+        **groups,
+    }
@@ -0,0 +1,110 @@
+from django.db.models.expressions import RawSQL
+from employee_management.models import Employee, Role
+
+
+# Guards the recursive queries against a reports_to cycle written before validation existed
+MAX_DEPTH = 50
+
+ROLE_TABLE = Role._meta.db_table
+
+SUBTREE_SQL = f"""
+    WITH RECURSIVE subtree (id, depth) AS (
+        SELECT id, 0 FROM {ROLE_TABLE} WHERE id = %s
+        UNION ALL
+        SELECT r.id, subtree.depth + 1
+        FROM {ROLE_TABLE} r
+        JOIN subtree ON r.reports_to_id = subtree.id
+        WHERE subtree.depth < %s
+    )
+    SELECT id FROM subtree
+"""
+
+# Like SUBTREE_SQL without the role itself
+REPORTS_SQL = f"""
+    WITH RECURSIVE reports (id, depth) AS (
+        SELECT id, 1 FROM {ROLE_TABLE} WHERE reports_to_id = %s
+        UNION ALL
+        SELECT r.id, reports.depth + 1
+        FROM {ROLE_TABLE} r
+        JOIN reports ON r.reports_to_id = reports.id
+        WHERE reports.depth < %s
+    )
+    SELECT id FROM reports
+"""
+
+ANCESTORS_SQL = f"""
+    WITH RECURSIVE chain (id, reports_to_id, depth) AS (
+        SELECT id, reports_to_id, 0 FROM {ROLE_TABLE} WHERE id = %s
+        UNION ALL
+        SELECT r.id, r.reports_to_id, chain.depth + 1
+        FROM {ROLE_TABLE} r
+        JOIN chain ON r.id = chain.reports_to_id
+        WHERE chain.depth < %s
+    )
+    SELECT r.*, chain.depth AS depth
+    FROM {ROLE_TABLE} r
+    JOIN chain ON r.id = chain.id
+    ORDER BY chain.depth
+"""
+
+
+def subtree_role_ids(role_id):
+    """
+    Ids of a role and every role reporting to it, directly or not, as a subquery expression.
+    Use it as `filter(role_id__in=subtree_role_ids(pk))` so the walk runs inside the same SQL statement.
+    """
+    return RawSQL(SUBTREE_SQL, (role_id, MAX_DEPTH))
+
+
+def report_role_ids(role_id):
+    """Ids of the roles reporting to a role, directly or not, as a subquery expression like subtree_role_ids"""
+    return RawSQL(REPORTS_SQL, (role_id, MAX_DEPTH))
+
+
+def ancestor_roles(role_id):
+    """The role itself followed by its chain of managers up to the top, in one query"""
+    return list(Role.objects.raw(ANCESTORS_SQL, (role_id, MAX_DEPTH)))
+
+
+def employees_by_role(role_ids=None):
+    employees = Employee.objects.order_by('user__first_name', 'user__last_name', 'user_id')
+    if role_ids is not None:
+        employees = employees.filter(role_id__in=role_ids)
+    grouped = {}
+    for (employee_id, role_id, first_name, last_name) in employees.filter(role__isnull=False).values_list('id', 'role_id', 'user__first_name', 'user__last_name'):
+        grouped.setdefault(role_id, []).append({"id": employee_id, "first_name": first_name, "last_name": last_name})
+    return grouped
+
+
+def build_tree(roles, employees, root_ids):
+    """Nest flat role rows under their managers, with the employees holding each role"""
+    nodes = {
+        role.id: {
+            "id": role.id,
+            "title": role.title,
+            "employment_type": role.employment_type,
+            "reports_to": role.reports_to_id,
+            "employees": employees.get(role.id, []),
+            "subordinates": [],
+        }
+        for role in roles
+    }
+    for role in roles:
+        if role.id not in root_ids and role.reports_to_id in nodes:
+            nodes[role.reports_to_id]["subordinates"].append(nodes[role.id])
+    return [nodes[role_id] for role_id in root_ids if role_id in nodes]
+
+
+def role_subtree(role):
+    """A role with everything under it, in two queries: the recursive walk and the employees"""
+    roles = list(Role.objects.filter(id__in=subtree_role_ids(role.pk)).order_by('title'))
+    employees = employees_by_role(subtree_role_ids(role.pk))
+    return build_tree(roles, employees, [role.pk])[0]
+
+
+def org_chart():
+    """Every top-level role with its full subtree"""
+    roles = list(Role.objects.order_by('title'))
+    known = {role.id for role in roles}
+    root_ids = [role.id for role in roles if role.reports_to_id is None or role.reports_to_id not in known]
+    return build_tree(roles, employees_by_role(), root_ids)
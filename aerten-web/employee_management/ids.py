@@ -0,0 +1,56 @@
+import secrets
+import threading
+import time
+
+
+# Crockford base32: no I, L, O or U, so ids read back unambiguously and stay uppercase
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+# 9 characters of milliseconds (45 bits, good for ~1100 years) then 3 of sequence (15 bits).
+# 12 characters in total, the same length as the old random hex ids
+TIME_CHARS = 9
+SEQUENCE_CHARS = 3
+SEQUENCE_MAX = 32 ** SEQUENCE_CHARS - 1
+
+
+def encode(number, length):
+    chars = []
+    for _ in range(length):
+        (number, digit) = divmod(number, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+class TimeOrderedIdGenerator:
+    """
+    Time-ordered ids: a millisecond timestamp followed by a sequence number.
+
+    New ids sort after older ones, so inserts land at the right-hand edge of the primary key
+    index instead of at random pages. Within a millisecond the sequence counts up from a
+    random start in its lower half, which keeps ids from one process strictly increasing and
+    makes a clash between processes unlikely. Callers must still insert with a uniqueness
+    check (see Employee.save).
+    """
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.last_ms = -1
+        self.sequence = 0
+
+    def __call__(self):
+        with self.lock:
+            now_ms = int(self.clock() * 1000)
+            if now_ms > self.last_ms:
+                self.last_ms = now_ms
+                self.sequence = secrets.randbelow(SEQUENCE_MAX // 2)
+            elif self.sequence < SEQUENCE_MAX:
+                # Same millisecond, or the clock went backwards: keep counting on the last one
+                self.sequence += 1
+            else:
+                # Sequence exhausted, borrow the next millisecond
+                self.last_ms += 1
+                self.sequence = secrets.randbelow(SEQUENCE_MAX // 2)
+            return encode(self.last_ms, TIME_CHARS) + encode(self.sequence, SEQUENCE_CHARS)
+
+
+new_employee_id = TimeOrderedIdGenerator()
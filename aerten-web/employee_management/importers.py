@@ -0,0 +1,183 @@
+import csv
+import json
+from collections import Counter
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from employee_management import headcount
+from employee_management.cache import ORG_CHART_CACHE, invalidate_cache
+from employee_management.models import Employee, Role, Team, generate_employee_id
+from employee_management.search import search_document_from_parts
+from employee_management.serializers import EmployeeImportRowSerializer
+
+
+User = get_user_model()
+
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+
+
+def detect_format(filename, requested=None):
+    if requested in (FORMAT_CSV, FORMAT_NDJSON):
+        return requested
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return FORMAT_NDJSON
+    return FORMAT_CSV
+
+
+class EmployeeImporter:
+    """
+    Create users and their employee profiles from a CSV or NDJSON stream.
+
+    Rows are read lazily and handled in chunks: each chunk is validated, checked for
+    duplicate usernames and emails in one query, then written with bulk_create. That skips
+    the per-user post_save handler, which would insert one Employee at a time. Bad rows are
+    reported by line number and never stop the rest of the import.
+    """
+    chunk_size = 500
+
+    def __init__(self, chunk_size=None):
+        if chunk_size:
+            self.chunk_size = chunk_size
+        self.roles = {title.lower(): (pk, title) for (pk, title) in Role.objects.values_list("pk", "title")}
+        self.teams = {name.lower(): (pk, name) for (pk, name) in Team.objects.values_list("pk", "name")}
+        self.seen_usernames = set()
+        self.seen_emails = set()
+        self.created = 0
+        self.errors = []
+
+    def run(self, stream, file_format=FORMAT_CSV):
+        """Import every row of a text stream, returns a summary with per-row errors"""
+        chunk = []
+        for (line, row) in self.read_rows(stream, file_format):
+            chunk.append((line, row))
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+        return {"created": self.created, "errors": self.errors}
+
+    def read_rows(self, stream, file_format):
+        if file_format == FORMAT_NDJSON:
+            for (line, text) in enumerate(stream, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except ValueError:
+                    self.add_error(line, {"non_field_errors": ["Invalid JSON."]})
+                    continue
+                if not isinstance(row, dict):
+                    self.add_error(line, {"non_field_errors": ["Expected a JSON object."]})
+                    continue
+                yield (line, row)
+        else:
+            reader = csv.DictReader(stream)
+            for row in reader:
+                # Empty cells mean "not given", and teams are separated by semicolons
+                row = {key: value for (key, value) in row.items() if key and value not in (None, "")}
+                if "teams" in row:
+                    row["teams"] = [name for name in row["teams"].split(";") if name.strip()]
+                yield (reader.line_num, row)
+
+    def add_error(self, line, errors):
+        self.errors.append({"line": line, "errors": errors})
+
+    def import_chunk(self, chunk):
+        context = {"roles": self.roles, "teams": self.teams}
+        valid = []
+        for (line, row) in chunk:
+            serializer = EmployeeImportRowSerializer(data=row, context=context)
+            if serializer.is_valid():
+                valid.append((line, serializer.validated_data))
+            else:
+                self.add_error(line, serializer.errors)
+        valid = self.drop_duplicates(valid)
+        if not valid:
+            return
+
+        try:
+            with transaction.atomic():
+                self.insert(valid)
+        except IntegrityError:
+            # Something changed under us, fall back to one savepoint per row to isolate it
+            for (line, data) in valid:
+                try:
+                    with transaction.atomic():
+                        self.insert([(line, data)])
+                except IntegrityError as error:
+                    self.add_error(line, {"non_field_errors": [str(error)]})
+
+    def drop_duplicates(self, rows):
+        usernames = [data["username"] for (_, data) in rows]
+        emails = [data["email"] for (_, data) in rows]
+        taken = User.objects.filter(Q(username__in=usernames) | Q(email__in=emails)).values_list("username", "email")
+        for (username, email) in taken:
+            self.seen_usernames.add(username)
+            self.seen_emails.add(email.lower())
+
+        unique = []
+        for (line, data) in rows:
+            if data["username"] in self.seen_usernames:
+                self.add_error(line, {"username": ["A user with that username already exists."]})
+            elif data["email"].lower() in self.seen_emails:
+                self.add_error(line, {"email": ["A user with that email already exists."]})
+            else:
+                self.seen_usernames.add(data["username"])
+                self.seen_emails.add(data["email"].lower())
+                unique.append((line, data))
+        return unique
+
+    def insert(self, rows):
+        users = [
+            User(
+                username=data["username"],
+                email=data["email"],
+                first_name=data["first_name"],
+                last_name=data["last_name"],
+                # Rows without a password get an unusable one, the user sets it through a reset
+                password=make_password(data["password"] or None),
+            )
+            for (_, data) in rows
+        ]
+        User.objects.bulk_create(users)
+        if any(user.pk is None for user in users):
+            ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list("username", "pk"))
+            for user in users:
+                user.pk = ids[user.username]
+
+        employees = []
+        memberships = []
+        Membership = Employee.team.through
+        for ((_, data), user) in zip(rows, users):
+            role = data["role"]
+            employee = Employee(
+                id=generate_employee_id(),
+                user_id=user.pk,
+                phone=data["phone"],
+                birth_date=data["birth_date"],
+                gender=data["gender"],
+                employment_status=data["employment_status"],
+                access_level=data["access_level"],
+                role_id=role[0] if role else None,
+                search_document=search_document_from_parts(
+                    data["first_name"], data["last_name"], data["email"],
+                    role[1] if role else None,
+                    [name for (_, name) in data["teams"]],
+                ),
+            )
+            if data["join_date"]:
+                employee.join_date = data["join_date"]
+            employees.append(employee)
+            memberships += [Membership(employee_id=employee.id, team_id=team_id) for (team_id, _) in data["teams"]]
+
+        Employee.objects.bulk_create(employees)
+        Membership.objects.bulk_create(memberships, ignore_conflicts=True)
+        # bulk_create sends no signals, count the new rows here
+        deltas = Counter(group for employee in employees for group in headcount.employee_groups(employee))
+        deltas.update((headcount.TEAM, headcount.group_value(team_id)) for (employee_id, team_id) in {(membership.employee_id, membership.team_id) for membership in memberships})
+        headcount.apply_deltas(deltas)
+        invalidate_cache(ORG_CHART_CACHE)
+        self.created += len(employees)
@@ -0,0 +1,55 @@
+import secrets
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from employee_management.ids import TimeOrderedIdGenerator
+
+
+def random_hex_id():
+    # The previous generator, uuid4().hex[:12].upper()
+    return secrets.token_hex(6).upper()
+
+
+class Command(BaseCommand):
+    help = "Compare insert and join cost of random hex ids against time-ordered ids on scratch tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+        parser.add_argument("--children", type=int, default=4, help="Child rows per parent, joined back on the key")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        generators = {"random hex": random_hex_id, "time-ordered": TimeOrderedIdGenerator()}
+        self.stdout.write(f"{connection.vendor}, {options['rows']} parents x {options['children']} children")
+        self.stdout.write(f"{'ids':<14}{'insert parents':>16}{'insert children':>17}{'join':>10}")
+        for (name, generate) in generators.items():
+            (parents, children, join) = self.run(generate, **options)
+            self.stdout.write(f"{name:<14}{parents:>15.3f}s{children:>16.3f}s{join:>9.3f}s")
+
+    def run(self, generate, rows, children, batch_size, **options):
+        ids = [generate() for _ in range(rows)]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("CREATE TEMPORARY TABLE bench_parent (id varchar(13) PRIMARY KEY)")
+            cursor.execute("CREATE TEMPORARY TABLE bench_child (id integer PRIMARY KEY, parent_id varchar(13) NOT NULL)")
+            cursor.execute("CREATE INDEX bench_child_parent ON bench_child (parent_id)")
+            try:
+                start = time.perf_counter()
+                for offset in range(0, rows, batch_size):
+                    cursor.executemany("INSERT INTO bench_parent (id) VALUES (%s)", [(id,) for id in ids[offset:offset + batch_size]])
+                parents = time.perf_counter() - start
+
+                # Children reference parents in insertion order, like requests filed by recent hires
+                child_rows = [(n, ids[n // children]) for n in range(rows * children)]
+                start = time.perf_counter()
+                for offset in range(0, len(child_rows), batch_size):
+                    cursor.executemany("INSERT INTO bench_child (id, parent_id) VALUES (%s, %s)", child_rows[offset:offset + batch_size])
+                children_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                cursor.execute("SELECT COUNT(*) FROM bench_child c JOIN bench_parent p ON p.id = c.parent_id")
+                cursor.fetchone()
+                join = time.perf_counter() - start
+            finally:
+                cursor.execute("DROP TABLE bench_child")
+                cursor.execute("DROP TABLE bench_parent")
+        return (parents, children_time, join)
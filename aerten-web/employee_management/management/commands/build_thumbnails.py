@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from employee_management.models import EmployeeImage
+from employee_management.thumbnails import generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Build thumbnails for employee images uploaded before derivatives existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild images that already have thumbnails too")
+
+    def handle(self, *args, **options):
+        images = EmployeeImage.objects.exclude(image="")
+        if not options["all"]:
+            images = images.filter(derivatives={})
+        built = 0
+        for (employee_id, image_name) in images.values_list("employee_id", "image").iterator():
+            generate_derivatives(employee_id, image_name)
+            built += 1
+        self.stdout.write(self.style.SUCCESS(f"Built thumbnails for {built} images."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from employee_management.importers import EmployeeImporter, FORMAT_CSV, FORMAT_NDJSON, detect_format
+
+
+class Command(BaseCommand):
+    help = "Bulk import users and employee profiles from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import")
+        parser.add_argument("--format", dest="file_format", choices=[FORMAT_CSV, FORMAT_NDJSON], help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=EmployeeImporter.chunk_size)
+
+    def handle(self, *args, **options):
+        file_format = detect_format(options["path"], options["file_format"])
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                result = EmployeeImporter(chunk_size=options["chunk_size"]).run(stream, file_format)
+        except OSError as error:
+            raise CommandError(str(error))
+
+        for error in result["errors"]:
+            messages = "; ".join(f"{field}: {' '.join(str(message) for message in field_errors)}" for (field, field_errors) in error["errors"].items())
+            self.stderr.write(f"line {error['line']}: {messages}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {result['created']} employees, {len(result['errors'])} rows rejected."))
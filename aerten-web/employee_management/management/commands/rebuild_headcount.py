@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from employee_management import headcount
+
+
+class Command(BaseCommand):
+    help = "Recount the headcount summary from the employee table, e.g. after raw SQL changes or a fixture load."
+
+    def handle(self, *args, **options):
+        headcount.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Headcount rebuilt, {headcount.summary()['total']} employees."))
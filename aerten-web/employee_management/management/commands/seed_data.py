@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from employee_management.seeding import DataSeeder
+
+
+class Command(BaseCommand):
+    help = "Generate users, employees, roles, teams, educations, addresses and requests for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("employees", type=int, help="Number of seeded employees to top the database up to")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, the same seed gives the same data")
+        parser.add_argument("--password", default="password", help="Password of every seeded user")
+        parser.add_argument("--prefix", default="seed", help="Username prefix of the seeded users")
+        parser.add_argument("--teams", type=int, help="Defaults to one team per 100 employees")
+        parser.add_argument("--roles", type=int, help="Defaults to one role per 50 employees")
+        parser.add_argument("--requests-per-employee", type=int, default=2)
+        parser.add_argument("--chunk-size", type=int, default=DataSeeder.chunk_size)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        seeder = DataSeeder(seed=options["seed"], password=options["password"], prefix=options["prefix"], chunk_size=options["chunk_size"])
+        created = seeder.run(
+            options["employees"],
+            teams=options["teams"],
+            roles=options["roles"],
+            requests_per_employee=options["requests_per_employee"],
+        )
+        summary = ", ".join(f"{count} {name}" for (name, count) in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary} in {time.perf_counter() - started:.1f}s."))
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+def backfill_search_documents(apps, schema_editor):
+    Employee = apps.get_model('employee_management', 'Employee')
+    employees = Employee.objects.using(schema_editor.connection.alias)
+    batch = []
+    # One UPDATE per batch instead of a save() per row
+    for employee in employees.select_related('user', 'role').prefetch_related('team').order_by('pk').iterator(chunk_size=500):
+        parts = [employee.user.first_name, employee.user.last_name, employee.user.email]
+        if employee.role is not None:
+            parts.append(employee.role.title)
+        parts += [team.name for team in employee.team.all()]
+        employee.search_document = " ".join(part.strip().lower() for part in parts if part and part.strip())
+        batch.append(employee)
+        if len(batch) == 500:
+            employees.bulk_update(batch, ['search_document'])
+            batch = []
+    employees.bulk_update(batch, ['search_document'])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # icontains compiles to UPPER(column) LIKE UPPER(%term%) on PostgreSQL, so the index is on UPPER(column)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS employee_search_trgm_idx ON employee_management_employee "
+        "USING gin (UPPER(search_document) gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS request_detail_trgm_idx ON employee_management_request "
+        "USING gin (UPPER(detail) gin_trgm_ops)"
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS employee_search_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS request_detail_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_management', '0029_employee_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_management', '0031_request_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:35
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_headcount(apps, schema_editor):
+    Employee = apps.get_model('employee_management', 'Employee')
+    HeadcountSummary = apps.get_model('employee_management', 'HeadcountSummary')
+    alias = schema_editor.connection.alias
+    rows = []
+    for (dimension, field) in [('role', 'role_id'), ('employment_status', 'employment_status'), ('gender', 'gender'), ('access_level', 'access_level')]:
+        for group in Employee.objects.using(alias).order_by().values(field).annotate(total=Count('pk')):
+            value = '' if group[field] is None else str(group[field])
+            rows.append(HeadcountSummary(dimension=dimension, value=value, count=group['total']))
+    for group in Employee.team.through.objects.using(alias).order_by().values('team_id').annotate(total=Count('pk')):
+        rows.append(HeadcountSummary(dimension='team', value=str(group['team_id']), count=group['total']))
+    HeadcountSummary.objects.using(alias).bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_management', '0032_employeeimage_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadcountSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=50)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'value'), name='headcount_dimension_value_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_headcount, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,21 @@
-import uuid
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib import admin
 from django.conf import settings
 from django.utils import timezone
+from employee_management.ids import new_employee_id
 from employee_management.validators import validate_file_size
 
 
+# Ids already handed out (12 random hex chars) are kept, new ones are time-ordered, see ids.py
+def generate_employee_id():
+    return new_employee_id()
+
+
 # Create your models here.
 class Team(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # List ETags read MAX(updated_at)
     
     # Change the string representation
     def __str__(self) -> str:
@@ -23,6 +29,7 @@ class Team(models.Model):
 class Permission(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
     
     # Change the string representation
     def __str__(self) -> str:
@@ -48,6 +55,7 @@ class Role(models.Model):
     employment_type = models.CharField(max_length=20, choices=EMPLOYEMENT_TYPE, default="Full-time")
     team = models.ManyToManyField(Team, blank=True)
     permission = models.ManyToManyField(Permission, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     # Change the string representation
     def __str__(self) -> str:
@@ -96,6 +104,9 @@ class Employee(models.Model):
     team = models.ManyToManyField(Team, blank=True)
     access_level = models.CharField(max_length=100, choices=ACCESS_LEVEL_CHOICES, default="Employee")
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # List ETags read MAX(updated_at)
+    # Name, email, role and teams in one indexed column, kept in sync by signals (see search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
     
     
     def __str__(self) -> str:
@@ -120,15 +131,36 @@ class Employee(models.Model):
         ordering = ['user__first_name', 'user__last_name']
 
     
+    # Fresh ids to try before giving up on an insert that keeps colliding
+    ID_ATTEMPTS = 5
+    
     def save(self, *args, **kwargs):
-        if not self.id:  # Generate ID only if it doesn't exist
-            self.id = uuid.uuid4().hex[:12].upper()  # 13 random chars after #
-        super().save(*args, **kwargs)
+        if self.id:
+            # The signal handlers run in the same transaction, remember_employee_state locks the row until it commits
+            with transaction.atomic(using=kwargs.get('using')):
+                return super().save(*args, **kwargs)
+        
+        # Generate ID only if it doesn't exist, and INSERT it: with a preset primary key Django would
+        # otherwise try an UPDATE first and silently overwrite an employee that already has this id
+        kwargs['force_insert'] = True
+        for attempt in range(self.ID_ATTEMPTS):
+            self.id = generate_employee_id()
+            try:
+                with transaction.atomic(using=kwargs.get('using')):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = Employee.objects.filter(pk=self.id).exists()
+                self.id = None
+                # Another constraint failed (user already has a profile...), not an id clash
+                if not taken or attempt == self.ID_ATTEMPTS - 1:
+                    raise
         
 
 class EmployeeImage(models.Model):
     employee = models.OneToOneField(Employee, on_delete=models.CASCADE, primary_key=True, related_name="image")
     image = models.ImageField(upload_to='employee_management/images', validators=[validate_file_size])
+    # {"small": {"webp": path, "jpeg": path}, ...}, filled in by employee_management.thumbnails
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return f"Image for {self.employee.user.username}"
@@ -153,6 +185,18 @@ class Request(models.Model):
     approver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='approvals')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     date_requested = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # List ETags read MAX(updated_at)
+    
+    class Meta:
+        indexes = [
+            # Default ordering of the request list
+            models.Index(fields=['-date_requested', '-id'], name='request_date_idx'),
+            models.Index(fields=['status', '-date_requested'], name='request_status_date_idx'),
+            # "My requests", optionally narrowed to one status
+            models.Index(fields=['employee', 'status', '-date_requested'], name='request_employee_status_idx'),
+            # Manager queue, only the pending rows are worth indexing
+            models.Index(fields=['-date_requested'], condition=models.Q(status='Pending'), name='request_pending_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.request_type} request by {self.employee.user.username}"
@@ -170,4 +214,21 @@ class Address(models.Model):
     employee = models.OneToOneField(Employee, on_delete=models.CASCADE, primary_key=True, related_name="address")
     
     def __str__(self):
-        return f"{self.employee}'s address"
\ No newline at end of file
+        return f"{self.employee}'s address"
+
+class HeadcountSummary(models.Model):
+    """
+    Employees per (dimension, value), e.g. ("team", "3") or ("gender", "F").
+    Kept up to date incrementally by signals and the bulk paths, see headcount.py.
+    """
+    dimension = models.CharField(max_length=50)
+    value = models.CharField(max_length=255, blank=True)  # "" counts employees with no value
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'value'], name='headcount_dimension_value_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.dimension}={self.value}: {self.count}"
@@ -1,5 +1,271 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
-    page_size = 10
\ No newline at end of file
+    page_size = 10
+    
+    def uses_keyset(self, request, view=None):
+        return False
+    
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, the COUNT and the page rows go through the async ORM"""
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Prime Paginator.count so that page() below does not run its own COUNT
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a composite key.
+
+    Every page is fetched with `WHERE (key) > (last seen key) ORDER BY key LIMIT n`,
+    so there is no COUNT(*) and no OFFSET scan and page N costs the same as page 1.
+    The last field of `ordering` must be unique so that the key is stable.
+    """
+    page_size = 10
+    cursor_query_param = 'cursor'
+    ordering = ()
+    invalid_cursor_message = 'Invalid cursor'
+    display_page_controls = False
+
+    def uses_keyset(self, request, view=None):
+        return True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._finish(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self._finish([obj async for obj in self._page_queryset(queryset, request, view)])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.key = self.get_ordering(request, queryset, view)
+        (self.position, self.reverse) = self.decode_cursor(request)
+        if self.position is not None:
+            self.position = self.clean_position(queryset.model, self.position)
+
+        key = self.key
+        if self.reverse:
+            key = [self._flip(field) for field in key]
+
+        if self.position is not None:
+            queryset = queryset.filter(self._after(key, self.position))
+        return queryset.order_by(*key)[:self.page_size + 1]
+
+    def _finish(self, results):
+        position = self.position
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        # Going forwards we came from a previous page, going backwards there is a next one
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = has_more if self.reverse else position is not None
+        self.page = results
+        return results
+
+    def get_ordering(self, request, queryset, view):
+        """Follow the direction picked by OrderingFilter and complete it with the rest of the key"""
+        key = list(self.ordering)
+        requested = []
+        backends = [backend for backend in getattr(view, 'filter_backends', []) if issubclass(backend, OrderingFilter)]
+        if view is not None and backends:
+            requested = backends[0]().get_ordering(request, queryset, view) or []
+        names = [field.lstrip('-') for field in key]
+        requested = [field for field in requested if field.lstrip('-') in names]
+        if not requested:
+            return key
+
+        descending = requested[0].startswith('-')
+        seen = {field.lstrip('-') for field in requested}
+        for name in names:
+            if name not in seen:
+                requested.append(f'-{name}' if descending else name)
+        return requested
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return (None, False)
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = cursor['p']
+            reverse = bool(cursor.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.key):
+            raise NotFound(self.invalid_cursor_message)
+        return (position, reverse)
+
+    def clean_position(self, model, position):
+        """The cursor values as their key fields' types, so a crafted cursor is a 404 rather than an ORM error"""
+        cleaned = []
+        for (field, value) in zip(self.key, position):
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                cleaned.append(self._model_field(model, field).to_python(value))
+            except (TypeError, ValueError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return cleaned
+
+    def encode_cursor(self, position, reverse):
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = True
+        # default=str keeps the microseconds of datetimes, the lookup parses them back
+        encoded = urlsafe_b64encode(json.dumps(cursor, separators=(',', ':'), default=str).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _position(self, instance):
+        position = []
+        for field in self.key:
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            position.append(value)
+        return position
+
+    @staticmethod
+    def _model_field(model, path):
+        names = path.lstrip('-').split('__')
+        for name in names[:-1]:
+            model = model._meta.get_field(name).related_model
+        return model._meta.get_field(names[-1])
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _after(key, position):
+        # (a, b, c) > (x, y, z) expanded to  a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+        # plus a redundant bound on the leading column so the index range scan can be used
+        conditions = []
+        for i, field in enumerate(key):
+            lookups = {key[j].lstrip('-'): position[j] for j in range(i)}
+            name = field.lstrip('-')
+            lookups[f"{name}__{'lt' if field.startswith('-') else 'gt'}"] = position[i]
+            conditions.append(Q(**lookups))
+        leading = key[0].lstrip('-')
+        bound = Q(**{f"{leading}__{'lte' if key[0].startswith('-') else 'gte'}": position[0]})
+        return bound & reduce(or_, conditions)
+
+
+class EmployeeKeysetPagination(KeysetPagination):
+    ordering = ('user__first_name', 'user__last_name', 'user_id')
+
+
+class RequestQueuePagination(KeysetPagination):
+    """
+    Keyset pages for the manager queue (`?queue=true`) and for any request list asked for
+    with `?pagination=cursor`. Without either the request list stays unpaginated.
+    """
+    ordering = ('-date_requested', '-id')
+    mode_query_param = 'pagination'
+
+    def uses_keyset(self, request, view=None):
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            return True
+        return view is not None and view.in_queue()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.uses_keyset(request, view):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if not self.uses_keyset(request, view):
+            return None
+        return await super().apaginate_queryset(queryset, request, view)
+
+
+class EmployeePagination(DefaultPagination):
+    """Page numbers by default, keyset pages when the client asks for `?pagination=cursor`"""
+    mode_query_param = 'pagination'
+    keyset_class = EmployeeKeysetPagination
+
+    def uses_keyset(self, request, view=None):
+        return request.query_params.get(self.mode_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            self.keyset = self.keyset_class()
+            self.display_page_controls = False
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            self.keyset = self.keyset_class()
+            self.display_page_controls = False
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from .profiles import current_employee_id, is_admin_or_manager
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -8,7 +9,7 @@ class IsAdminOrReadOnly(permissions.BasePermission):
 
 class IsAdminOrManager(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_staff or request.user.employee.access_level in ['Admin', 'Manager']
+        return is_admin_or_manager(request)
     
 
 class IsAdminManagerOrOwner(permissions.BasePermission):
@@ -17,18 +18,18 @@ class IsAdminManagerOrOwner(permissions.BasePermission):
         return request.user and request.user.is_authenticated
     
     def has_object_permission(self, request, view, obj):
-        user = request.user
         # Allow admins/managers to perform any action
-        if user.is_staff or user.employee.access_level in ["Admin", "Manager"]:
+        if is_admin_or_manager(request):
             return True
+        is_owner = obj.employee_id == current_employee_id(request)
 
         # Allow the request owner to view their own requests (regardless of status)
         if view.action in ["retrieve", "list"]:
-            return obj.employee.user == user
+            return is_owner
 
         # Allow the request owner to delete their own requests only if the request is in the "Pending" state
         if view.action == "destroy":
-            return obj.employee.user == user and obj.status == "Pending"
+            return is_owner and obj.status == "Pending"
 
         # Deny by default
         return False
\ No newline at end of file
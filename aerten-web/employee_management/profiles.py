@@ -0,0 +1,57 @@
+from employee_management.models import Employee
+
+
+MANAGER_ACCESS_LEVELS = ("Admin", "Manager")
+
+
+def current_employee(request):
+    """
+    The signed-in user's Employee, looked up at most once per request.
+
+    Read-only: returns None when the user has no profile instead of creating one,
+    write paths that need a profile use `ensure_employee`.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return None
+    cached = getattr(request, '_current_employee', None)
+    if cached is not None and cached[0] == user.pk:
+        return cached[1]
+    employee = Employee.objects.filter(user_id=user.pk).first()
+    request._current_employee = (user.pk, employee)
+    return employee
+
+
+def ensure_employee(request):
+    """Like `current_employee`, but creates the missing profile. Only call it from write paths"""
+    employee = current_employee(request)
+    if employee is None:
+        (employee, created) = Employee.objects.get_or_create(user_id=request.user.pk)
+        request._current_employee = (request.user.pk, employee)
+    return employee
+
+
+def token_claims(request):
+    """Authorization claims of a current JWT (see ClaimsJWTAuthentication), None when they must come from the database"""
+    return getattr(request.user, 'claims', None)
+
+
+def current_employee_id(request):
+    claims = token_claims(request)
+    if claims is not None:
+        return claims["employee_id"]
+    employee = current_employee(request)
+    return employee.pk if employee is not None else None
+
+
+def is_admin_or_manager(request):
+    user = request.user
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_staff:
+        return True
+    claims = token_claims(request)
+    if claims is not None:
+        return claims["access_level"] in MANAGER_ACCESS_LEVELS
+    employee = current_employee(request)
+    return employee is not None and employee.access_level in MANAGER_ACCESS_LEVELS
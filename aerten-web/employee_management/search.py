@@ -0,0 +1,32 @@
+from django.db.models import QuerySet
+from employee_management.models import Employee
+
+
+def search_document_from_parts(first_name, last_name, email, role_title, team_names):
+    """Lower-cased text the employee directory search runs against: name, email, role and teams"""
+    parts = [first_name, last_name, email, role_title, *team_names]
+    return " ".join(part.strip().lower() for part in parts if part and part.strip())
+
+
+def build_search_document(employee):
+    return search_document_from_parts(
+        employee.user.first_name,
+        employee.user.last_name,
+        employee.user.email,
+        employee.role.title if employee.role is not None else None,
+        [team.name for team in employee.team.all()],
+    )
+
+
+def refresh_search_documents(employees):
+    """Rebuild `Employee.search_document` for a queryset or list of ids, in one read and one bulk write"""
+    if not isinstance(employees, QuerySet):
+        employees = Employee.objects.filter(pk__in=list(employees))
+    changed = []
+    for employee in employees.select_related('user', 'role').prefetch_related('team').order_by():
+        document = build_search_document(employee)
+        if document != employee.search_document:
+            employee.search_document = document
+            changed.append(employee)
+    # bulk_update skips save(), so neither signals nor updated_at fire for a derived column
+    Employee.objects.bulk_update(changed, ['search_document'], batch_size=500)
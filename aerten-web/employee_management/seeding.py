@@ -0,0 +1,172 @@
+import random
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from employee_management import headcount
+from employee_management.cache import ORG_CHART_CACHE, PERMISSIONS_CACHE, ROLES_CACHE, invalidate_cache
+from employee_management.models import Address, Education, Employee, Permission, Request, Role, Team, generate_employee_id
+from employee_management.search import search_document_from_parts
+
+
+User = get_user_model()
+
+FIRST_NAMES = ["Ada", "Kwame", "Yaw", "Ama", "Akosua", "Kofi", "Efua", "Abena", "Kojo", "Esi", "John", "Mary", "Grace", "Peter", "Ruth"]
+LAST_NAMES = ["Mensah", "Owusu", "Boateng", "Asante", "Osei", "Addo", "Appiah", "Agyeman", "Darko", "Ofori", "Smith", "Brown"]
+CITIES = [("Ghana", "Accra"), ("Ghana", "Kumasi"), ("Ghana", "Takoradi"), ("Nigeria", "Lagos"), ("Kenya", "Nairobi"), ("United Kingdom", "London")]
+INSTITUTIONS = ["University of Ghana", "KNUST", "Ashesi University", "University of Cape Coast", "University of Lagos"]
+COURSES = ["Computer Science", "Accounting", "Economics", "Marketing", "Electrical Engineering", None]
+REQUEST_TYPES = [choice for (choice, _) in Request.TYPE_CHOICES]
+REQUEST_STATUSES = ["Pending", "Pending", "Approved", "Rejected"]
+PERMISSION_COUNT = 20
+# Children per role in the reports_to tree
+ROLE_FAN_OUT = 4
+
+
+class DataSeeder:
+    """
+    Fill the database with a realistic org for load tests and benchmarks.
+
+    Users are named `<prefix><n>` and the seeder only adds the ones that are missing, so
+    running it again with a bigger count tops the data up. Teams, roles and permissions are
+    the seeder's own, named after the prefix as well, and never rows that were already in the
+    database. Everything is written with bulk_create, users share one precomputed password hash
+    and every person and role draws from its own random.Random, so the same arguments give the
+    same people, roles and requests on a fresh database as on a topped up one. bulk_create sends no signals: search documents are built here, the headcount
+    summary is rebuilt and the list caches are invalidated once at the end.
+    """
+    chunk_size = 2000
+
+    def __init__(self, seed=0, password="password", prefix="seed", chunk_size=None):
+        if chunk_size:
+            self.chunk_size = chunk_size
+        self.seed = seed
+        self.prefix = prefix
+        self.password_hash = make_password(password)
+
+    def run(self, employees, teams=None, roles=None, requests_per_employee=2):
+        """Top the database up to `employees` seeded employees, returns how many rows were added"""
+        existing = User.objects.filter(username__startswith=self.prefix).count()
+        self.created = {"users": 0, "teams": 0, "roles": 0, "educations": 0, "addresses": 0, "requests": 0}
+
+        self.teams = self.seed_teams(teams or max(employees // 100, 5))
+        self.roles = self.seed_roles(roles or max(employees // 50, 10))
+        for start in range(existing, employees, self.chunk_size):
+            with transaction.atomic():
+                self.seed_employees(range(start, min(start + self.chunk_size, employees)), requests_per_employee)
+
+        headcount.rebuild()
+        for namespace in (ROLES_CACHE, PERMISSIONS_CACHE, ORG_CHART_CACHE):
+            invalidate_cache(namespace)
+        return self.created
+
+    def seed_teams(self, count):
+        names = [f"{self.prefix}-team-{i}" for i in range(count)]
+        teams = {team.name: team for team in Team.objects.filter(name__in=names)}
+        missing = [Team(name=name, description=f"Seeded {name.lower()}") for name in names if name not in teams]
+        Team.objects.bulk_create(missing)
+        self.created["teams"] = len(missing)
+        teams.update((team.name, team) for team in Team.objects.filter(name__in=[team.name for team in missing]))
+        return [teams[name] for name in names]
+
+    def seed_roles(self, count):
+        names = [f"{self.prefix}-permission-{i}" for i in range(PERMISSION_COUNT)]
+        known = set(Permission.objects.filter(name__in=names).values_list("name", flat=True))
+        Permission.objects.bulk_create([Permission(name=name, description=f"Seeded {name}") for name in names if name not in known])
+        permissions = list(Permission.objects.filter(name__in=names))
+
+        titles = [f"{self.prefix}-role-{i}" for i in range(count)]
+        roles = {role.title: role for role in Role.objects.filter(title__in=titles)}
+        # Role i reports to role (i - 1) // ROLE_FAN_OUT, one bulk_create per level of the tree
+        level = [0]
+        while level[0] < count:
+            missing = [
+                Role(title=titles[i], description=f"Seeded {titles[i].lower()}", reports_to=roles[titles[(i - 1) // ROLE_FAN_OUT]] if i else None)
+                for i in level if i < count and titles[i] not in roles
+            ]
+            self.save_roles(missing, permissions)
+            roles.update((role.title, role) for role in missing)
+            level = range(level[-1] + 1, level[-1] + 1 + len(level) * ROLE_FAN_OUT)
+        return [roles[title] for title in titles]
+
+    def save_roles(self, roles, permissions):
+        Role.objects.bulk_create(roles)
+        if any(role.pk is None for role in roles):
+            ids = dict(Role.objects.filter(title__in=[role.title for role in roles]).values_list("title", "pk"))
+            for role in roles:
+                role.pk = ids[role.title]
+        RolePermission = Role.permission.through
+        RolePermission.objects.bulk_create([
+            RolePermission(role_id=role.pk, permission_id=permission.pk)
+            for role in roles for permission in random.Random(f"{self.seed}:{role.title}").sample(permissions, 3)
+        ])
+        self.created["roles"] += len(roles)
+
+    def seed_employees(self, numbers, requests_per_employee):
+        # One generator per person, so employee n is the same whichever run creates it
+        rngs = [random.Random(f"{self.seed}:{n}") for n in numbers]
+        users = []
+        for (n, rng) in zip(numbers, rngs):
+            users.append(User(
+                username=f"{self.prefix}{n}",
+                email=f"{self.prefix}{n}@example.com",
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                password=self.password_hash,
+            ))
+        User.objects.bulk_create(users)
+        if any(user.pk is None for user in users):
+            ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list("username", "pk"))
+            for user in users:
+                user.pk = ids[user.username]
+
+        employees = []
+        memberships = []
+        Membership = Employee.team.through
+        for (user, rng) in zip(users, rngs):
+            role = rng.choice(self.roles)
+            teams = rng.sample(self.teams, rng.randint(1, 2))
+            employee = Employee(
+                id=generate_employee_id(),
+                user_id=user.pk,
+                phone=f"0{rng.randrange(200000000, 599999999)}",
+                birth_date=date(1970, 1, 1) + timedelta(days=rng.randrange(12000)),
+                join_date=date(2015, 1, 1) + timedelta(days=rng.randrange(3650)),
+                gender=rng.choice("MF"),
+                employment_status=rng.choices([Employee.EMPLOYMENT_STATUS_ACTIVE, Employee.EMPLOYMENT_STATUS_INACTIVE], weights=[19, 1])[0],
+                access_level=rng.choices(["Employee", "Manager", "Admin"], weights=[90, 9, 1])[0],
+                role_id=role.pk,
+                search_document=search_document_from_parts(user.first_name, user.last_name, user.email, role.title, [team.name for team in teams]),
+            )
+            employees.append(employee)
+            memberships += [Membership(employee_id=employee.id, team_id=team.pk) for team in teams]
+        Employee.objects.bulk_create(employees)
+        Membership.objects.bulk_create(memberships)
+
+        educations = []
+        addresses = []
+        requests = []
+        for (employee, rng) in zip(employees, rngs):
+            for _ in range(rng.randint(1, 2)):
+                start = date(2000, 9, 1) + timedelta(days=rng.randrange(5000))
+                educations.append(Education(
+                    employee_id=employee.id,
+                    institution=rng.choice(INSTITUTIONS),
+                    course_of_study=rng.choice(COURSES),
+                    start_date=start,
+                    end_date=start + timedelta(days=365 * rng.randint(1, 4)),
+                ))
+            (country, city) = rng.choice(CITIES)
+            addresses.append(Address(employee_id=employee.id, country=country, city=city))
+            requests += [
+                Request(employee_id=employee.id, request_type=rng.choice(REQUEST_TYPES), detail="Seeded request", status=rng.choice(REQUEST_STATUSES))
+                for _ in range(requests_per_employee)
+            ]
+        Education.objects.bulk_create(educations)
+        Address.objects.bulk_create(addresses)
+        Request.objects.bulk_create(requests)
+
+        self.created["users"] += len(users)
+        self.created["educations"] += len(educations)
+        self.created["addresses"] += len(addresses)
+        self.created["requests"] += len(requests)
@@ -1,13 +1,62 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.conf import settings
 from .signals import employee_created
+from .hierarchy import ancestor_roles
+from .profiles import ensure_employee, is_admin_or_manager
 from employee_management.models import Employee, Role, Permission, Team, Education, Address, Request, EmployeeImage
 
 
 
 User = get_user_model()
 
+
+class DynamicFieldsMixin:
+    """
+    Lets clients trim the output with `?fields=a,b` and pull in nested fields with `?expand=x`.
+
+    Without `?fields=` the full representation is returned. With it, reads render only the listed
+    fields, plus any `expandable_fields` named in `?expand=`; writes keep every field. The same field
+    list drives `setup_eager_loading`, so fields that are not rendered are not joined or prefetched either.
+    """
+    expandable_fields = []
+    select_related_fields = {}
+    prefetch_related_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        # Only output is trimmed: a serializer validating input keeps every writable field
+        if request is None or 'data' in kwargs or request.method not in SAFE_METHODS:
+            return
+        requested = self.get_requested_fields(request.query_params)
+        if requested is not None:
+            for field_name in set(self.fields) - set(requested):
+                self.fields.pop(field_name)
+
+    @staticmethod
+    def _split(value):
+        return {item.strip() for item in (value or '').split(',') if item.strip()}
+
+    @classmethod
+    def get_requested_fields(cls, query_params):
+        """Field names to render for this request, or None for all of them"""
+        fields = cls._split(query_params.get('fields'))
+        if not fields:
+            return None
+        expand = cls._split(query_params.get('expand')) & set(cls.expandable_fields)
+        return [field for field in cls.Meta.fields if field in fields or field in expand]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """Join and prefetch the relations the rendered fields read, so a page costs a fixed number of queries"""
+        fields = cls.Meta.fields if fields is None else fields
+        select_related = {cls.select_related_fields[field] for field in fields if field in cls.select_related_fields}
+        prefetch_related = {cls.prefetch_related_fields[field] for field in fields if field in cls.prefetch_related_fields}
+        return queryset.select_related(*sorted(select_related)).prefetch_related(*sorted(prefetch_related))
+
 class PermissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Permission
@@ -46,11 +95,19 @@ class RoleSerializer(serializers.ModelSerializer):
         if Role.objects.filter(title__iexact=role_title).exists():
             raise serializers.ValidationError({"title": "A role with this name already exists."})
         return super().create(validated_data)
+    
+    def validate_reports_to(self, value):
+        # Walk up from the new manager, the role being edited must not be on that chain
+        if value is not None and self.instance is not None:
+            if any(role.pk == self.instance.pk for role in ancestor_roles(value.pk)):
+                raise serializers.ValidationError("A role cannot report to itself or to one of its subordinates.")
+        return value
 
 class AssignRoleSerializer(serializers.Serializer):
     role_id = serializers.PrimaryKeyRelatedField(queryset=Role.objects.all())
+    # Plain ids, checked against the database in one query by the bulk path
     employee_ids = serializers.ListField(
-        child=serializers.PrimaryKeyRelatedField(queryset=Employee.objects.all()),
+        child=serializers.CharField(max_length=13),
         required=False  # Make it optional
     )
     employee_id = serializers.PrimaryKeyRelatedField(
@@ -65,17 +122,44 @@ class AssignRoleSerializer(serializers.Serializer):
         if data.get("employee_id") and data.get("employee_ids"):
             raise serializers.ValidationError("Provide only 'employee_id' OR 'employee_ids', not both.")
         return data
+
+
+class AssignTeamSerializer(serializers.Serializer):
+    ACTION_CHOICES = [
+        ('add', 'add'),
+        ('remove', 'remove'),
+    ]
+    
+    team_id = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all())
+    employee_ids = serializers.ListField(child=serializers.CharField(max_length=13), allow_empty=False)
+    action = serializers.ChoiceField(choices=ACTION_CHOICES, default='add')
     
+class RequestDecisionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+
 class EmployeeImageSerializer(serializers.ModelSerializer):
+    thumbnails = serializers.SerializerMethodField()
+    
     class Meta:
         model = EmployeeImage
-        fields = ["image"]
+        fields = ["image", "thumbnails"]
+    
+    def get_thumbnails(self, obj):
+        # Empty until the background job has run, clients fall back to `image`
+        storage = obj.image.storage
+        request = self.context.get('request')
+        thumbnails = {}
+        for (name, formats) in obj.derivatives.items():
+            urls = {extension: storage.url(path) for (extension, path) in formats.items()}
+            if request is not None:
+                urls = {extension: request.build_absolute_uri(url) for (extension, url) in urls.items()}
+            thumbnails[name] = urls
+        return thumbnails
     
     def create(self, validated_data):
         # Get the currently logged-in user
-        user = self.context['request'].user
-        
-        employee = user.employee
+        # Uploading is a write, so this is where a missing profile gets created
+        employee = ensure_employee(self.context['request'])
         
         # Check if an EmployeeImage already exists for this employee
         if hasattr(employee, 'image'):
@@ -106,10 +190,8 @@ class RequestSerializer(serializers.ModelSerializer):
     
     def get_fields(self):
         fields = super().get_fields()
-        user = self.context['request'].user
-
         # If the user is not an admin or manager, hide the status field
-        if not (user.is_staff or user.employee.access_level in ["Admin", "Manager"]):
+        if not is_admin_or_manager(self.context['request']):
             fields['status'].read_only = True  # Ensure status is read-only
             fields['status'].default = "Pending"  # Set default value to "Pending"
             fields['approver'].read_only = True
@@ -125,16 +207,13 @@ class RequestSerializer(serializers.ModelSerializer):
     
     def update(self, instance, validated_data):
         """Allow only admins or managers to update status"""
-        request = self.context['request']
-        user = request.user
-
         # Prevent regular employees from updating status
-        if "status" in validated_data and not (user.is_staff or user.employee.access_level in ['Admin', 'Manager']):
+        if "status" in validated_data and not is_admin_or_manager(self.context['request']):
             validated_data.pop("status")
 
         return super().update(instance, validated_data)
     
-class EducationSerializer(serializers.ModelSerializer):
+class EducationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Education
         fields = ["id", "institution", "course_of_study", "start_date", "end_date"]
@@ -144,7 +223,7 @@ class EducationSerializer(serializers.ModelSerializer):
         return Education.objects.create(employee_id=employee_id, **validated_data)
 
 
-class AddressSerializer(serializers.ModelSerializer):
+class AddressSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     
     class Meta:
         model = Address
@@ -157,14 +236,70 @@ class AddressSerializer(serializers.ModelSerializer):
 
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     educations = EducationSerializer(many=True, read_only=True)
     address = AddressSerializer(read_only=True)
     image = EmployeeImageSerializer(read_only=True)
     user_id = serializers.IntegerField(read_only=True)
+    first_name = serializers.CharField(source='user.first_name', read_only=True)
+    last_name = serializers.CharField(source='user.last_name', read_only=True)
     role = serializers.PrimaryKeyRelatedField(queryset=Role.objects.all())  # Accept role ID
     team = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all(), many=True)  # Accept team IDs
     
     class Meta:
         model = Employee
-        fields = ['id', 'user_id', 'phone', 'join_date', 'email', 'birth_date', 'gender', 'social_handle', 'employment_status', 'role', 'team', 'access_level', 'image', 'educations', 'address']
+        fields = ['id', 'user_id', 'first_name', 'last_name', 'phone', 'join_date', 'email', 'birth_date', 'gender', 'social_handle', 'employment_status', 'role', 'team', 'access_level', 'image', 'educations', 'address']
+
+    # Nested fields a trimmed (?fields=) request only gets through ?expand=
+    expandable_fields = ['image', 'educations', 'address']
+
+    # Relations each serialized field reads from, so the queryset can load them up front
+    select_related_fields = {
+        'first_name': 'user',
+        'last_name': 'user',
+        'email': 'user',
+        'image': 'image',
+        'address': 'address',
+    }
+    prefetch_related_fields = {
+        'team': 'team',
+        'educations': 'educations',
+    }
+
+
+
+class EmployeeImportRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk import. Roles and teams are named, and resolved against the
+    in-memory `roles` / `teams` lookups passed in the context instead of one query per row.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    password = serializers.CharField(required=False, allow_blank=True, default='', write_only=True)
+    phone = serializers.CharField(max_length=12, required=False, allow_null=True, default=None)
+    birth_date = serializers.DateField(required=False, allow_null=True, default=None)
+    join_date = serializers.DateField(required=False, allow_null=True, default=None)
+    gender = serializers.ChoiceField(choices=Employee.GENDER_STATUS_CHOICES, required=False, allow_blank=True, default='')
+    employment_status = serializers.ChoiceField(choices=Employee.EMPLOYMENT_STATUS_CHOICES, default=Employee.EMPLOYMENT_STATUS_ACTIVE)
+    access_level = serializers.ChoiceField(choices=Employee.ACCESS_LEVEL_CHOICES, default='Employee')
+    role = serializers.CharField(required=False, allow_blank=True, default='')
+    teams = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    
+    def validate_role(self, value):
+        if not value:
+            return None
+        role = self.context['roles'].get(value.strip().lower())
+        if role is None:
+            raise serializers.ValidationError(f"Unknown role '{value}'.")
+        return role
+    
+    def validate_teams(self, value):
+        teams = []
+        for name in value:
+            team = self.context['teams'].get(name.strip().lower())
+            if team is None:
+                raise serializers.ValidationError(f"Unknown team '{name}'.")
+            teams.append(team)
+        return teams
@@ -1,10 +1,274 @@
+from collections import Counter
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils import timezone
-from employee_management.models import Employee
+from employee_management.models import Employee, Role, Permission, Team, Request, Education, Address, EmployeeImage
+from employee_management import headcount
+from employee_management.cache import ROLES_CACHE, PERMISSIONS_CACHE, ORG_CHART_CACHE, invalidate_cache
+from employee_management.search import refresh_search_documents
+from employee_management.thumbnails import delete_derivatives, schedule_derivatives
+from employee_management.tokens import bump_authz_version
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_employee_for_new_user(sender, **kwargs):
     if kwargs['created']:
-        Employee.objects.create(user=kwargs['instance'])
\ No newline at end of file
+        Employee.objects.create(user=kwargs['instance'])
+
+
+@receiver(pre_save, sender=Employee)
+def remember_employee_state(sender, instance, raw=False, using=None, **kwargs):
+    # The stored row before this save, compared against in the post_save handlers below. Locked until
+    # Employee.save() commits, so a concurrent save of the same employee waits and then sees this one
+    instance._previous_state = None
+    if not raw and not instance._state.adding:
+        rows = Employee.objects.using(using).select_for_update().filter(pk=instance.pk).order_by()
+        instance._previous_state = rows.only('role_id', 'employment_status', 'gender', 'access_level', 'user_id').first()
+
+
+# Token claims are trusted until the user's authorization version moves, see tokens.claims_are_current
+@receiver(post_save, sender=Employee)
+def expire_employee_claims(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_state', None)
+    # A new employee changes the employee_id claim, which was empty
+    if created or (previous is not None and previous.access_level != instance.access_level):
+        bump_authz_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Employee)
+def expire_deleted_employee_claims(sender, instance, **kwargs):
+    bump_authz_version(instance.user_id)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def expire_staff_claims(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and {'is_staff', 'is_active'}.isdisjoint(update_fields):
+        return
+    old = sender.objects.filter(pk=instance.pk).values('is_staff', 'is_active').first()
+    if old is not None and (old['is_staff'], old['is_active']) != (instance.is_staff, instance.is_active):
+        bump_authz_version(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def expire_deleted_user_claims(sender, instance, **kwargs):
+    bump_authz_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver(m2m_changed, sender=Role.permission.through)
+def invalidate_roles_cache(sender, action=None, **kwargs):
+    if action is None or action.startswith('post_'):
+        invalidate_cache(ROLES_CACHE)
+
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_org_chart_cache(sender, **kwargs):
+    invalidate_cache(ORG_CHART_CACHE)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_org_chart_names(sender, created, **kwargs):
+    # New users get their Employee through create_employee_for_new_user, which is covered above
+    if not created:
+        invalidate_cache(ORG_CHART_CACHE)
+
+
+@receiver([post_save, post_delete], sender=Permission)
+def invalidate_permissions_cache(sender, signal, **kwargs):
+    invalidate_cache(PERMISSIONS_CACHE)
+    # Deleting a permission drops its Role.permission rows without sending m2m_changed
+    if signal is post_delete:
+        invalidate_cache(ROLES_CACHE)
+
+
+
+# Change markers (updated_at) behind ETag / Last-Modified. Rows whose representation changes
+# without a save of their own are touched here.
+def touch(queryset):
+    queryset.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def touch_employee_for_user(sender, instance, created, **kwargs):
+    if not created:
+        touch(Employee.objects.filter(user=instance))
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def touch_approved_requests(sender, instance, **kwargs):
+    touch(Request.objects.filter(approver=instance))
+
+
+@receiver([post_save, post_delete], sender=Education)
+@receiver([post_save, post_delete], sender=Address)
+@receiver([post_save, post_delete], sender=EmployeeImage)
+def touch_employee_for_details(sender, instance, **kwargs):
+    touch(Employee.objects.filter(pk=instance.employee_id))
+
+
+@receiver(post_save, sender=EmployeeImage)
+def build_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw and instance.image:
+        schedule_derivatives(instance)
+
+
+@receiver(post_delete, sender=EmployeeImage)
+def delete_image_derivatives(sender, instance, **kwargs):
+    delete_derivatives(instance.derivatives, instance.image.storage)
+
+
+@receiver(m2m_changed, sender=Employee.team.through)
+def touch_employee_teams(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        touch(Employee.objects.filter(team=instance))
+    elif reverse and action in ('post_add', 'post_remove'):
+        touch(Employee.objects.filter(pk__in=pk_set))
+    elif not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        touch(Employee.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Role.permission.through)
+def touch_role_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        touch(Role.objects.filter(permission=instance))
+    elif reverse and action in ('post_add', 'post_remove'):
+        touch(Role.objects.filter(pk__in=pk_set))
+    elif not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        touch(Role.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_delete, sender=Role)
+def touch_role_dependents(sender, instance, **kwargs):
+    # Employee.role and Role.reports_to are set to NULL without a save
+    touch(Employee.objects.filter(role=instance))
+    touch(Role.objects.filter(reports_to=instance))
+
+
+@receiver(pre_delete, sender=Team)
+def touch_team_members(sender, instance, **kwargs):
+    touch(Employee.objects.filter(team=instance))
+
+
+@receiver(pre_delete, sender=Permission)
+def touch_permission_roles(sender, instance, **kwargs):
+    touch(Role.objects.filter(permission=instance))
+
+
+
+# Employee.search_document mirrors the user's name and email, the role title and the team names.
+# A save limited to other fields (update_fields) leaves it alone
+def saved_any(update_fields, fields):
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=Employee)
+def refresh_employee_search_document(sender, instance, created, update_fields=None, **kwargs):
+    if not saved_any(update_fields, {'role', 'role_id', 'user', 'user_id'}):
+        return
+    previous = getattr(instance, '_previous_state', None)
+    if not created and previous is not None and (previous.role_id, previous.user_id) == (instance.role_id, instance.user_id):
+        return
+    refresh_search_documents([instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_user_search_document(sender, instance, created, update_fields=None, **kwargs):
+    # Logging in saves last_login only
+    if not created and saved_any(update_fields, {'first_name', 'last_name', 'email'}):
+        refresh_search_documents(Employee.objects.filter(user=instance))
+
+
+@receiver(m2m_changed, sender=Employee.team.through)
+def refresh_team_search_documents(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            refresh_search_documents([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_employee_ids = list(Employee.objects.filter(team=instance).values_list('pk', flat=True))
+    elif action == 'post_clear':
+        refresh_search_documents(getattr(instance, '_cleared_employee_ids', []))
+    else:
+        refresh_search_documents(pk_set)
+
+
+@receiver(post_save, sender=Role)
+def refresh_role_search_documents(sender, instance, created, update_fields=None, **kwargs):
+    if not created and saved_any(update_fields, {'title'}):
+        refresh_search_documents(Employee.objects.filter(role=instance))
+
+
+@receiver(post_save, sender=Team)
+def refresh_team_name_search_documents(sender, instance, created, update_fields=None, **kwargs):
+    if not created and saved_any(update_fields, {'name'}):
+        refresh_search_documents(Employee.objects.filter(team=instance))
+
+
+@receiver(pre_delete, sender=Role)
+@receiver(pre_delete, sender=Team)
+def remember_search_documents_to_refresh(sender, instance, **kwargs):
+    lookup = 'role' if sender is Role else 'team'
+    instance._search_employee_ids = list(Employee.objects.filter(**{lookup: instance}).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Role)
+@receiver(post_delete, sender=Team)
+def refresh_deleted_search_documents(sender, instance, **kwargs):
+    refresh_search_documents(getattr(instance, '_search_employee_ids', []))
+
+
+
+# HeadcountSummary, adjusted by the delta of every change instead of recounted
+@receiver(post_save, sender=Employee)
+def count_employee(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous_state', None)
+    if created or previous is not None:
+        headcount.employee_changed(previous, instance)
+
+
+@receiver(pre_delete, sender=Employee)
+def remember_employee_teams(sender, instance, **kwargs):
+    # The memberships are cascaded away without an m2m_changed signal
+    instance._headcount_team_ids = list(instance.team.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Employee)
+def uncount_employee(sender, instance, **kwargs):
+    headcount.employee_removed(instance, getattr(instance, '_headcount_team_ids', []))
+
+
+@receiver(m2m_changed, sender=Employee.team.through)
+def count_team_members(sender, instance, action, reverse, pk_set, **kwargs):
+    Membership = Employee.team.through
+    (own_field, other_field) = ('team_id', 'employee_id') if reverse else ('employee_id', 'team_id')
+    if action in ('pre_remove', 'pre_clear'):
+        # pk_set on remove lists every id asked for, members or not
+        memberships = Membership.objects.filter(**{own_field: instance.pk})
+        if action == 'pre_remove':
+            memberships = memberships.filter(**{f"{other_field}__in": pk_set})
+        instance._headcount_removed = list(memberships.values_list('team_id', flat=True))
+    elif action in ('post_remove', 'post_clear'):
+        headcount.team_members_changed(Counter(getattr(instance, '_headcount_removed', [])), -1)
+    elif action == 'post_add':
+        # Only the rows actually inserted are in pk_set
+        team_ids = [instance.pk] * len(pk_set) if reverse else pk_set
+        headcount.team_members_changed(Counter(team_ids), 1)
+
+
+@receiver(pre_delete, sender=Role)
+def uncount_role(sender, instance, **kwargs):
+    # Its employees are left without a role
+    headcount.drop_group("role", instance.pk, fallback=headcount.UNASSIGNED)
+
+
+@receiver(pre_delete, sender=Team)
+def uncount_team(sender, instance, **kwargs):
+    headcount.drop_group(headcount.TEAM, instance.pk)
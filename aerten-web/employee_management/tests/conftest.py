@@ -1,7 +1,15 @@
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 import pytest
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The database is rolled back between tests, cached responses are not
+    cache.clear()
+    yield
+    cache.clear()
+
 @pytest.fixture
 def api_client():
     return APIClient()
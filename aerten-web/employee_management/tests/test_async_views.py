@@ -0,0 +1,153 @@
+import logging
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from django.urls import include, path, resolve
+from rest_framework import status
+from model_bakery import baker
+from core.middleware import AsyncWhiteNoiseMiddleware
+from employee_management import urls
+from employee_management.exporters import EmployeeExporter
+from employee_management.async_views import AsyncEmployeeDetail, AsyncEmployeeList, urlpatterns as async_urlpatterns
+from employee_management.models import Employee, Permission, Request, Role, Team
+from employee_management.tokens import TokenObtainPairSerializer
+from employee_management.views import EmployeeViewSet
+import pytest
+
+
+class AsyncURLConf:
+    # Root URLconf with the async read views in front, as with ASYNC_READ_VIEWS=True
+    urlpatterns = [
+        path('api/v1/', include(async_urlpatterns + urls.urlpatterns)),
+    ]
+
+
+@pytest.fixture
+def async_urls(settings):
+    settings.ROOT_URLCONF = AsyncURLConf
+
+
+@pytest.fixture
+def sync_and_async(api_client, settings):
+    # The same GET through the regular viewsets and through the async views
+    def do_get(url):
+        sync_response = api_client.get(url)
+        settings.ROOT_URLCONF = AsyncURLConf
+        async_response = api_client.get(url)
+        settings.ROOT_URLCONF = "aerten.urls"
+        return (sync_response, async_response)
+    return do_get
+
+
+@pytest.fixture
+def staff_with_employees(authenticate):
+    user = authenticate(is_staff=True)
+    team = baker.make(Team)
+    for _ in range(3):
+        employee = Employee.objects.get(user=baker.make(get_user_model()))
+        employee.team.add(team)
+    return user
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+    @pytest.mark.parametrize("query", ["", "?page=2", "?pagination=cursor", "?fields=id,first_name"])
+    def test_employee_list_matches_sync(self, staff_with_employees, sync_and_async, query):
+        (sync_response, async_response) = sync_and_async(f"/api/v1/employees/{query}")
+        
+        assert async_response.status_code == sync_response.status_code
+        assert async_response.json() == sync_response.json()
+        assert async_response.get("ETag") == sync_response.get("ETag")
+        assert async_response["Allow"] == sync_response["Allow"]
+    
+    def test_employee_detail_and_me_match_sync(self, staff_with_employees, sync_and_async):
+        employee = Employee.objects.exclude(user=staff_with_employees).first()
+        
+        for url in [f"/api/v1/employees/{employee.id}/", "/api/v1/employees/me/"]:
+            (sync_response, async_response) = sync_and_async(url)
+            assert async_response.status_code == status.HTTP_200_OK
+            assert async_response.json() == sync_response.json()
+    
+    def test_roles_permissions_and_requests_match_sync(self, staff_with_employees, sync_and_async):
+        baker.make(Role, permission=baker.make(Permission, _quantity=2))
+        baker.make(Request, employee=Employee.objects.first())
+        
+        for url in ["/api/v1/roles/", "/api/v1/permissions/", "/api/v1/requests/?status=Pending", "/api/v1/requests/?queue=true"]:
+            (sync_response, async_response) = sync_and_async(url)
+            assert async_response.status_code == status.HTTP_200_OK
+            assert async_response.json() == sync_response.json()
+    
+    def test_unchanged_list_returns_304(self, api_client, async_urls, staff_with_employees):
+        etag = api_client.get("/api/v1/employees/")["ETag"]
+        
+        response = api_client.get("/api/v1/employees/", HTTP_IF_NONE_MATCH=etag)
+        
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    
+    def test_anonymous_gets_401(self, api_client, async_urls):
+        response = api_client.get("/api/v1/employees/")
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_writes_go_to_the_viewset(self, api_client, async_urls, authenticate):
+        authenticate(is_staff=True)
+        
+        response = api_client.post("/api/v1/roles/", {"title": "Engineer", "description": "Builds things", "employment_type": "Full-time"})
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Role.objects.filter(title="Engineer").exists()
+    
+    def test_get_routes_resolve_to_async_views(self, async_urls):
+        assert resolve("/api/v1/employees/").func.view_class is AsyncEmployeeList
+        assert resolve("/api/v1/employees/0123456789AB/").func.view_class is AsyncEmployeeDetail
+        # Lowercase action routes still reach the viewset
+        assert resolve("/api/v1/employees/stats/").func.cls is EmployeeViewSet
+
+    def test_export_is_streamed_under_asgi(self, staff_with_employees, monkeypatch):
+        monkeypatch.setattr(EmployeeExporter, "chunk_size", 2)
+        lookups = []
+        ateam_names = EmployeeExporter.ateam_names
+        async def recording_team_names(self, employee_ids):
+            lookups.append(employee_ids)
+            return await ateam_names(self, employee_ids)
+        monkeypatch.setattr(EmployeeExporter, "ateam_names", recording_team_names)
+        token = TokenObtainPairSerializer.get_token(staff_with_employees).access_token
+        
+        async def export():
+            response = await AsyncClient().get("/api/v1/employees/export/", headers={"Authorization": f"JWT {token}"})
+            # How many chunks had been fetched when each part reached the client
+            received = [(part, len(lookups)) async for part in response.streaming_content]
+            return (response, received)
+        (response, received) = async_to_sync(export)()
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.is_async
+        # Header plus 4 employees, the first rows went out before the second chunk was read
+        assert len(received) == 5
+        assert [fetched for (_, fetched) in received] == [0, 1, 1, 2, 2]
+
+
+class TestAsyncMiddleware:
+    def test_middleware_chain_is_not_adapted_under_asgi(self, settings, caplog):
+        # With DEBUG on, Django logs every handler it has to wrap to mix sync and async middleware
+        settings.DEBUG = True
+        with caplog.at_level(logging.DEBUG, logger="django.request"):
+            ASGIHandler()
+        
+        assert not [record.getMessage() for record in caplog.records if "adapted" in record.getMessage()]
+
+    def test_static_files_are_served_under_asgi(self, settings, tmp_path):
+        (tmp_path / "app.css").write_text("body {}")
+        settings.STATIC_ROOT = str(tmp_path)
+        async def get_response(request):
+            return HttpResponse("view")
+        middleware = AsyncWhiteNoiseMiddleware(get_response)
+        
+        static = async_to_sync(middleware)(RequestFactory().get("/static/app.css"))
+        other = async_to_sync(middleware)(RequestFactory().get("/api/v1/roles/"))
+        
+        assert static.status_code == status.HTTP_200_OK
+        assert b"".join(static.streaming_content) == b"body {}"
+        assert other.content == b"view"
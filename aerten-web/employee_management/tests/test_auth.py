@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from model_bakery import baker
+from employee_management.models import Employee, Request
+import pytest
+
+
+@pytest.fixture
+def manager():
+    user = get_user_model().objects.create_user(username="manager", password="testpass123")
+    Employee.objects.filter(user=user).update(access_level="Manager")
+    return user
+
+
+@pytest.fixture
+def obtain_tokens(api_client):
+    def do_obtain_tokens(username="manager", password="testpass123"):
+        response = api_client.post("/auth/jwt/create/", {"username": username, "password": password})
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+    return do_obtain_tokens
+
+
+@pytest.fixture
+def list_requests_with(api_client):
+    def do_list_requests(access):
+        api_client.credentials(HTTP_AUTHORIZATION=f"JWT {access}")
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get("/api/v1/requests/")
+        return (response, [query["sql"] for query in queries])
+    return do_list_requests
+
+
+@pytest.mark.django_db
+class TestTokenClaims:
+    def test_access_token_carries_authorization_claims(self, manager, obtain_tokens):
+        access = AccessToken(obtain_tokens()["access"])
+        
+        assert access["employee_id"] == Employee.objects.get(user=manager).id
+        assert access["access_level"] == "Manager"
+        assert access["is_staff"] is False
+    
+    def test_current_claims_skip_user_and_employee_lookups(self, manager, obtain_tokens, list_requests_with):
+        access = obtain_tokens()["access"]
+        
+        (response, queries) = list_requests_with(access)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert not [sql for sql in queries if 'FROM "core_user"' in sql or 'FROM "employee_management_employee"' in sql]
+    
+    def test_lost_version_is_checked_against_the_rows_once(self, manager, obtain_tokens, list_requests_with):
+        access = obtain_tokens()["access"]
+        cache.clear()
+        
+        (response, queries) = list_requests_with(access)
+        (_, queries_after) = list_requests_with(access)
+        
+        assert response.status_code == status.HTTP_200_OK
+        (lookup,) = [sql for sql in queries if 'FROM "core_user"' in sql or 'FROM "employee_management_employee"' in sql]
+        assert 'LEFT OUTER JOIN "employee_management_employee"' in lookup
+        assert not [sql for sql in queries_after if 'FROM "core_user"' in sql or 'FROM "employee_management_employee"' in sql]
+    
+    def test_access_level_change_stops_trusting_old_claims(self, manager, obtain_tokens, list_requests_with):
+        access = obtain_tokens()["access"]
+        other = Employee.objects.get(user=baker.make(get_user_model()))
+        baker.make(Request, employee=other)
+        employee = Employee.objects.get(user=manager)
+        employee.access_level = "Employee"
+        employee.save()
+        
+        (response, queries) = list_requests_with(access)
+        
+        assert response.data == []
+    
+    def test_refresh_reissues_current_claims(self, api_client, manager, obtain_tokens):
+        refresh = obtain_tokens()["refresh"]
+        Employee.objects.filter(user=manager).update(access_level="Admin")
+        
+        response = api_client.post("/auth/jwt/refresh/", {"refresh": refresh})
+        
+        assert AccessToken(response.data["access"])["access_level"] == "Admin"
+    
+    def test_queryset_update_stops_trusting_old_claims_without_the_cache(self, manager, obtain_tokens, list_requests_with):
+        access = obtain_tokens()["access"]
+        baker.make(Request, employee=Employee.objects.get(user=baker.make(get_user_model())))
+        Employee.objects.filter(user=manager).update(access_level="Employee")
+        cache.clear()
+        
+        (response, queries) = list_requests_with(access)
+        
+        assert response.data == []
+    
+    def test_deactivated_user_is_rejected(self, manager, obtain_tokens, list_requests_with):
+        access = obtain_tokens()["access"]
+        manager.is_active = False
+        manager.save()
+        
+        (response, queries) = list_requests_with(access)
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_refresh_loads_the_user_once(self, api_client, manager, obtain_tokens):
+        refresh = obtain_tokens()["refresh"]
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post("/auth/jwt/refresh/", {"refresh": refresh})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) == 2  # simplejwt's active check and the claims
@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from core.db_routers import PrimaryReplicaRouter, _read_replica, reset_read_replica, set_read_replica
+from core.middleware import ReplicaRoutingMiddleware
+from employee_management.models import Employee, Role
+from employee_management.tokens import TokenObtainPairSerializer
+import pytest
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica_1"]
+    settings.REPLICA_READ_PATHS = ["/api/"]
+    settings.REPLICA_PIN_SECONDS = 10
+
+
+@pytest.fixture
+def routed_request():
+    # Run a request through the middleware and report where its reads would go
+    seen = {}
+    
+    def view(request):
+        seen["alias"] = _read_replica.get()
+        return HttpResponse(status=201 if request.method == "POST" else 200)
+    
+    middleware = ReplicaRoutingMiddleware(view)
+    factory = RequestFactory()
+    
+    def do_request(method, path, token="JWT a"):
+        headers = {"HTTP_AUTHORIZATION": token} if token else {}
+        middleware(getattr(factory, method)(path, **headers))
+        return seen["alias"]
+    return do_request
+
+
+class TestPrimaryReplicaRouter:
+    def test_reads_follow_the_request_replica(self):
+        router = PrimaryReplicaRouter()
+        assert router.db_for_read(Employee) == "default"
+        
+        token = set_read_replica("replica_1")
+        try:
+            assert router.db_for_read(Employee) == "replica_1"
+            assert router.db_for_write(Employee) == "default"
+        finally:
+            reset_read_replica(token)
+    
+    @pytest.mark.django_db
+    def test_transactions_read_from_the_primary(self):
+        token = set_read_replica("replica_1")
+        try:
+            with transaction.atomic():
+                assert PrimaryReplicaRouter().db_for_read(Employee) == "default"
+        finally:
+            reset_read_replica(token)
+    
+    def test_migrations_only_run_on_the_primary(self):
+        router = PrimaryReplicaRouter()
+        
+        assert router.allow_migrate("default", "employee_management")
+        assert not router.allow_migrate("replica_1", "employee_management")
+
+
+@pytest.mark.usefixtures("replicas")
+class TestReplicaRoutingMiddleware:
+    def test_safe_api_reads_use_a_replica(self, routed_request):
+        assert routed_request("get", "/api/v1/employees/") == "replica_1"
+    
+    def test_writes_and_non_api_paths_use_the_primary(self, routed_request):
+        assert routed_request("post", "/api/v1/requests/") is None
+        assert routed_request("get", "/admin/", token=None) is None
+    
+    def test_client_reads_its_own_writes_from_the_primary(self, routed_request):
+        routed_request("put", "/api/v1/employees/me/")
+        
+        assert routed_request("get", "/api/v1/employees/me/") is None
+        # Other clients are not pinned
+        assert routed_request("get", "/api/v1/employees/me/", token="JWT b") == "replica_1"
+    
+    def test_nothing_is_routed_without_replicas(self, settings, routed_request):
+        settings.DATABASE_REPLICAS = []
+        
+        assert routed_request("get", "/api/v1/employees/") is None
+
+
+@pytest.mark.django_db(transaction=True, databases={"default", "replica"})
+class TestReplicaQueries:
+    # "replica" mirrors the test database (aerten.test_settings), the writes are committed so both connections see them
+    @pytest.fixture(autouse=True)
+    def route_to_the_test_replica(self, settings):
+        settings.DATABASE_REPLICAS = ["replica"]
+    
+    @pytest.fixture
+    def admin_client(self, api_client):
+        admin = get_user_model().objects.create_user(username="admin", password="x", is_staff=True)
+        token = TokenObtainPairSerializer.get_token(admin).access_token
+        api_client.credentials(HTTP_AUTHORIZATION=f"JWT {token}")
+        return api_client
+    
+    @pytest.fixture
+    def run_on(self):
+        # Send a request, return the SQL each connection ran for it
+        def do_run(send):
+            with CaptureQueriesContext(connections["default"]) as primary, CaptureQueriesContext(connections["replica"]) as replica:
+                response = send()
+            assert response.status_code < 400
+            return ([query["sql"] for query in primary], [query["sql"] for query in replica])
+        return do_run
+    
+    def test_api_reads_run_on_the_replica(self, admin_client, run_on):
+        baker.make(Role, title="Engineer")
+        
+        (primary, replica) = run_on(lambda: admin_client.get("/api/v1/roles/"))
+        
+        assert primary == []
+        assert [sql for sql in replica if 'FROM "employee_management_role"' in sql]
+    
+    def test_writes_and_the_reads_after_them_stay_on_the_primary(self, admin_client, run_on):
+        role = baker.make(Role, title="Engineer")
+        
+        (primary, replica) = run_on(lambda: admin_client.patch(f"/api/v1/roles/{role.id}/", {"title": "Lead"}))
+        
+        assert [sql for sql in primary if sql.startswith('UPDATE "employee_management_role"')]
+        assert replica == []
+        
+        (primary, replica) = run_on(lambda: admin_client.get("/api/v1/roles/"))
+        
+        assert [sql for sql in primary if 'FROM "employee_management_role"' in sql]
+        assert replica == []
@@ -2,9 +2,17 @@
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from model_bakery import baker
-from employee_management.models import Employee, Role, Team
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from employee_management.models import Employee, Role, Team, Education, Address
 import pytest
 import logging
+import importlib
+import json
+from base64 import urlsafe_b64encode
+from types import SimpleNamespace
+from django.apps import apps
 
 
 # Fixtures for EmployeeViewSet
@@ -26,6 +34,34 @@ def delete_employee(api_client):
         return api_client.delete(f'/api/v1/employees/{id}/')
     return do_delete_employee
 
+def count_queries(do_request):
+    # The test client resets the query log on every request, so count before the next one
+    with CaptureQueriesContext(connection) as queries:
+        response = do_request()
+    return (response, len(queries))
+
+@pytest.fixture
+def list_employees(api_client):
+    def do_list_employees():
+        return api_client.get('/api/v1/employees/')
+    return do_list_employees
+
+@pytest.fixture
+def make_employees():
+    def do_make_employees(quantity):
+        User = get_user_model()
+        users = baker.make(User, _quantity=quantity)
+        team = baker.make(Team)
+        employees = list(Employee.objects.filter(user__in=users))
+        for employee in employees:
+            employee.role = baker.make(Role)
+            employee.save()
+            employee.team.add(team)
+            baker.make(Education, employee=employee, _quantity=2)
+            baker.make(Address, employee=employee)
+        return employees
+    return do_make_employees
+
 @pytest.fixture
 def retrieve_employee(api_client):
     def do_retrieve_employee(id):
@@ -61,6 +97,182 @@ def assign_role(api_client):
 
 
 
+@pytest.mark.django_db
+class TestListEmployees:
+    def test_if_user_is_authenticated_returns_200(self, authenticate, list_employees, make_employees):
+        authenticate(is_staff=False)
+        make_employees(3)
+        
+        response = list_employees()
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 4
+        
+    def test_query_count_does_not_grow_with_rows(self, authenticate, list_employees, make_employees):
+        authenticate(is_staff=False)
+        make_employees(1)
+        (_, few_rows) = count_queries(list_employees)
+        
+        make_employees(8)
+        (response, many_rows) = count_queries(list_employees)
+        
+        assert len(response.data["results"]) == 10
+        assert many_rows == few_rows
+    
+    def test_if_none_match_returns_304_until_the_list_changes(self, authenticate, api_client, list_employees, make_employees):
+        authenticate(is_staff=False)
+        (employee, *_) = make_employees(2)
+        etag = list_employees()["ETag"]
+        
+        (not_modified, queries) = count_queries(lambda: api_client.get('/api/v1/employees/', HTTP_IF_NONE_MATCH=etag))
+        employee.user.first_name = "Renamed"
+        employee.user.save()
+        modified = api_client.get('/api/v1/employees/', HTTP_IF_NONE_MATCH=etag)
+        
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert queries == 1  # Only the change-marker aggregate
+        assert modified.status_code == status.HTTP_200_OK
+
+    def test_cursor_pages_skip_the_change_marker_aggregate(self, authenticate, api_client, make_employees):
+        authenticate(is_staff=False)
+        make_employees(3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get('/api/v1/employees/?pagination=cursor')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "ETag" not in response
+        assert not [query["sql"] for query in queries if "MAX(" in query["sql"]]
+
+    def test_fields_trims_output_and_queries(self, authenticate, api_client, make_employees):
+        authenticate(is_staff=False)
+        make_employees(3)
+        (_, full) = count_queries(lambda: api_client.get('/api/v1/employees/'))
+        (response, trimmed) = count_queries(lambda: api_client.get('/api/v1/employees/?fields=id,first_name,last_name,role,team'))
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data["results"][0]) == {"id", "first_name", "last_name", "role", "team"}
+        assert trimmed < full
+    
+    def test_expand_adds_nested_fields_to_a_trimmed_request(self, authenticate, api_client, make_employees):
+        authenticate(is_staff=False)
+        make_employees(2)
+        
+        response = api_client.get('/api/v1/employees/?fields=id&expand=educations,address,unknown')
+        
+        assert set(response.data["results"][0]) == {"id", "educations", "address"}
+    
+    def test_cursor_pagination_walks_every_row_once(self, authenticate, api_client):
+        authenticate(is_staff=False)
+        User = get_user_model()
+        for user in baker.make(User, _quantity=24):
+            # Shared names force the id tiebreaker to be used
+            user.first_name = "Ada" if user.id % 2 else "Grace"
+            user.save()
+        
+        seen = []
+        url = '/api/v1/employees/?pagination=cursor'
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert "count" not in response.data
+            seen += [employee["id"] for employee in response.data["results"]]
+            url = response.data["next"]
+        
+        assert len(seen) == 25
+        assert len(set(seen)) == 25
+        expected = Employee.objects.order_by('user__first_name', 'user__last_name', 'user_id').values_list('id', flat=True)
+        assert seen == list(expected)
+    
+    def test_cursor_pagination_previous_link_returns_the_previous_page(self, authenticate, api_client):
+        authenticate(is_staff=False)
+        baker.make(get_user_model(), _quantity=24)
+        
+        first = api_client.get('/api/v1/employees/?pagination=cursor')
+        second = api_client.get(first.data["next"])
+        back = api_client.get(second.data["previous"])
+        
+        assert first.data["previous"] is None
+        assert back.data["results"] == first.data["results"]
+    
+    def test_cursor_pagination_honours_search(self, authenticate, api_client):
+        authenticate(is_staff=False)
+        baker.make(get_user_model(), first_name="Zelda", _quantity=12)
+        
+        first = api_client.get('/api/v1/employees/?pagination=cursor&search=Zelda')
+        second = api_client.get(first.data["next"])
+        
+        assert len(first.data["results"]) == 10
+        assert len(second.data["results"]) == 2
+        assert second.data["next"] is None
+
+    @pytest.mark.parametrize("position", [[{}, [], "x"], ["Ada", "Lovelace", "x"], ["Ada", "Lovelace", None], "x"])
+    def test_crafted_cursor_returns_404(self, authenticate, api_client, position):
+        authenticate(is_staff=False)
+        cursor = urlsafe_b64encode(json.dumps({"p": position}).encode()).decode()
+        
+        response = api_client.get(f'/api/v1/employees/?pagination=cursor&cursor={cursor}')
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.data["detail"] == "Invalid cursor"
+        
+
+@pytest.mark.django_db
+class TestSearchEmployees:
+    def test_search_matches_first_and_last_name(self, authenticate, api_client):
+        authenticate(is_staff=False)
+        baker.make(get_user_model(), first_name="Ada", last_name="Lovelace")
+        baker.make(get_user_model(), first_name="Grace", last_name="Hopper")
+        
+        response = api_client.get('/api/v1/employees/?search=lovelace')
+        
+        assert [employee["first_name"] for employee in response.data["results"]] == ["Ada"]
+    
+    def test_search_document_follows_user_role_and_teams(self):
+        user = baker.make(get_user_model(), first_name="Ada", last_name="Lovelace", email="ada@example.com")
+        employee = Employee.objects.get(user=user)
+        role = baker.make(Role, title="Engineer")
+        team = baker.make(Team, name="Platform")
+        
+        employee.role = role
+        employee.save()
+        employee.team.add(team)
+        role.title = "Staff Engineer"
+        role.save()
+        
+        employee.refresh_from_db()
+        assert employee.search_document == "ada lovelace ada@example.com staff engineer platform"
+        
+        team.delete()
+        employee.refresh_from_db()
+        assert employee.search_document == "ada lovelace ada@example.com staff engineer"
+    
+    def test_saves_of_other_fields_leave_the_search_document_alone(self):
+        user = baker.make(get_user_model(), first_name="Ada")
+        employee = Employee.objects.get(user=user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            user.save(update_fields=["last_login"])
+            employee.phone = "0200000000"
+            employee.save()
+        
+        # The employee's own UPDATE writes every column, nothing else touches the document
+        assert len([query["sql"] for query in queries if "search_document" in query["sql"]]) == 1
+        assert not [query["sql"] for query in queries if 'FROM "employee_management_employee_team"' in query["sql"]]
+    
+    def test_migration_backfills_search_documents_in_batches(self):
+        user = baker.make(get_user_model(), first_name="Ada", last_name="Lovelace", email="ada@example.com")
+        baker.make(get_user_model(), _quantity=2)
+        Employee.objects.update(search_document="")
+        migration = importlib.import_module("employee_management.migrations.0030_employee_search_document")
+        
+        with CaptureQueriesContext(connection) as queries:
+            migration.backfill_search_documents(apps, SimpleNamespace(connection=connection))
+        
+        assert Employee.objects.get(user=user).search_document == "ada lovelace ada@example.com"
+        assert len([query["sql"] for query in queries if query["sql"].startswith("UPDATE")]) == 1
+        
+
 @pytest.mark.django_db
 class TestRetrieveEmployee:
     def test_if_employee_exists_returns_200(self, retrieve_employee, authenticate):
@@ -77,6 +289,32 @@ class TestRetrieveEmployee:
         assert response.data["id"] == employee.id
         assert response.data["user_id"] == employee.user.id
     
+    def test_query_count_does_not_depend_on_related_rows(self, retrieve_employee, authenticate, make_employees):
+        authenticate(is_staff=False)
+        (employee,) = make_employees(1)
+        (_, few_rows) = count_queries(lambda: retrieve_employee(employee.id))
+        
+        baker.make(Education, employee=employee, _quantity=5)
+        employee.team.add(*baker.make(Team, _quantity=5))
+        (response, many_rows) = count_queries(lambda: retrieve_employee(employee.id))
+        
+        assert len(response.data["educations"]) == 7
+        assert many_rows == few_rows
+    
+    def test_if_none_match_returns_304_until_the_employee_changes(self, api_client, retrieve_employee, authenticate, make_employees):
+        authenticate(is_staff=False)
+        (employee,) = make_employees(1)
+        response = retrieve_employee(employee.id)
+        etag = response["ETag"]
+        
+        not_modified = api_client.get(f'/api/v1/employees/{employee.id}/', HTTP_IF_NONE_MATCH=etag)
+        baker.make(Education, employee=employee)
+        modified = api_client.get(f'/api/v1/employees/{employee.id}/', HTTP_IF_NONE_MATCH=etag)
+        
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert modified.status_code == status.HTTP_200_OK
+        assert modified["ETag"] != etag
+    
     def test_if_employee_does_not_exists_return_404(self, retrieve_employee, authenticate):
         
         user = authenticate(is_staff=False)
@@ -132,6 +370,18 @@ class TestUpdateEmployee:
         employee.refresh_from_db()
         assert team in employee.team.all()
     
+    def test_fields_param_does_not_drop_writable_fields(self, authenticate, api_client):
+        user = authenticate(is_staff=True)
+        team = baker.make(Team)
+        employee = Employee.objects.get(user=user)
+        
+        response = api_client.patch(f'/api/v1/employees/{employee.id}/?fields=id', {"gender": "F", "team": [team.id]})
+        
+        assert response.status_code == status.HTTP_200_OK
+        employee.refresh_from_db()
+        assert employee.gender == "F"
+        assert team in employee.team.all()
+    
     def test_if_employee_does_not_exist_returns_404(self, authenticate, update_employee):
         
         authenticate(is_staff=True)
@@ -143,6 +393,163 @@ class TestUpdateEmployee:
         assert response.status_code == status.HTTP_404_NOT_FOUND
         
 
+@pytest.mark.django_db
+class TestAssignRole:
+    def test_if_user_is_not_admin_returns_403(self, authenticate, assign_role):
+        authenticate(is_staff=False)
+        role = baker.make(Role)
+        
+        response = assign_role({"role_id": role.id, "employee_ids": ["X"]})
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_bulk_assign_reports_missing_ids(self, authenticate, api_client, make_employees):
+        authenticate(is_staff=True)
+        employees = make_employees(3)
+        role = baker.make(Role)
+        ids = [employee.id for employee in employees]
+        
+        response = api_client.post('/api/v1/employees/assign_role/', {"role_id": role.id, "employee_ids": ids + ["MISSING"]}, format="json")
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["updated"] == ids
+        assert response.data["missing"] == ["MISSING"]
+        assert Employee.objects.filter(role=role).count() == 3
+    
+    def test_bulk_assign_query_count_does_not_grow_with_ids(self, authenticate, api_client):
+        authenticate(is_staff=True)
+        baker.make(get_user_model(), _quantity=20)
+        ids = list(Employee.objects.values_list('id', flat=True))
+        role = baker.make(Role)
+        
+        (_, few_ids) = count_queries(lambda: api_client.post('/api/v1/employees/assign_role/', {"role_id": role.id, "employee_ids": ids[:2]}, format="json"))
+        (_, many_ids) = count_queries(lambda: api_client.post('/api/v1/employees/assign_role/', {"role_id": role.id, "employee_ids": ids}, format="json"))
+        
+        assert many_ids == few_ids
+    
+    def test_single_assign_returns_200(self, authenticate, assign_role):
+        user = authenticate(is_staff=True)
+        employee = Employee.objects.get(user=user)
+        role = baker.make(Role)
+        
+        response = assign_role({"role_id": role.id, "employee_id": employee.id})
+        
+        assert response.status_code == status.HTTP_200_OK
+        employee.refresh_from_db()
+        assert employee.role == role
+    
+    def test_bulk_team_add_and_remove(self, authenticate, api_client, make_employees):
+        authenticate(is_staff=True)
+        ids = [employee.id for employee in make_employees(3)]
+        team = baker.make(Team)
+        
+        added = api_client.post('/api/v1/employees/assign_team/', {"team_id": team.id, "employee_ids": ids + ["MISSING"]}, format="json")
+        added_again = api_client.post('/api/v1/employees/assign_team/', {"team_id": team.id, "employee_ids": ids}, format="json")
+        assert added.data["missing"] == ["MISSING"]
+        assert added_again.status_code == status.HTTP_200_OK
+        assert Employee.objects.filter(team=team).count() == 3
+        
+        removed = api_client.post('/api/v1/employees/assign_team/', {"team_id": team.id, "employee_ids": ids[:2], "action": "remove"}, format="json")
+        assert removed.data["updated"] == ids[:2]
+        assert set(Employee.objects.filter(team=team).values_list('id', flat=True)) == set(ids[2:])
+
+
+@pytest.mark.django_db
+class TestImportEmployees:
+    def upload(self, api_client, name, content):
+        file = SimpleUploadedFile(name, content.encode("utf-8"))
+        return api_client.post('/api/v1/employees/import/', {"file": file}, format="multipart")
+    
+    def test_if_user_is_not_admin_returns_403(self, authenticate, api_client):
+        authenticate(is_staff=False)
+        
+        response = self.upload(api_client, "people.csv", "username,email\n")
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_csv_rows_are_created_and_bad_rows_reported(self, authenticate, api_client):
+        authenticate(is_staff=True)
+        role = baker.make(Role, title="Engineer")
+        team = baker.make(Team, name="Platform")
+        content = (
+            "username,email,first_name,last_name,gender,role,teams\n"
+            "ada,ada@example.com,Ada,Lovelace,F,engineer,Platform\n"
+            "grace,not-an-email,Grace,Hopper,F,,\n"
+            "alan,alan@example.com,Alan,Turing,M,Unknown,\n"
+            "ada,ada2@example.com,Ada,Again,F,,\n"
+            "linus,linus@example.com,Linus,,M,,\n"
+        )
+        
+        response = self.upload(api_client, "people.csv", content)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["created"] == 2
+        assert [error["line"] for error in response.data["errors"]] == [3, 4, 5]
+        ada = Employee.objects.get(user__username="ada")
+        assert ada.role == role
+        assert list(ada.team.all()) == [team]
+        assert ada.search_document == "ada lovelace ada@example.com engineer platform"
+        assert not ada.user.has_usable_password()
+    
+    def test_ndjson_rows_are_created(self, authenticate, api_client):
+        authenticate(is_staff=True)
+        content = (
+            '{"username": "ada", "email": "ada@example.com", "password": "s3cret-pass"}\n'
+            'not json\n'
+        )
+        
+        response = self.upload(api_client, "people.ndjson", content)
+        
+        assert response.data["created"] == 1
+        assert response.data["errors"][0]["line"] == 2
+        assert Employee.objects.get(user__username="ada").user.check_password("s3cret-pass")
+
+
+@pytest.mark.django_db
+class TestExportEmployees:
+    def test_if_user_is_not_admin_returns_403(self, authenticate, api_client):
+        authenticate(is_staff=False)
+        
+        response = api_client.get('/api/v1/employees/export/')
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_csv_export_honours_filters(self, authenticate, api_client):
+        authenticate(is_staff=True)
+        role = baker.make(Role, title="Engineer")
+        teams = [baker.make(Team, name="Platform"), baker.make(Team, name="Data")]
+        user = baker.make(get_user_model(), first_name="Ada", last_name="Lovelace", email="ada@example.com")
+        employee = Employee.objects.get(user=user)
+        employee.role = role
+        employee.save()
+        employee.team.add(*teams)
+        
+        response = api_client.get(f'/api/v1/employees/export/?role={role.id}')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "text/csv"
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert lines[0].startswith("id,first_name,last_name,email")
+        assert lines[1:] == [f"{employee.id},Ada,Lovelace,ada@example.com,,,{employee.join_date},,Active,Employee,Engineer,Data;Platform"]
+    
+    def test_ndjson_export_streams_one_object_per_line(self, authenticate, api_client):
+        authenticate(is_staff=True)
+        baker.make(get_user_model(), _quantity=4)
+        
+        response = api_client.get('/api/v1/employees/export/?file_format=ndjson')
+        
+        records = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        assert len(records) == 5
+        assert set(records[0]) >= {"id", "email", "role", "teams"}
+    
+    def test_unknown_format_returns_400(self, authenticate, api_client):
+        authenticate(is_staff=True)
+        
+        response = api_client.get('/api/v1/employees/export/?file_format=xml')
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.django_db
 class TestDeletePermission:
     def test_if_user_is_anonymous_returns_401(self, delete_employee):
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from model_bakery import baker
+from django.db import connection
+from django.db.models.signals import pre_save
+from django.test.utils import CaptureQueriesContext
+from employee_management import headcount
+from employee_management.bulk import bulk_assign_role, bulk_change_team
+from employee_management.models import Employee, HeadcountSummary, Role, Team
+import pytest
+
+
+def make_employee(**kwargs):
+    employee = Employee.objects.get(user=baker.make(get_user_model()))
+    for (field, value) in kwargs.items():
+        setattr(employee, field, value)
+    employee.save()
+    return employee
+
+
+def stored_counts():
+    return {(row.dimension, row.value): row.count for row in HeadcountSummary.objects.exclude(count=0)}
+
+
+def assert_matches_rebuild():
+    incremental = stored_counts()
+    headcount.rebuild()
+    assert incremental == stored_counts()
+
+
+@pytest.mark.django_db
+class TestIncrementalHeadcount:
+    def test_saves_and_memberships_keep_the_summary_exact(self):
+        (engineering, design) = baker.make(Team, _quantity=2)
+        role = baker.make(Role)
+        alice = make_employee(gender="F", role=role)
+        bob = make_employee(gender="M")
+        alice.team.add(engineering, design)
+        design.employee_set.add(bob)
+        bob.gender = "F"
+        bob.access_level = "Manager"
+        bob.save()
+        alice.team.remove(design, engineering, baker.make(Team))
+        design.employee_set.clear()
+        
+        assert_matches_rebuild()
+    
+    def test_bulk_paths_keep_the_summary_exact(self):
+        team = baker.make(Team)
+        role = baker.make(Role)
+        employees = [make_employee(gender="M") for _ in range(3)]
+        ids = [employee.id for employee in employees]
+        employees[0].team.add(team)
+        
+        bulk_assign_role(role, ids)
+        bulk_change_team(team, ids, 'add')
+        bulk_change_team(team, ids[:1], 'remove')
+        
+        assert_matches_rebuild()
+    
+    def test_deleting_roles_teams_and_users_keeps_the_summary_exact(self):
+        (team, other_team) = baker.make(Team, _quantity=2)
+        role = baker.make(Role)
+        alice = make_employee(role=role)
+        bob = make_employee(role=role)
+        alice.team.add(team, other_team)
+        
+        role.delete()
+        team.delete()
+        alice.user.delete()
+        
+        assert_matches_rebuild()
+        assert stored_counts()[("role", "")] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentSaves:
+    def test_previous_state_is_read_locked_inside_the_save(self):
+        employee = make_employee(gender="F")
+        in_transaction = []
+        def record(sender, **kwargs):
+            in_transaction.append(connection.in_atomic_block)
+        pre_save.connect(record, sender=Employee)
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                employee.gender = "M"
+                employee.save()
+        finally:
+            pre_save.disconnect(record, sender=Employee)
+        
+        assert in_transaction == [True]
+        if connection.features.has_select_for_update:
+            assert [query["sql"] for query in queries if query["sql"].endswith("FOR UPDATE")]
+        assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+class TestStats:
+    def test_manager_gets_every_grouping(self, api_client, authenticate):
+        user = authenticate()
+        Employee.objects.filter(user=user).update(access_level="Manager")
+        team = baker.make(Team, name="Engineering")
+        make_employee(gender="F").team.add(team)
+        headcount.rebuild()
+        
+        response = api_client.get("/api/v1/employees/stats/")
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total"] == 2
+        assert response.data["team"] == [{"value": team.id, "count": 1, "name": "Engineering"}]
+        assert {"value": "F", "count": 1} in response.data["gender"]
+        assert {"value": "Manager", "count": 1} in response.data["access_level"]
+    
+    def test_employee_gets_403(self, api_client, authenticate):
+        authenticate()
+        
+        response = api_client.get("/api/v1/employees/stats/")
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
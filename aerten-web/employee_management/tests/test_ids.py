@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from model_bakery import baker
+from employee_management import models
+from employee_management.ids import ALPHABET, TimeOrderedIdGenerator
+from employee_management.models import Employee
+import pytest
+
+
+class TestTimeOrderedIds:
+    def test_ids_are_12_crockford_chars_and_increase(self):
+        generate = TimeOrderedIdGenerator()
+        
+        ids = [generate() for _ in range(1000)]
+        
+        assert all(len(id) == 12 and set(id) <= set(ALPHABET) for id in ids)
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+    
+    def test_ids_keep_increasing_when_the_clock_goes_back(self):
+        times = iter([1000.0, 1000.0, 999.0])
+        generate = TimeOrderedIdGenerator(clock=lambda: next(times))
+        
+        ids = [generate() for _ in range(3)]
+        
+        assert ids[0] < ids[1] < ids[2]
+
+
+@pytest.mark.django_db
+class TestEmployeeIdCollision:
+    def test_colliding_id_is_regenerated_instead_of_overwriting(self, monkeypatch):
+        existing = Employee.objects.get(user=baker.make(get_user_model()))
+        ids = iter([existing.id, "0000000000ZZ"])
+        monkeypatch.setattr(models, "generate_employee_id", lambda: next(ids))
+        
+        # The user signal creates the profile through Employee.save
+        user = baker.make(get_user_model())
+        
+        assert Employee.objects.get(user=user).id == "0000000000ZZ"
+        assert Employee.objects.get(pk=existing.pk).user_id == existing.user_id
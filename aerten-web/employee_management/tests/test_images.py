@@ -0,0 +1,58 @@
+import io
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from rest_framework import status
+from employee_management.models import Employee, EmployeeImage
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    # Build inline on commit so the test can see the result
+    settings.IMAGE_DERIVATIVE_WORKERS = 0
+
+
+def make_jpeg(size=(400, 300)):
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"  # Make
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile("avatar.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+@pytest.fixture
+def upload_image(api_client, django_capture_on_commit_callbacks):
+    def do_upload_image():
+        with django_capture_on_commit_callbacks(execute=True):
+            return api_client.post("/api/v1/employee-image/", {"image": make_jpeg()}, format="multipart")
+    return do_upload_image
+
+
+@pytest.mark.django_db
+class TestImageDerivatives:
+    def test_upload_builds_square_webp_and_jpeg_thumbnails(self, authenticate, upload_image):
+        user = authenticate()
+        
+        response = upload_image()
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        image = EmployeeImage.objects.get(employee__user=user)
+        assert set(image.derivatives) == {"small", "medium"}
+        with image.image.storage.open(image.derivatives["small"]["webp"]) as file:
+            thumbnail = Image.open(file)
+            assert (thumbnail.format, thumbnail.size) == ("WEBP", (64, 64))
+        with image.image.storage.open(image.derivatives["medium"]["jpeg"]) as file:
+            thumbnail = Image.open(file)
+            assert (thumbnail.format, thumbnail.size) == ("JPEG", (256, 256))
+            assert not thumbnail.getexif()
+    
+    def test_thumbnails_are_listed_with_the_employee(self, api_client, authenticate, upload_image):
+        user = authenticate()
+        upload_image()
+        
+        response = api_client.get(f"/api/v1/employees/{Employee.objects.get(user=user).id}/")
+        
+        thumbnails = response.data["image"]["thumbnails"]
+        assert thumbnails["small"]["webp"].startswith("http://testserver/media/")
+        assert thumbnails["small"]["jpeg"].endswith(".jpeg")
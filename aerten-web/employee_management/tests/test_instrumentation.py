@@ -0,0 +1,116 @@
+import json
+import logging
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from core.instrumentation import current_profile, normalize_sql
+from core.middleware import InstrumentationMiddleware
+from employee_management.models import Role
+from model_bakery import baker
+import pytest
+
+
+def logged(caplog, event):
+    return [json.loads(record.getMessage().split(" ", 1)[1]) for record in caplog.records if record.getMessage().startswith(event)]
+
+
+def timing(response):
+    return dict(metric.split(";", 1) for metric in response["Server-Timing"].split(", "))
+
+
+@pytest.fixture
+def server_timing(settings):
+    settings.SERVER_TIMING = True
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+    def test_api_responses_report_queries_and_phases(self, api_client, authenticate, server_timing):
+        authenticate(is_staff=True)
+        baker.make(Role, _quantity=3)
+
+        response = api_client.get("/api/v1/roles/")
+
+        assert response.status_code == 200
+        metrics = timing(response)
+        assert {"db", "cache", "auth", "total"} <= metrics.keys()
+        assert "queries" in metrics["db"] and not metrics["db"].endswith('desc="0 queries"')
+
+    def test_header_can_be_turned_off(self, api_client, authenticate, settings):
+        settings.SERVER_TIMING = False
+        authenticate(is_staff=True)
+
+        response = api_client.get("/api/v1/roles/")
+
+        assert "Server-Timing" not in response
+
+    def test_slow_requests_are_logged_with_their_view(self, api_client, authenticate, settings, caplog):
+        settings.SLOW_REQUEST_MS = 0
+        authenticate(is_staff=True)
+
+        with caplog.at_level(logging.WARNING, logger="aerten.requests"):
+            api_client.get("/api/v1/roles/")
+
+        [line] = logged(caplog, "slow_request")
+        assert line["view"] == "RoleViewSet.list"
+        assert line["status"] == 200
+        assert line["queries"] > 0
+        assert set(line["phases_ms"]) == {"auth", "queryset", "serialize", "render"}
+
+    def test_fast_requests_are_not_logged(self, api_client, authenticate, settings, caplog):
+        settings.SLOW_REQUEST_MS = 60_000
+        authenticate(is_staff=True)
+
+        with caplog.at_level(logging.WARNING, logger="aerten.requests"):
+            api_client.get("/api/v1/roles/")
+
+        assert logged(caplog, "slow_request") == []
+
+
+@pytest.mark.django_db
+class TestRepeatedQueries:
+    def test_same_statement_in_a_loop_is_flagged(self, settings, caplog):
+        settings.REPEATED_QUERY_THRESHOLD = 3
+        roles = baker.make(Role, _quantity=4)
+
+        def view(request):
+            for role in roles:
+                Role.objects.get(pk=role.pk)
+            return HttpResponse()
+
+        with caplog.at_level(logging.WARNING, logger="aerten.requests"):
+            InstrumentationMiddleware(view)(RequestFactory().get("/api/v1/roles/"))
+
+        [line] = logged(caplog, "repeated_query")
+        assert line["count"] == 4
+        assert "employee_management_role" in line["sql"]
+
+    def test_in_lists_of_any_length_are_the_same_statement(self):
+        assert normalize_sql("SELECT 1 FROM t WHERE id IN (%s, %s)") == normalize_sql("SELECT 1 FROM t WHERE id IN (%s)")
+        assert normalize_sql("SELECT * FROM t LIMIT 21") == "SELECT * FROM t LIMIT ?"
+
+
+class TestCacheOperations:
+    @pytest.fixture(autouse=True)
+    def instrumented_cache(self, settings):
+        settings.CACHES = {"default": {"BACKEND": "core.cache_backends.InstrumentedLocMemCache"}}
+
+    def test_cache_calls_are_counted_once(self, server_timing):
+        seen = {}
+
+        def view(request):
+            cache.set("a", 1)
+            cache.get("a")
+            cache.get_or_set("b", 2)  # Calls get() and add() itself
+            seen["ops"] = current_profile().cache_ops
+            return HttpResponse()
+
+        response = InstrumentationMiddleware(view)(RequestFactory().get("/"))
+
+        assert seen["ops"] == 3
+        assert timing(response)["cache"].endswith('desc="3 ops"')
+
+    def test_nothing_is_recorded_outside_a_request(self):
+        cache.set("a", 1)
+
+        assert current_profile() is None
@@ -0,0 +1,92 @@
+import re
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+import pytest
+
+
+AGGREGATE = re.compile(r"\b(COUNT|MAX|MIN|SUM|AVG)\(", re.IGNORECASE)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    def test_latency_and_queries_are_labelled_by_viewset_action(self, api_client, authenticate):
+        authenticate(is_staff=True)
+        labels = {"viewset": "RoleViewSet", "action": "list"}
+        before = sample("aerten_request_duration_seconds_count", method="GET", status="200", **labels)
+        queries_before = sample("aerten_request_db_queries_sum", **labels)
+
+        api_client.get("/api/v1/roles/")
+
+        assert sample("aerten_request_duration_seconds_count", method="GET", status="200", **labels) == before + 1
+        assert sample("aerten_request_db_queries_sum", **labels) > queries_before
+
+    def test_page_numbers_cost_a_count_query_and_cursors_do_not(self, api_client, authenticate):
+        authenticate(is_staff=True)
+        labels = {"viewset": "EmployeeViewSet", "action": "list"}
+        pages = sample("aerten_paginated_responses_total", paginator="EmployeePagination", **labels)
+        cursor_pages = sample("aerten_paginated_responses_total", paginator="EmployeeKeysetPagination", **labels)
+        counts = sample("aerten_db_count_queries_total", **labels)
+
+        api_client.get("/api/v1/employees/")
+        assert sample("aerten_paginated_responses_total", paginator="EmployeePagination", **labels) == pages + 1
+        assert sample("aerten_db_count_queries_total", **labels) == counts + 1
+
+        with CaptureQueriesContext(connection) as queries:
+            api_client.get("/api/v1/employees/?pagination=cursor")
+        assert sample("aerten_paginated_responses_total", paginator="EmployeeKeysetPagination", **labels) == cursor_pages + 1
+        assert sample("aerten_db_count_queries_total", **labels) == counts + 1
+        # Nor any other aggregate over the list, such as the MAX/COUNT behind list ETags
+        assert not [query["sql"] for query in queries if AGGREGATE.search(query["sql"])]
+
+    def test_scrape_endpoint(self, client, settings):
+        settings.METRICS_TOKEN = "secret"
+
+        response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+
+        assert response.status_code == 200
+        assert b"aerten_request_duration_seconds" in response.content
+
+    def test_scrape_endpoint_checks_the_token(self, client, settings):
+        settings.METRICS_TOKEN = "secret"
+
+        assert client.get("/metrics").status_code == 403
+        assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code == 200
+
+    def test_scrape_endpoint_without_a_token_is_closed_unless_debug(self, client, settings):
+        settings.METRICS_TOKEN = ""
+        settings.DEBUG = False
+        assert client.get("/metrics").status_code == 403
+
+        settings.DEBUG = True
+        assert client.get("/metrics").status_code == 200
+
+
+class TestCacheMetrics:
+    @pytest.fixture(autouse=True)
+    def instrumented_cache(self, settings):
+        settings.CACHES = {"default": {"BACKEND": "core.cache_backends.InstrumentedLocMemCache"}}
+
+    def test_hits_and_misses_by_key_group(self):
+        hits = sample("aerten_cache_lookups_total", group="roles", result="hit")
+        misses = sample("aerten_cache_lookups_total", group="roles", result="miss")
+        cache.set("roles:v1:/api/v1/roles/?", [])
+
+        assert cache.get("roles:v1:/api/v1/roles/?") == []
+        assert cache.get("roles:v1:/api/v1/roles/?page=2") is None
+        cache.get_many(["roles:v1:/api/v1/roles/?", "roles:v1:/api/v1/roles/?page=3"])
+
+        assert sample("aerten_cache_lookups_total", group="roles", result="hit") == hits + 2
+        assert sample("aerten_cache_lookups_total", group="roles", result="miss") == misses + 2
+
+    def test_version_counters_are_a_group_of_their_own(self):
+        before = sample("aerten_cache_lookups_total", group="roles:version", result="miss")
+
+        cache.get("roles:version")
+
+        assert sample("aerten_cache_lookups_total", group="roles:version", result="miss") == before + 1
@@ -82,6 +82,48 @@ class TestRetrievePermission:
         
         assert respose.status_code == status.HTTP_404_NOT_FOUND
 
+@pytest.mark.django_db
+class TestListPermission:
+    def test_list_is_refreshed_after_a_write(self, api_client, authenticate, update_permission):
+        permission = baker.make(Permission, name="old_name")
+        assert api_client.get('/api/v1/permissions/').data[0]["name"] == "old_name"
+        
+        authenticate(is_staff=True)
+        update_permission(permission.id, {"name": "new_name"})
+        
+        assert api_client.get('/api/v1/permissions/').data[0]["name"] == "new_name"
+    
+    def test_list_is_cached_per_query_string(self, api_client):
+        baker.make(Permission, name="alpha")
+        baker.make(Permission, name="beta")
+        
+        all_permissions = api_client.get('/api/v1/permissions/?ordering=name')
+        reversed_permissions = api_client.get('/api/v1/permissions/?ordering=-name')
+        
+        assert [p["name"] for p in all_permissions.data] == ["alpha", "beta"]
+        assert [p["name"] for p in reversed_permissions.data] == ["beta", "alpha"]
+    
+    def test_empty_list_is_served_from_cache(self, api_client, django_assert_num_queries):
+        api_client.get('/api/v1/permissions/')
+        
+        with django_assert_num_queries(0):
+            response = api_client.get('/api/v1/permissions/')
+        
+        assert response.data == []
+    
+    def test_unchanged_cached_list_returns_304_until_a_write(self, api_client, django_assert_num_queries):
+        baker.make(Permission)
+        etag = api_client.get('/api/v1/permissions/')["ETag"]
+        
+        with django_assert_num_queries(0):
+            response = api_client.get('/api/v1/permissions/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        
+        baker.make(Permission)
+        response = api_client.get('/api/v1/permissions/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 2
+
 @pytest.mark.django_db
 class TestUpdatePermission:
     def test_if_user_is_anonymous_returns_401(self, update_permission):
@@ -0,0 +1,296 @@
+from datetime import datetime
+from django.db import connection
+from django.db.models import Value
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import make_aware
+from rest_framework import status
+from rest_framework.request import Request as DRFRequest
+from rest_framework.test import APIRequestFactory
+from model_bakery import baker
+from django.contrib.auth import get_user_model
+from employee_management import bulk
+from employee_management.models import Employee, Request, Role
+from employee_management.filters import RankedOrderingFilter
+from employee_management.pagination import RequestQueuePagination
+from employee_management.views import RequestViewSet
+import pytest
+
+
+@pytest.fixture
+def list_requests(api_client):
+    def do_list_requests(query=""):
+        return api_client.get(f"/api/v1/requests/{query}")
+    return do_list_requests
+
+
+@pytest.fixture
+def make_request():
+    def do_make_request(date_requested, **kwargs):
+        if "employee" not in kwargs:
+            # The employee row comes from the user post_save signal
+            kwargs["employee"] = Employee.objects.get(user=baker.make(get_user_model()))
+        request = baker.make(Request, **kwargs)
+        # date_requested is auto_now_add, set it after the insert
+        Request.objects.filter(pk=request.pk).update(date_requested=date_requested)
+        return request
+    return do_make_request
+
+
+@pytest.mark.django_db
+class TestListRequest:
+    def test_default_ordering_is_newest_first(self, authenticate, list_requests, make_request):
+        authenticate(is_staff=True)
+        older = make_request(make_aware(datetime(2025, 1, 1)))
+        newer = make_request(make_aware(datetime(2025, 2, 1)))
+        
+        response = list_requests()
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [request["id"] for request in response.data] == [newer.id, older.id]
+    
+    def test_filter_by_date_range_includes_both_ends(self, authenticate, list_requests, make_request):
+        authenticate(is_staff=True)
+        make_request(make_aware(datetime(2024, 12, 31, 23, 59)))
+        first = make_request(make_aware(datetime(2025, 1, 1)))
+        last = make_request(make_aware(datetime(2025, 1, 31, 23, 59)))
+        make_request(make_aware(datetime(2025, 2, 1)))
+        
+        response = list_requests("?date_requested_after=2025-01-01&date_requested_before=2025-01-31")
+        
+        assert [request["id"] for request in response.data] == [last.id, first.id]
+    
+    def test_filter_by_several_statuses(self, authenticate, list_requests, make_request):
+        authenticate(is_staff=True)
+        pending = make_request(make_aware(datetime(2025, 1, 1)), status="Pending")
+        rejected = make_request(make_aware(datetime(2025, 1, 2)), status="Rejected")
+        make_request(make_aware(datetime(2025, 1, 3)), status="Approved")
+        
+        response = list_requests("?status__in=Pending,Rejected")
+        
+        assert [request["id"] for request in response.data] == [rejected.id, pending.id]
+    
+    def test_employee_only_sees_own_requests(self, authenticate, list_requests, make_request):
+        user = authenticate()
+        own = make_request(make_aware(datetime(2025, 1, 1)), employee=Employee.objects.get(user=user))
+        make_request(make_aware(datetime(2025, 1, 2)))
+        
+        response = list_requests()
+        
+        assert [request["id"] for request in response.data] == [own.id]
+
+
+@pytest.mark.django_db
+class TestSearchOrdering:
+    def ordered(self, query):
+        request = DRFRequest(APIRequestFactory().get("/api/v1/requests/", query))
+        # What RankedSearchFilter returns on PostgreSQL
+        ranked = Request.objects.annotate(search_rank=Value(1.0)).order_by("-search_rank", "pk")
+        return RankedOrderingFilter().filter_queryset(request, ranked, RequestViewSet(request=request)).query.order_by
+    
+    def test_search_keeps_the_rank_order(self):
+        assert self.ordered({"search": "holiday"}) == ("-search_rank", "pk")
+    
+    def test_explicit_ordering_wins_over_the_rank(self):
+        assert self.ordered({"search": "holiday", "ordering": "status"}) == ("status",)
+
+
+@pytest.mark.django_db
+class TestReadsDoNotCreateProfiles:
+    def test_listing_requests_without_a_profile_returns_empty(self, authenticate, list_requests):
+        user = authenticate()
+        Employee.objects.filter(user=user).delete()
+        
+        response = list_requests()
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == []
+        assert not Employee.objects.filter(user=user).exists()
+    
+    def test_me_without_a_profile_returns_404(self, api_client, authenticate):
+        user = authenticate()
+        Employee.objects.filter(user=user).delete()
+        
+        response = api_client.get("/api/v1/employees/me/")
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not Employee.objects.filter(user=user).exists()
+    
+    def test_creating_a_request_creates_the_missing_profile(self, api_client, authenticate):
+        user = authenticate()
+        Employee.objects.filter(user=user).delete()
+        
+        response = api_client.post("/api/v1/requests/", {"request_type": "Leave", "detail": "Holiday"})
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Request.objects.get(pk=response.data["id"]).employee.user == user
+
+
+@pytest.mark.django_db
+class TestDecideRequests:
+    def test_bulk_approve_reports_updated_and_skipped_ids(self, api_client, authenticate, make_request):
+        user = authenticate(is_staff=True)
+        pending = make_request(make_aware(datetime(2025, 1, 1)), status="Pending")
+        rejected = make_request(make_aware(datetime(2025, 1, 2)), status="Rejected")
+        
+        response = api_client.patch("/api/v1/requests/approve/", {"ids": [pending.id, rejected.id, 0]}, format="json")
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["updated"] == [pending.id]
+        assert response.data["skipped"] == [rejected.id, 0]
+        pending.refresh_from_db()
+        assert (pending.status, pending.approver) == ("Approved", user)
+        rejected.refresh_from_db()
+        assert (rejected.status, rejected.approver) == ("Rejected", None)
+    
+    def test_bulk_reject_sets_updated_at(self, api_client, authenticate, make_request):
+        authenticate(is_staff=True)
+        pending = make_request(make_aware(datetime(2025, 1, 1)), status="Pending")
+        Request.objects.filter(pk=pending.pk).update(updated_at=make_aware(datetime(2025, 1, 1)))
+        
+        response = api_client.patch("/api/v1/requests/reject/", {"ids": [pending.id]}, format="json")
+        
+        assert response.data["updated"] == [pending.id]
+        pending.refresh_from_db()
+        assert pending.status == "Rejected"
+        assert pending.updated_at > make_aware(datetime(2025, 1, 1))
+    
+    def test_bulk_decision_needs_ids(self, api_client, authenticate):
+        authenticate(is_staff=True)
+        
+        response = api_client.patch("/api/v1/requests/approve/", {"ids": []}, format="json")
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_employee_cannot_bulk_approve(self, api_client, authenticate, make_request):
+        authenticate()
+        pending = make_request(make_aware(datetime(2025, 1, 1)), status="Pending")
+        
+        response = api_client.patch("/api/v1/requests/approve/", {"ids": [pending.id]}, format="json")
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        pending.refresh_from_db()
+        assert pending.status == "Pending"
+    
+    def test_bulk_decision_without_update_returning(self, api_client, authenticate, make_request, monkeypatch):
+        monkeypatch.setattr(bulk, "supports_update_returning", lambda connection: False)
+        authenticate(is_staff=True)
+        pending = make_request(make_aware(datetime(2025, 1, 1)), status="Pending")
+        approved = make_request(make_aware(datetime(2025, 1, 2)), status="Approved")
+        
+        response = api_client.patch("/api/v1/requests/reject/", {"ids": [pending.id, approved.id]}, format="json")
+        
+        assert (response.data["updated"], response.data["skipped"]) == ([pending.id], [approved.id])
+        pending.refresh_from_db()
+        assert pending.status == "Rejected"
+    
+    def test_single_decision_is_one_conditional_update(self, api_client, authenticate, make_request):
+        authenticate(is_staff=True)
+        pending = make_request(make_aware(datetime(2025, 1, 1)), status="Pending")
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.patch(f"/api/v1/requests/{pending.id}/approve/")
+        
+        assert response.status_code == status.HTTP_200_OK
+        sql = [query["sql"] for query in queries]
+        assert not [statement for statement in sql if "FOR UPDATE" in statement]
+        (update,) = [statement for statement in sql if statement.startswith("UPDATE")]
+        assert len(sql) == 2  # The UPDATE and reading the row back for the response
+        assert update.endswith(""""employee_management_request"."status" = 'Pending')""")
+    
+    def test_deciding_an_unknown_request_returns_404(self, api_client, authenticate):
+        authenticate(is_staff=True)
+        
+        response = api_client.patch("/api/v1/requests/999999/approve/")
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_second_decision_on_a_request_fails(self, api_client, authenticate, make_request):
+        user = authenticate(is_staff=True)
+        pending = make_request(make_aware(datetime(2025, 1, 1)), status="Pending")
+        
+        first = api_client.patch(f"/api/v1/requests/{pending.id}/approve/")
+        second = api_client.patch(f"/api/v1/requests/{pending.id}/reject/")
+        
+        assert first.status_code == status.HTTP_200_OK
+        assert (first.data["status"], first.data["approver"]) == ("Approved", user.pk)
+        assert second.status_code == status.HTTP_400_BAD_REQUEST
+        assert second.data["detail"] == "This request is already Approved."
+        pending.refresh_from_db()
+        assert pending.status == "Approved"
+
+
+@pytest.fixture
+def queue(make_request):
+    """A manager role with a direct and an indirect report, a peer of the manager and someone outside the tree"""
+    manager = baker.make(Role, title="Manager")
+    lead = baker.make(Role, title="Lead", reports_to=manager)
+    engineer = baker.make(Role, title="Engineer", reports_to=lead)
+    other = baker.make(Role, title="Other")
+    
+    def employee_with(role):
+        employee = Employee.objects.get(user=baker.make(get_user_model()))
+        Employee.objects.filter(pk=employee.pk).update(role=role, access_level="Manager" if role == manager else "Employee")
+        return employee
+    
+    return {
+        "manager": employee_with(manager),
+        "direct": make_request(make_aware(datetime(2025, 1, 1)), employee=employee_with(lead)),
+        "indirect": make_request(make_aware(datetime(2025, 1, 2)), employee=employee_with(engineer)),
+        "peer": make_request(make_aware(datetime(2025, 1, 3)), employee=employee_with(manager)),
+        "outside": make_request(make_aware(datetime(2025, 1, 4)), employee=employee_with(other)),
+    }
+
+
+@pytest.mark.django_db
+class TestRequestQueue:
+    def test_manager_sees_requests_of_their_reports(self, authenticate, list_requests, queue):
+        authenticate(user=queue["manager"].user)
+        
+        response = list_requests("?queue=true")
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [request["id"] for request in response.data["results"]] == [queue["indirect"].id, queue["direct"].id]
+    
+    def test_queue_is_paginated_by_cursor(self, api_client, authenticate, list_requests, queue, monkeypatch):
+        authenticate(user=queue["manager"].user)
+        monkeypatch.setattr(RequestQueuePagination, "page_size", 1)
+        
+        first = list_requests("?queue=true")
+        second = api_client.get(first.data["next"])
+        
+        assert [request["id"] for request in first.data["results"]] == [queue["indirect"].id]
+        assert [request["id"] for request in second.data["results"]] == [queue["direct"].id]
+        assert second.data["next"] is None
+    
+    def test_queue_combines_with_status_filter(self, authenticate, list_requests, queue):
+        authenticate(user=queue["manager"].user)
+        Request.objects.filter(pk=queue["direct"].pk).update(status="Approved")
+        
+        response = list_requests("?queue=true&status=Pending")
+        
+        assert [request["id"] for request in response.data["results"]] == [queue["indirect"].id]
+    
+    def test_manager_without_a_role_has_an_empty_queue(self, authenticate, list_requests, queue):
+        authenticate(is_staff=True)
+        
+        response = list_requests("?queue=true")
+        
+        assert response.data["results"] == []
+    
+    def test_list_without_queue_stays_unpaginated(self, authenticate, list_requests, queue):
+        authenticate(user=queue["manager"].user)
+        
+        response = list_requests()
+        
+        assert len(response.data) == 4
+    
+    def test_list_is_paginated_by_cursor_on_request(self, api_client, authenticate, list_requests, queue, monkeypatch):
+        authenticate(user=queue["manager"].user)
+        monkeypatch.setattr(RequestQueuePagination, "page_size", 3)
+        
+        first = list_requests("?pagination=cursor")
+        second = api_client.get(first.data["next"])
+        
+        assert [request["id"] for request in first.data["results"]] == [queue[name].id for name in ("outside", "peer", "indirect")]
+        assert [request["id"] for request in second.data["results"]] == [queue["direct"].id]
+        assert second.data["next"] is None
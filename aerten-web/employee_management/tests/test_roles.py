@@ -0,0 +1,112 @@
+from rest_framework import status
+from model_bakery import baker
+from django.contrib.auth import get_user_model
+from employee_management.models import Employee, Permission, Role
+import pytest
+
+
+@pytest.fixture
+def org():
+    # ceo <- cto <- engineer, ceo <- cfo
+    ceo = baker.make(Role, title="CEO")
+    cto = baker.make(Role, title="CTO", reports_to=ceo)
+    cfo = baker.make(Role, title="CFO", reports_to=ceo)
+    engineer = baker.make(Role, title="Engineer", reports_to=cto)
+    return {"ceo": ceo, "cto": cto, "cfo": cfo, "engineer": engineer}
+
+
+@pytest.fixture
+def list_roles(api_client):
+    def do_list_roles(query=""):
+        return api_client.get(f"/api/v1/roles/{query}")
+    return do_list_roles
+
+
+@pytest.mark.django_db
+class TestListRole:
+    def test_if_roles_exist_returns_200(self, list_roles):
+        role = baker.make(Role)
+        
+        response = list_roles()
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[0]["id"] == role.id
+    
+    def test_filters_are_part_of_the_cache_key(self, list_roles):
+        engineer = baker.make(Role, title="Engineer")
+        baker.make(Role, title="Designer")
+        list_roles()
+        
+        response = list_roles("?title=Engineer")
+        
+        assert [role["id"] for role in response.data] == [engineer.id]
+    
+    def test_list_is_refreshed_when_permissions_change(self, list_roles):
+        role = baker.make(Role)
+        permission = baker.make(Permission)
+        assert list_roles().data[0]["permission"] == []
+        
+        role.permission.add(permission)
+        assert list_roles().data[0]["permission"] == [permission.id]
+        
+        permission.delete()
+        assert list_roles().data[0]["permission"] == []
+    
+    def test_list_is_refreshed_when_a_role_is_deleted(self, list_roles):
+        role = baker.make(Role)
+        assert len(list_roles().data) == 1
+        
+        role.delete()
+        
+        assert list_roles().data == []
+
+
+
+@pytest.mark.django_db
+class TestOrgChart:
+    def test_subtree_returns_nested_roles_and_employees(self, api_client, authenticate, org):
+        user = authenticate(is_staff=False)
+        employee = Employee.objects.get(user=user)
+        employee.role = org["engineer"]
+        employee.save()
+        
+        response = api_client.get(f"/api/v1/roles/{org['cto'].id}/subtree/")
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["title"] == "CTO"
+        (engineer,) = response.data["subordinates"]
+        assert engineer["title"] == "Engineer"
+        assert [person["id"] for person in engineer["employees"]] == [employee.id]
+    
+    def test_ancestors_returns_the_chain_to_the_top(self, api_client, authenticate, org):
+        authenticate()
+        
+        response = api_client.get(f"/api/v1/roles/{org['engineer'].id}/ancestors/")
+        
+        assert [(role["title"], role["depth"]) for role in response.data] == [("CTO", 1), ("CEO", 2)]
+    
+    def test_tree_is_refreshed_when_an_employee_changes_role(self, api_client, authenticate, org):
+        user = authenticate(is_staff=False)
+        (ceo,) = api_client.get("/api/v1/roles/tree/").data
+        assert [role["title"] for role in ceo["subordinates"]] == ["CFO", "CTO"]
+        assert ceo["employees"] == []
+        
+        employee = Employee.objects.get(user=user)
+        employee.role = org["ceo"]
+        employee.save()
+        (ceo,) = api_client.get("/api/v1/roles/tree/").data
+        
+        assert [person["id"] for person in ceo["employees"]] == [employee.id]
+    
+    @pytest.mark.parametrize("path", ["tree/", "{cto}/subtree/", "{cto}/ancestors/"])
+    def test_anonymous_client_gets_401(self, api_client, org, path):
+        response = api_client.get(f"/api/v1/roles/{path.format(cto=org['cto'].id)}")
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_reporting_to_a_subordinate_returns_400(self, api_client, authenticate, org):
+        authenticate(is_staff=True)
+        
+        response = api_client.patch(f"/api/v1/roles/{org['ceo'].id}/", {"reports_to": org["engineer"].id})
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
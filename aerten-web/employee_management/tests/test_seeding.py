@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from employee_management import headcount
+from model_bakery import baker
+from employee_management.models import Employee, Request, Role, Team
+from employee_management.seeding import DataSeeder
+import pytest
+
+
+def snapshot():
+    return sorted(Employee.objects.values_list("user__username", "user__last_name", "role__title", "gender", "access_level", "join_date"))
+
+
+@pytest.mark.django_db
+class TestDataSeeder:
+    def test_creates_employees_with_their_details(self):
+        created = DataSeeder(seed=1).run(30, teams=3, roles=10)
+
+        assert created["users"] == 30
+        assert Employee.objects.filter(user__username__startswith="seed").count() == 30
+        assert Request.objects.count() == 60
+        assert Employee.objects.filter(address__isnull=False, educations__isnull=False).distinct().count() == 30
+        employee = Employee.objects.select_related("user", "role").first()
+        assert employee.user.last_name.lower() in employee.search_document
+        assert employee.user.check_password("password")
+        assert headcount.summary()["total"] == 30
+
+    def test_roles_form_a_reporting_tree(self):
+        DataSeeder(seed=1).run(5, roles=21)
+
+        assert Role.objects.filter(reports_to__isnull=True).count() == 1
+        assert Role.objects.get(title="seed-role-20").reports_to.title == "seed-role-4"
+
+    def test_same_seed_same_data(self):
+        DataSeeder(seed=7).run(20)
+        first = snapshot()
+        get_user_model().objects.all().delete()
+
+        DataSeeder(seed=7).run(20)
+
+        assert snapshot() == first
+
+    def test_topped_up_data_matches_a_fresh_run(self):
+        DataSeeder(seed=7).run(10)
+        DataSeeder(seed=7).run(25)
+        topped_up = snapshot()
+        get_user_model().objects.all().delete()
+        Role.objects.all().delete()
+        Team.objects.all().delete()
+
+        DataSeeder(seed=7).run(25)
+
+        assert snapshot() == topped_up
+
+    def test_leaves_existing_roles_and_teams_alone(self):
+        role = baker.make(Role, title="Role 0")
+        team = baker.make(Team, name="Team 0")
+
+        DataSeeder(seed=1).run(20)
+
+        assert not Employee.objects.filter(role=role).exists()
+        assert not team.employee_set.exists()
+        assert Role.objects.filter(title__startswith="seed-role-").count() == 10
+
+    def test_running_again_tops_up(self):
+        DataSeeder(seed=1).run(10)
+
+        created = DataSeeder(seed=1).run(25)
+
+        assert created["users"] == 15
+        assert created["roles"] == 0
+        assert Employee.objects.count() == 25
+
+    def test_command(self, capsys):
+        call_command("seed_data", "12", "--seed", "3", "--prefix", "load")
+
+        assert get_user_model().objects.filter(username__startswith="load").count() == 12
+        assert "Created 12 users" in capsys.readouterr().out
@@ -0,0 +1,98 @@
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from employee_management.models import Employee, EmployeeImage
+
+logger = logging.getLogger(__name__)
+
+
+# Square avatar sizes in pixels
+THUMBNAIL_SIZES = {
+    "small": 64,
+    "medium": 256,
+}
+
+# WebP first, JPEG for clients that cannot decode it
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+DERIVATIVES_DIR = "employee_management/images/derivatives"
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.IMAGE_DERIVATIVE_WORKERS, thread_name_prefix="thumbnails")
+    return _executor
+
+
+def render_derivatives(source):
+    """
+    Yield (size name, format, bytes) for every thumbnail of an uploaded image.
+    Only pixels are re-encoded, so EXIF, GPS and ICC metadata never reach the derivatives.
+    """
+    with Image.open(source) as original:
+        # Apply the camera orientation before the EXIF block is dropped
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    for (name, size) in THUMBNAIL_SIZES.items():
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for (extension, (image_format, options)) in FORMATS.items():
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, image_format, **options)
+            yield (name, extension, buffer.getvalue())
+
+
+def delete_derivatives(derivatives, storage):
+    for formats in derivatives.values():
+        for path in formats.values():
+            storage.delete(path)
+
+
+def generate_derivatives(employee_id, image_name):
+    """Build and store the thumbnails for an EmployeeImage, unless it was replaced in the meantime"""
+    image = EmployeeImage.objects.filter(pk=employee_id, image=image_name).first()
+    if image is None:
+        return
+    storage = image.image.storage
+    (stem, _) = posixpath.splitext(posixpath.basename(image_name))
+    derivatives = {}
+    with image.image.open("rb") as source:
+        for (name, extension, content) in render_derivatives(source):
+            path = storage.save(f"{DERIVATIVES_DIR}/{employee_id}/{stem}-{name}.{extension}", ContentFile(content))
+            derivatives.setdefault(name, {})[extension] = path
+
+    # update() so that no signal schedules the work again
+    if EmployeeImage.objects.filter(pk=employee_id, image=image_name).update(derivatives=derivatives):
+        delete_derivatives(image.derivatives, storage)
+        Employee.objects.filter(pk=employee_id).update(updated_at=timezone.now())
+    else:
+        delete_derivatives(derivatives, storage)
+
+
+def _run_in_worker(employee_id, image_name):
+    close_old_connections()
+    try:
+        generate_derivatives(employee_id, image_name)
+    except Exception:
+        logger.exception("Could not build thumbnails for employee %s", employee_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(image):
+    """Build the thumbnails off the request thread once the upload is committed"""
+    (employee_id, image_name) = (image.pk, image.image.name)
+    if settings.IMAGE_DERIVATIVE_WORKERS:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, employee_id, image_name))
+    else:
+        transaction.on_commit(lambda: generate_derivatives(employee_id, image_name))
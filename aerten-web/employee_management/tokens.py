@@ -0,0 +1,107 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer as BaseTokenObtainPairSerializer, TokenRefreshSerializer as BaseTokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+# Authorization claims added to every token, read by the permission classes instead of the user and employee rows
+EMPLOYEE_ID_CLAIM = "employee_id"
+ACCESS_LEVEL_CLAIM = "access_level"
+IS_STAFF_CLAIM = "is_staff"
+# Version of the user's authorization state the claims were read at, see claims_are_current
+AUTHZ_VERSION_CLAIM = "authz_version"
+
+
+def authz_state(user_id):
+    """
+    (is_active, is_staff, employee_id, access_level) of a user as stored now, in one query on
+    the user's primary key and the employee's unique user_id. None when the user is gone.
+    """
+    return get_user_model().objects.filter(pk=user_id).values_list('is_active', 'is_staff', 'employee__id', 'employee__access_level').first()
+
+
+def _authz_version_key(user_id):
+    return f"authz-version:{user_id}"
+
+
+def _authz_version_timeout():
+    # A version only has to outlive the tokens carrying it
+    return int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def authz_version(user_id):
+    """Current authorization version of a user, created on first use"""
+    key = _authz_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=_authz_version_timeout())
+        version = cache.get(key)
+    return version
+
+
+def _new_authz_version(user_id):
+    # A fresh value rather than incr(): after a cache loss claims_are_current puts an old token's
+    # version back, and counting up from it could land on the version of another old token
+    cache.set(_authz_version_key(user_id), time.time_ns(), timeout=_authz_version_timeout())
+
+
+def bump_authz_version(user_id):
+    """
+    Stop trusting the claims of every token issued to a user so far.
+
+    The signal handlers call it when the access level, the staff or active flag or the employee changes;
+    code changing those with QuerySet.update() has to call it itself. Bumped now and again once committed,
+    so a token issued while the transaction runs is not trusted either.
+    """
+    _new_authz_version(user_id)
+    transaction.on_commit(lambda: _new_authz_version(user_id))
+
+
+def add_authz_claims(token, user_id):
+    # The version first: a change landing between the two reads leaves the token stale, not wrong
+    token[AUTHZ_VERSION_CLAIM] = authz_version(user_id)
+    (_, is_staff, employee_id, access_level) = authz_state(user_id) or (False, False, None, None)
+    token[EMPLOYEE_ID_CLAIM] = employee_id
+    token[ACCESS_LEVEL_CLAIM] = access_level
+    token[IS_STAFF_CLAIM] = is_staff
+    return token
+
+
+def claims_are_current(token):
+    """
+    Whether a token's claims are still current, so the user and employee rows need not be loaded.
+
+    Decided by the user's authorization version in the cache, without a query. When the version is
+    gone (eviction, flush, restart) the claims are compared with the rows instead and, if they still
+    match, the token's version is put back. Losing the cache never makes stale claims trusted.
+    """
+    if AUTHZ_VERSION_CLAIM not in token:
+        # Issued before the claims existed
+        return False
+    user_id = token[api_settings.USER_ID_CLAIM]
+    version = cache.get(_authz_version_key(user_id))
+    if version is not None:
+        return version == token[AUTHZ_VERSION_CLAIM]
+    
+    current = authz_state(user_id) == (True, token[IS_STAFF_CLAIM], token[EMPLOYEE_ID_CLAIM], token[ACCESS_LEVEL_CLAIM])
+    if current:
+        cache.add(_authz_version_key(user_id), token[AUTHZ_VERSION_CLAIM], timeout=_authz_version_timeout())
+    return current
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_authz_claims(super().get_token(user), user.pk)
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # The access token copies the refresh token's claims, which may predate a change; reissue them
+        access = AccessToken(data["access"])
+        data["access"] = str(add_authz_claims(access, access[api_settings.USER_ID_CLAIM]))
+        return data
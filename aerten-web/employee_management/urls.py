@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 # from rest_framework.routers import SimpleRouter, DefaultRou
 from rest_framework_nested import routers
@@ -20,4 +21,9 @@ employees_router.register('educations', views.EducationViewSet, basename='employ
 employees_router.register('address', views.AddressViewSet, basename='employee-address')
 
 
-urlpatterns = router.urls + employees_router.urls
\ No newline at end of file
+urlpatterns = router.urls + employees_router.urls
+
+if settings.ASYNC_READ_VIEWS:
+    # Async GET handlers in front of the same URLs, worth it only under ASGI
+    from .async_views import urlpatterns as async_urlpatterns
+    urlpatterns = async_urlpatterns + urlpatterns
\ No newline at end of file
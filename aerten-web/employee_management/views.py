@@ -1,86 +1,237 @@
+import hashlib
+import io
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import router
+from django.db.models import Count, Max
 from rest_framework.response import Response
 from rest_framework import status
 from django_filters.rest_framework import DjangoFilterBackend
 
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.viewsets import ModelViewSet, GenericViewSet
-from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.mixins import CreateModelMixin, ListModelMixin, RetrieveModelMixin, UpdateModelMixin
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from core.instrumentation import InstrumentedViewMixin, phase
 from .models import Permission, Team, Role, Employee, EmployeeImage, Education, Address, Request
-from .serializers import PermissionSerializer, AssignRoleSerializer, TeamSerializer, RoleSerializer, EmployeeSerializer, EmployeeImageSerializer, EducationSerializer, AddressSerializer, RequestSerializer
-from .filters import RoleFilter, EmployeeFilter, RequestFilter
-from .pagination import DefaultPagination
+from .serializers import PermissionSerializer, AssignRoleSerializer, AssignTeamSerializer, TeamSerializer, RoleSerializer, EmployeeSerializer, EmployeeImageSerializer, EducationSerializer, AddressSerializer, RequestSerializer, RequestDecisionSerializer
+from .filters import RoleFilter, EmployeeFilter, RequestFilter, RankedOrderingFilter, RankedSearchFilter
+from .pagination import DefaultPagination, EmployeePagination, RequestQueuePagination
+from .bulk import bulk_assign_role, bulk_change_team, decide_requests
+from . import exporters, headcount
+from .exporters import EmployeeExporter
+from .importers import EmployeeImporter, detect_format
+from .hierarchy import ancestor_roles, org_chart, report_role_ids, role_subtree
+from .cache import ROLES_CACHE, PERMISSIONS_CACHE, ORG_CHART_CACHE, build_cache_key, cache_timeout, normalize_query_string
 from .permissions import IsAdminOrReadOnly, IsAdminOrManager, IsAdminManagerOrOwner
+from .profiles import current_employee, current_employee_id, ensure_employee, is_admin_or_manager
 
 
 
-class BaseViewSet(ModelViewSet):  # Common base ViewSet
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+NO_PROFILE_MESSAGE = "No employee profile exists for this user."
+PROFILE_INCOMPLETE_MESSAGE = "Your profile is incomplete. Please contact the admin to assign a role and team."
 
 
-# Create your views here.
-
-class PermissionViewSet(BaseViewSet):
-    queryset = Permission.objects.all()
-    serializer_class = PermissionSerializer
-    permission_classes = [IsAdminOrReadOnly]
+class BaseViewSet(InstrumentedViewMixin, ModelViewSet):  # Common base ViewSet
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter, RankedOrderingFilter]
+    # Timestamp column touched on every change, used to build ETag / Last-Modified
+    change_marker_field = "updated_at"
+    
+    
+    def list(self, request, *args, **kwargs):
+        validators = None
+        if not self.paginates_by_keyset():
+            validators = self.get_validators(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(validators, self.get_list_response, request, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            validators = self.get_validators(queryset)
+        except (TypeError, ValueError, DjangoValidationError):
+            validators = None  # Malformed lookup, get_object answers 404
+        return self.conditional_response(validators, super().retrieve, request, *args, **kwargs)
+    
+    def get_list_response(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    def paginates_by_keyset(self):
+        # Keyset pages never touch the rows before or after them, a MAX/COUNT over the whole list would
+        paginator = self.paginator
+        return paginator is not None and getattr(paginator, "uses_keyset", lambda request, view: False)(self.request, self)
+    
+    def get_validators(self, queryset):
+        """
+        ETag and Last-Modified for the rows behind a response, from one aggregate query.
+        The row count catches deletes, the latest change marker catches inserts and updates.
+        """
+        aggregates = self.get_validator_aggregates(queryset)
+        if aggregates is None:
+            return None
+        with phase("queryset"):
+            markers = queryset.order_by().aggregate(**aggregates)
+        return self.build_validators(markers)
+    
+    def get_validator_aggregates(self, queryset):
+        model_fields = {field.name for field in queryset.model._meta.get_fields()}
+        if self.change_marker_field not in model_fields:
+            return None
+        return {"last_modified": Max(self.change_marker_field), "count": Count("pk")}
+    
+    def build_validators(self, markers):
+        if not markers["count"]:
+            return None
+        etag = self.build_etag(markers["last_modified"].isoformat(), str(markers["count"]))
+        return (etag, int(markers["last_modified"].timestamp()))
+    
+    def build_etag(self, *markers):
+        request = self.request
+        identity = "|".join([
+            request.path,
+            normalize_query_string(request.query_params),
+            request.META.get("HTTP_ACCEPT", ""),
+            str(request.user.pk),
+            *markers,
+        ])
+        return quote_etag(hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32])
+    
+    def conditional_response(self, validators, handler, request, *args, **kwargs):
+        """Answer 304 Not Modified before the handler runs, otherwise add the validators to its response"""
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        
+        response = self.not_modified_response(request, validators)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        return self.add_validators(response, validators)
+    
+    @staticmethod
+    def not_modified_response(request, validators):
+        (etag, last_modified) = validators
+        return get_conditional_response(request._request, etag=etag, last_modified=last_modified)
     
+    @staticmethod
+    def add_validators(response, validators):
+        (etag, last_modified) = validators
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class CachedListMixin:
+    """
+    Cache list responses per query string under a versioned namespace.
+    Signal handlers bump the version on every write, so entries never go stale.
+    """
+    cache_namespace = None
     
     def list(self, request, *args, **kwargs):
-        cache_key = "permissions_list"
-        cached_permissions = cache.get(cache_key)
+        self.list_cache_key = build_cache_key(self.cache_namespace, request)
+        return self.conditional_response(self.get_cached_validators(self.list_cache_key), self.get_list_response, request, *args, **kwargs)
+    
+    def get_cached_validators(self, cache_key):
+        # The key carries the namespace version, which every write moves, so the ETag needs no query.
+        # No Last-Modified: the version is not a time
+        return (self.build_etag(cache_key), None)
+    
+    def get_list_response(self, request, *args, **kwargs):
+        cache_key = self.list_cache_key
+        cached_data = cache.get(cache_key)
 
-        if cached_permissions:
-            return Response(cached_permissions)
+        if cached_data is not None:
+            return Response(cached_data)
 
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data)
+        response = super().get_list_response(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(cache_key, response.data, timeout=cache_timeout())
         return response
 
+
+# Create your views here.
+
+class PermissionViewSet(CachedListMixin, BaseViewSet):
+    queryset = Permission.objects.all()
+    serializer_class = PermissionSerializer
+    permission_classes = [IsAdminOrReadOnly]
+    cache_namespace = PERMISSIONS_CACHE
+
 class TeamViewSet(BaseViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
     search_fields = ["name"]
     permission_classes = [IsAuthenticated]
     
-class RoleViewSet(BaseViewSet):
+class RoleViewSet(CachedListMixin, BaseViewSet):
     queryset = Role.objects.prefetch_related("permission").all()
     serializer_class = RoleSerializer
     filterset_class = RoleFilter
     search_fields = ["title", "description"]
     permission_classes = [IsAdminOrReadOnly]
+    cache_namespace = ROLES_CACHE
     
     
-    def list(self, request, *args, **kwargs):
-        cache_key = "roles_list"
-        cached_roles = cache.get(cache_key)
-
-        if cached_roles:
-            return Response(cached_roles)
-
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=3600)  # Cache for 1 hour
-        return response
+    @action(detail=True, methods=['GET'], permission_classes=[IsAuthenticated])
+    def subtree(self, request, pk=None):
+        """The role, every role under it and the employees holding each one"""
+        return Response(role_subtree(self.get_object()))
+    
+    @action(detail=True, methods=['GET'], permission_classes=[IsAuthenticated])
+    def ancestors(self, request, pk=None):
+        """The chain of roles this role reports to, nearest first"""
+        role = self.get_object()
+        chain = [
+            {"id": ancestor.id, "title": ancestor.title, "employment_type": ancestor.employment_type, "reports_to": ancestor.reports_to_id, "depth": ancestor.depth}
+            for ancestor in ancestor_roles(role.pk)[1:]
+        ]
+        return Response(chain)
+    
+    # The org chart names the employees holding each role, unlike the role list it is not public
+    @action(detail=False, methods=['GET'], permission_classes=[IsAuthenticated])
+    def tree(self, request):
+        """The whole org chart, cached until a role or an employee assignment changes"""
+        cache_key = build_cache_key(ORG_CHART_CACHE, request)
+        chart = cache.get(cache_key)
+        if chart is None:
+            chart = org_chart()
+            cache.set(cache_key, chart, timeout=cache_timeout())
+        return Response(chart)
     
 
 
 class EmployeeViewSet(BaseViewSet):
-    queryset = Employee.objects.prefetch_related('team').select_related('role').all()
+    queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     permission_classes = [IsAdminUser]
     filterset_class = EmployeeFilter
-    pagination_class = DefaultPagination
+    pagination_class = EmployeePagination
     search_fields = ["user__first_name", "user__last_name"]
+    search_document_field = "search_document"
     ordering_fields = ["user__first_name"]
 
     
     
+    def get_queryset(self):
+        # Writes render the full employee, see DynamicFieldsMixin
+        fields = EmployeeSerializer.get_requested_fields(self.request.query_params) if self.request.method in SAFE_METHODS else None
+        return EmployeeSerializer.setup_eager_loading(super().get_queryset(), fields)
+    
     def get_permissions(self):
+        if self.action == 'export':
+            return [IsAdminUser()]
+        if self.action == 'stats':
+            return [IsAuthenticated(), IsAdminOrManager()]
         if self.request.method == 'GET':
             return [IsAuthenticated()]
         return [IsAdminOrReadOnly()]
@@ -88,15 +239,18 @@ class EmployeeViewSet(BaseViewSet):
     
     @action(detail=False, methods=['GET', 'PUT'], permission_classes=[IsAuthenticated])
     def me(self, request):
-        (employee, created) = Employee.objects.get_or_create(user_id=request.user.id)
-            
         if request.method == 'GET':
+            # Reads never create the profile, the user post_save signal does that
+            employee = current_employee(request)
+            if employee is None:
+                return Response({"detail": NO_PROFILE_MESSAGE}, status=status.HTTP_404_NOT_FOUND)
             serializer = EmployeeSerializer(employee)
             response_data = serializer.data
             if not employee.role or not employee.team.exists():
-                response_data["message"] = "Your profile is incomplete. Please contact the admin to assign a role and team."
+                response_data["message"] = PROFILE_INCOMPLETE_MESSAGE
             return Response(response_data)
         elif request.method == 'PUT':
+            employee = ensure_employee(request)
             serializer = EmployeeSerializer(employee, data=request.data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -111,27 +265,71 @@ class EmployeeViewSet(BaseViewSet):
 
         if "employee_id" in serializer.validated_data:
             employee = serializer.validated_data["employee_id"]
-            employee.role = role
-            employee.save()
+            bulk_assign_role(role, [employee.pk])
             return Response({"message": f"Role assigned to employee {employee.id}"}, status=status.HTTP_200_OK)
 
         if "employee_ids" in serializer.validated_data:
-            employees = serializer.validated_data["employee_ids"]
-            for employee in employees:
-                employee.role = role
-                employee.save()
-            return Response({"message": f"Role assigned to {len(employees)} employees"}, status=status.HTTP_200_OK)
+            (updated, missing) = bulk_assign_role(role, serializer.validated_data["employee_ids"])
+            return Response({
+                "message": f"Role assigned to {len(updated)} employees",
+                "updated": updated,
+                "missing": missing,
+            }, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['GET'])
+    def stats(self, request):
+        # Headcount by team, role, employment status, gender and access level from the summary table
+        return Response(headcount.summary())
+    
+    @action(detail=False, methods=['GET'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        file_format = request.query_params.get('file_format', exporters.FORMAT_CSV)
+        if file_format not in exporters.CONTENT_TYPES:
+            return Response({"file_format": [f"Choose one of: {', '.join(exporters.CONTENT_TYPES)}."]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        exporter = EmployeeExporter(self.filter_queryset(self.get_queryset()), file_format)
+        # Each server gets the iterator it can stream, the other kind is buffered whole by Django
+        content = aiter(exporter) if isinstance(request._request, ASGIRequest) else iter(exporter)
+        response = StreamingHttpResponse(content, content_type=exporter.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{exporter.filename}"'
+        return response
+    
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser], parser_classes=[MultiPartParser])
+    def import_employees(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": ["Upload a CSV or NDJSON file."]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Large uploads are spooled to disk by Django, rows are read from it one at a time
+        file_format = detect_format(upload.name, request.data.get('file_format'))
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = EmployeeImporter().run(stream, file_format)
+        return Response(result, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'], url_path='assign_team', serializer_class=AssignTeamSerializer, permission_classes=[IsAdminUser])
+    def assign_team(self, request):
+        serializer = AssignTeamSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        team = serializer.validated_data["team_id"]
+        team_action = serializer.validated_data["action"]
+        (updated, missing) = bulk_change_team(team, serializer.validated_data["employee_ids"], team_action)
+        verb = "added to" if team_action == "add" else "removed from"
+        return Response({
+            "message": f"{len(updated)} employees {verb} team {team.name}",
+            "updated": updated,
+            "missing": missing,
+        }, status=status.HTTP_200_OK)
 
 
-class EmployeeImageViewSet(ModelViewSet):
+class EmployeeImageViewSet(InstrumentedViewMixin, ModelViewSet):
     serializer_class = EmployeeImageSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        
-        employee = user.employee
-        
+        employee = current_employee(self.request)
+        if employee is None:
+            return EmployeeImage.objects.none()
         return EmployeeImage.objects.filter(employee=employee)
     
     def get_object(self):
@@ -142,16 +340,37 @@ class RequestViewSet(BaseViewSet):
     serializer_class = RequestSerializer
     permission_classes = [IsAuthenticated, IsAdminManagerOrOwner]
     filterset_class = RequestFilter
+    search_fields = ["detail"]
+    search_document_field = "detail"
+    ordering_fields = ["date_requested", "status"]
+    ordering = ["-date_requested", "-id"]
+    pagination_class = RequestQueuePagination
+    queue_query_param = "queue"
+    
+    def in_queue(self):
+        """`?queue=true` narrows the list to requests from the employees reporting to the caller"""
+        return self.request.query_params.get(self.queue_query_param) in ("true", "1")
     
     def get_queryset(self):
         user = self.request.user
         if not user:
             return Request.objects.none()
         
-        (employee, created) = Employee.objects.get_or_create(user_id=user.id)
-        if user.is_staff or employee.access_level in ["Admin", "Manager"]:
-            return Request.objects.all()     
-        return Request.objects.filter(employee__user=user)
+        if is_admin_or_manager(self.request):
+            requests = Request.objects.all()
+        else:
+            employee_id = current_employee_id(self.request)
+            if employee_id is None:
+                return Request.objects.none()
+            requests = Request.objects.filter(employee_id=employee_id)
+        
+        if self.action == "list" and self.in_queue():
+            employee = current_employee(self.request)
+            if employee is None or employee.role_id is None:
+                return Request.objects.none()
+            # The reports_to walk runs inside the same statement, see hierarchy.report_role_ids
+            requests = requests.filter(employee__role_id__in=report_role_ids(employee.role_id))
+        return requests
     
     
     
@@ -184,25 +403,49 @@ class RequestViewSet(BaseViewSet):
     def reject(self, request, pk=None):
         return self._update_request_status(request, pk, "Rejected")
     
+    @action(detail=False, methods=['PATCH'], url_path='approve', serializer_class=RequestDecisionSerializer, permission_classes=[IsAdminOrManager])
+    def bulk_approve(self, request):
+        return self._bulk_update_request_status(request, "Approved")
+    
+    @action(detail=False, methods=['PATCH'], url_path='reject', serializer_class=RequestDecisionSerializer, permission_classes=[IsAdminOrManager])
+    def bulk_reject(self, request):
+        return self._bulk_update_request_status(request, "Rejected")
+    
     def _update_request_status(self, request, pk, new_status):
-        request_obj = self.get_object()
-        
-        if request_obj.status == new_status:
+        # Decide and read back on the primary, a replica may not have the UPDATE yet
+        queryset = self.get_queryset().using(router.db_for_write(Request))
+        try:
+            # Only a pending request can be decided, and only once even when two managers act together
+            updated = queryset.filter(pk=pk, status="Pending").update(status=new_status, approver_id=request.user.pk, updated_at=timezone.now())
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound()
+        if not updated:
+            current_status = queryset.filter(pk=pk).values_list("status", flat=True).first()
+            if current_status is None:
+                raise NotFound()
             return Response(
-                {"detail": f"This request is already {new_status}."}, status=status.HTTP_400_BAD_REQUEST
+                {"detail": f"This request is already {current_status}."}, status=status.HTTP_400_BAD_REQUEST
             )
         
-        request_obj.status = new_status
-        request_obj.approver = request.user
-        request_obj.save()
-        
         # Return the updated request
-        serializer = self.get_serializer(request_obj)  # Pass only the instance
+        serializer = self.get_serializer(queryset.get(pk=pk))  # Pass only the instance
         return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    def _bulk_update_request_status(self, request, new_status):
+        serializer = RequestDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        (updated, skipped) = decide_requests(self.get_queryset(), serializer.validated_data["ids"], new_status, request.user.pk)
+        return Response({
+            "message": f"{len(updated)} requests {new_status.lower()}",
+            "updated": updated,
+            # Already approved or rejected, or not found
+            "skipped": skipped,
+        }, status=status.HTTP_200_OK)
 
     
     def perform_create(self, serializer):
-        serializer.save(employee=self.request.user.employee)        
+        serializer.save(employee=ensure_employee(self.request))        
      
     
         
@@ -217,7 +460,9 @@ class EducationViewSet(BaseViewSet):
         return Education.objects.filter(employee_id=employee_id)
     
     def get_serializer_context(self):
-        return {'employee_id': self.kwargs['employee_pk']}
+        context = super().get_serializer_context()
+        context['employee_id'] = self.kwargs['employee_pk']
+        return context
     
     def get_permissions(self):
         if self.request.method in ['POST', 'PUT', 'DELETE']:
@@ -235,7 +480,9 @@ class AddressViewSet(BaseViewSet):
         return Address.objects.filter(employee_id=employee_id)
     
     def get_serializer_context(self):
-        return {'employee_id': self.kwargs['employee_pk']}
+        context = super().get_serializer_context()
+        context['employee_id'] = self.kwargs['employee_pk']
+        return context
     
     def get_permissions(self):
         if self.request.method in ['POST', 'PUT', 'DELETE']:
@@ -0,0 +1,19 @@
+# Picked up by gunicorn from the working directory (see Procfile / render.yaml)
+import os
+import shutil
+
+# Workers share their Prometheus counters through files in this directory (see core/metrics.py).
+# It has to be set before prometheus_client is imported, so it is set here rather than in settings
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/aerten-prometheus")
+
+
+def on_starting(server):
+    # Counters left over from the previous run would be added to the new ones
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,44 +1,30 @@
+import random
 from locust import HttpUser, task, between
-from random import randint
+from locust.exception import StopUser
+from common import auth_headers, tokens
 
 
 class WebSiteUser(HttpUser):
     wait_time = between(1, 5)
-    token = None  # Stores the JWT token
 
     def on_start(self):
-        """Authenticate and obtain JWT token before making requests"""
-        response = self.client.post(
-            "/auth/jwt/create/",
-            json={
-                "username": "iviidev",  # Replace with your actual username
-                "password": "iviidev",  # Replace with your actual password
-            },
-        )
-
-        if response.status_code == 200:
-            self.token = response.json().get("access")
-            print("Successfully authenticated")
-        else:
-            print(f"Authentication failed: {response.text}")
+        """Log in as the next seeded account from the shared token pool"""
+        (_, token) = tokens.checkout(self.client)
+        if token is None:
+            raise StopUser()
+        self.headers = auth_headers(token)
+        self.role_ids = []
 
     @task(2)
-    def view_teams(self):
-        """Fetch employees list with authentication"""
-        if self.token:
-            headers = {"Authorization": f"Bearer {self.token}"}
-            self.client.get("/api/v1/roles/", name="/api/v1/roles", headers=headers)
-        else:
-            print("No token available, skipping request")
+    def view_roles(self):
+        """Fetch the role list, and remember the ids for view_role"""
+        response = self.client.get("/api/v1/roles/", name="/api/v1/roles/", headers=self.headers)
+        if response.status_code == 200:
+            self.role_ids = [role["id"] for role in response.json()]
 
     @task(4)
-    def view_team(self):
-        """Fetch a single employee's details with authentication"""
-        if self.token:
-            headers = {"Authorization": f"Bearer {self.token}"}
-            role_id = randint(1, 11)
-            self.client.get(
-                f"/api/v1/roles/{role_id}/", name="/api/v1/roles/:id", headers=headers
-            )
-        else:
-            print("No token available, skipping request")
+    def view_role(self):
+        """Fetch a random role that exists"""
+        if self.role_ids:
+            role_id = random.choice(self.role_ids)
+            self.client.get(f"/api/v1/roles/{role_id}/", name="/api/v1/roles/:id/", headers=self.headers)
@@ -0,0 +1,156 @@
+"""
+Shared pieces of the load test scenarios: accounts, employee ids and pass/fail thresholds.
+
+The accounts are the ones `manage.py seed_data` creates (seed0, seed1, ... with the same
+password), every simulated user logs in as a different one. Configure with environment
+variables:
+
+    LOCUST_USER_PREFIX    username prefix given to seed_data (default seed)
+    LOCUST_USER_COUNT     number of seeded users (default 1000)
+    LOCUST_PASSWORD       their password (default password)
+    LOCUST_ADMIN_USERNAME / LOCUST_ADMIN_PASSWORD
+                          a staff account for the admin scenarios, e.g. from createsuperuser
+"""
+import base64
+import itertools
+import json
+import os
+import random
+import threading
+from locust import events
+
+
+USER_PREFIX = os.environ.get("LOCUST_USER_PREFIX", "seed")
+USER_COUNT = int(os.environ.get("LOCUST_USER_COUNT", 1000))
+PASSWORD = os.environ.get("LOCUST_PASSWORD", "password")
+ADMIN_USERNAME = os.environ.get("LOCUST_ADMIN_USERNAME")
+ADMIN_PASSWORD = os.environ.get("LOCUST_ADMIN_PASSWORD")
+
+# Endpoint name -> (p95 in ms, share of failed requests) a run must stay under
+THRESHOLDS = {
+    "GET /api/v1/employees/me/": (300, 0.01),
+    "PUT /api/v1/employees/me/": (500, 0.01),
+    "GET /api/v1/employees/": (500, 0.01),
+    "GET /api/v1/employees/:id/": (300, 0.01),
+    "GET /api/v1/employees/?search": (500, 0.01),
+    "POST /api/v1/employees/assign_role/": (800, 0.01),
+    "GET /api/v1/requests/": (500, 0.01),
+    "GET /api/v1/requests/?queue=true&status=Pending": (300, 0.01),
+    "POST /api/v1/requests/": (500, 0.01),
+    "PATCH /api/v1/requests/:id/approve/": (500, 0.01),
+    "PATCH /api/v1/requests/:id/reject/": (500, 0.01),
+    "PATCH /api/v1/requests/approve/": (800, 0.01),
+    "POST /api/v1/employee-image/": (1500, 0.01),
+    "GET /api/v1/roles/": (300, 0.01),
+    "GET /api/v1/roles/:id/": (300, 0.01),
+    "GET /api/v1/permissions/": (300, 0.01),
+    "GET /api/v1/permissions/:id/": (300, 0.01),
+    "GET /api/v1/teams/": (300, 0.01),
+    "GET /api/v1/teams/:id/": (300, 0.01),
+    # Logins hash a password and bunch up while users spawn
+    "POST /auth/jwt/create/": (2000, 0.01),
+}
+
+
+def claims(token):
+    """Payload of a JWT, the server checks the signature, this only reads it"""
+    payload = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+class TokenPool:
+    """
+    Logs in seeded accounts on demand and keeps their tokens, so that users spawned again
+    (or by another scenario) reuse a login instead of paying for a password check each time.
+    """
+
+    def __init__(self):
+        self.tokens = {}
+        self.lock = threading.Lock()
+        # Spread users over the pool, starting somewhere random so that two runs differ
+        self.usernames = itertools.cycle(f"{USER_PREFIX}{n}" for n in random.sample(range(USER_COUNT), USER_COUNT))
+
+    def next_username(self):
+        with self.lock:
+            return next(self.usernames)
+
+    def login(self, client, username, password=PASSWORD):
+        with self.lock:
+            token = self.tokens.get(username)
+        if token is not None:
+            return token
+        response = client.post("/auth/jwt/create/", json={"username": username, "password": password}, name="/auth/jwt/create/")
+        if response.status_code != 200:
+            return None
+        token = response.json()["access"]
+        with self.lock:
+            self.tokens[username] = token
+        return token
+
+    def checkout(self, client, access_levels=None, attempts=50):
+        """(username, token) of the next account, optionally only those with one of `access_levels`"""
+        for _ in range(attempts):
+            username = self.next_username()
+            token = self.login(client, username)
+            if token is not None and (access_levels is None or claims(token).get("access_level") in access_levels):
+                return (username, token)
+        return (None, None)
+
+
+tokens = TokenPool()
+
+
+class IdPool:
+    """
+    Employee ids to read. Picks are skewed towards the front of the list, like real traffic
+    where a few profiles are opened much more often than the rest, but every id can come up.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.lock = threading.Lock()
+
+    def fill(self, client, headers, pages=20):
+        with self.lock:
+            if self.ids:
+                return
+            url = "/api/v1/employees/?pagination=cursor&fields=id"
+            for _ in range(pages):
+                response = client.get(url, headers=headers, name="/api/v1/employees/")
+                if response.status_code != 200:
+                    break
+                body = response.json()
+                self.ids += [employee["id"] for employee in body["results"]]
+                url = body.get("next")
+                if not url:
+                    break
+            random.shuffle(self.ids)
+
+    def pick(self):
+        if not self.ids:
+            return None
+        return self.ids[int(len(self.ids) * random.random() ** 3)]
+
+
+employee_ids = IdPool()
+
+
+def auth_headers(token):
+    return {"Authorization": f"JWT {token}"}
+
+
+@events.quitting.add_listener
+def check_thresholds(environment, **kwargs):
+    """Print a pass/fail line per endpoint and make locust exit with 1 if any failed"""
+    failed = False
+    for ((name, method), entry) in sorted(environment.stats.entries.items()):
+        key = f"{method} {name}"
+        if key not in THRESHOLDS or not entry.num_requests:
+            continue
+        (p95_limit, fail_limit) = THRESHOLDS[key]
+        p95 = entry.get_response_time_percentile(0.95)
+        ok = p95 <= p95_limit and entry.fail_ratio <= fail_limit
+        failed = failed or not ok
+        print(f"{'PASS' if ok else 'FAIL'} {key}: p95 {p95:.0f}ms (limit {p95_limit}), failures {entry.fail_ratio:.1%} (limit {fail_limit:.0%})")
+    if failed:
+        environment.process_exit_code = 1
@@ -0,0 +1,181 @@
+"""
+Production-like traffic: mostly employees reading and editing their own data, some managers
+working through the request queue and a few admins browsing the directory.
+
+    python manage.py seed_data 10000
+    locust -f locustfiles/mixed_workload.py --host http://localhost:8000 --headless -u 200 -r 20 -t 5m
+
+The run exits with status 1 when an endpoint misses its threshold in common.THRESHOLDS.
+"""
+import io
+import random
+from locust import HttpUser, between, task
+from locust.exception import StopUser
+from common import ADMIN_PASSWORD, ADMIN_USERNAME, auth_headers, claims, employee_ids, tokens
+
+
+REQUEST_TYPES = ["Leave", "Expense", "Remote Work", "Other"]
+
+
+def png_bytes():
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 320), tuple(random.randrange(256) for _ in range(3))).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class ApiUser(HttpUser):
+    abstract = True
+    wait_time = between(1, 5)
+    access_levels = None
+
+    def on_start(self):
+        (self.username, token) = tokens.checkout(self.client, self.access_levels)
+        if token is None:
+            raise StopUser()
+        self.headers = auth_headers(token)
+        self.employee_id = claims(token).get("employee_id")
+
+    def get(self, url, name, **kwargs):
+        return self.client.get(url, headers=self.headers, name=name, **kwargs)
+
+
+class EmployeeUser(ApiUser):
+    weight = 8
+
+    @task(6)
+    def view_profile(self):
+        self.get("/api/v1/employees/me/", name="/api/v1/employees/me/")
+
+    @task(3)
+    def my_requests(self):
+        self.get("/api/v1/requests/", name="/api/v1/requests/")
+
+    @task(2)
+    def create_request(self):
+        self.client.post("/api/v1/requests/", json={
+            "request_type": random.choice(REQUEST_TYPES),
+            "detail": "Load test request",
+        }, headers=self.headers, name="/api/v1/requests/")
+
+    @task(3)
+    def roles(self):
+        self.get("/api/v1/roles/", name="/api/v1/roles/")
+
+    @task(1)
+    def permissions(self):
+        self.get("/api/v1/permissions/", name="/api/v1/permissions/")
+
+    @task(1)
+    def teams(self):
+        self.get("/api/v1/teams/", name="/api/v1/teams/")
+
+    @task(1)
+    def upload_image(self):
+        self.client.post("/api/v1/employee-image/", files={"image": ("avatar.png", png_bytes(), "image/png")}, headers=self.headers, name="/api/v1/employee-image/")
+
+
+class ManagerUser(ApiUser):
+    weight = 2
+    access_levels = ("Manager", "Admin")
+
+    def pending_ids(self):
+        # First page of the requests from this manager's reports
+        response = self.get("/api/v1/requests/?queue=true&status=Pending", name="/api/v1/requests/?queue=true&status=Pending")
+        if response.status_code != 200:
+            return []
+        return [item["id"] for item in response.json()["results"]]
+
+    def decide(self, decision):
+        ids = self.pending_ids()
+        if not ids:
+            return
+        request_id = random.choice(ids[:20])
+        with self.client.patch(f"/api/v1/requests/{request_id}/{decision}/", json={}, headers=self.headers, name=f"/api/v1/requests/:id/{decision}/", catch_response=True) as response:
+            # Another manager deciding the same request first is expected, not a failure
+            if response.status_code in (400, 409):
+                response.success()
+
+    @task(4)
+    def queue(self):
+        self.pending_ids()
+
+    @task(2)
+    def approve(self):
+        self.decide("approve")
+
+    @task(1)
+    def reject(self):
+        self.decide("reject")
+
+    @task(1)
+    def approve_batch(self):
+        ids = self.pending_ids()
+        if ids:
+            # Ids another manager decided in the meantime come back as skipped
+            self.client.patch("/api/v1/requests/approve/", json={"ids": ids[:20]}, headers=self.headers, name="/api/v1/requests/approve/")
+
+    @task(1)
+    def view_profile(self):
+        self.get("/api/v1/employees/me/", name="/api/v1/employees/me/")
+
+
+class AdminUser(ApiUser):
+    weight = 1
+
+    def on_start(self):
+        if not ADMIN_USERNAME:
+            raise StopUser()
+        token = tokens.login(self.client, ADMIN_USERNAME, ADMIN_PASSWORD)
+        if token is None:
+            raise StopUser()
+        self.headers = auth_headers(token)
+        employee_ids.fill(self.client, self.headers)
+        response = self.get("/api/v1/roles/?fields=id", name="/api/v1/roles/")
+        self.role_ids = [role["id"] for role in response.json()] if response.status_code == 200 else []
+        response = self.get("/api/v1/teams/", name="/api/v1/teams/")
+        self.team_ids = [team["id"] for team in response.json()] if response.status_code == 200 else []
+
+    @task(4)
+    def view_employee(self):
+        employee_id = employee_ids.pick()
+        if employee_id is not None:
+            self.get(f"/api/v1/employees/{employee_id}/", name="/api/v1/employees/:id/")
+
+    @task(3)
+    def browse_employees(self):
+        self.get(f"/api/v1/employees/?page={random.randint(1, 50)}", name="/api/v1/employees/")
+
+    @task(2)
+    def search_employees(self):
+        self.get(f"/api/v1/employees/?search={random.choice(['mensah', 'owusu', 'ama', 'kofi', 'grace'])}", name="/api/v1/employees/?search")
+
+    @task(1)
+    def view_role(self):
+        if self.role_ids:
+            self.get(f"/api/v1/roles/{random.choice(self.role_ids)}/", name="/api/v1/roles/:id/")
+
+    @task(1)
+    def update_profile(self):
+        # Writes to /me go through IsAdminOrReadOnly (EmployeeViewSet.get_permissions), so only staff PUT here
+        response = self.get("/api/v1/employees/me/", name="/api/v1/employees/me/")
+        if response.status_code != 200 or not self.role_ids or not self.team_ids:
+            return
+        profile = response.json()
+        payload = {field: profile[field] for field in ("join_date", "birth_date", "gender", "social_handle", "employment_status", "access_level")}
+        payload.update(
+            phone=f"0{random.randrange(200000000, 599999999)}",
+            gender=profile["gender"] or random.choice("MF"),
+            role=profile["role"] or random.choice(self.role_ids),
+            team=profile["team"] or [random.choice(self.team_ids)],
+        )
+        self.client.put("/api/v1/employees/me/", json=payload, headers=self.headers, name="/api/v1/employees/me/")
+
+    @task(1)
+    def assign_role(self):
+        employee_id = employee_ids.pick()
+        if employee_id is not None and self.role_ids:
+            self.client.post("/api/v1/employees/assign_role/", json={
+                "role_id": random.choice(self.role_ids),
+                "employee_id": employee_id,
+            }, headers=self.headers, name="/api/v1/employees/assign_role/")